@@ -0,0 +1,398 @@
+"""
+Async Google AI Studio client for the OPVS Platform.
+
+The asyncio counterpart of GoogleAIStudioClient (aistudio_example.py)
+for high-volume use: one pooled HTTP connection set to the Generative
+Language API per client (HTTP/2 when the `h2` package is installed,
+keep-alive HTTP/1.1 otherwise, bounded by `max_connections`), an
+authentication check cached for `auth_ttl` seconds instead of repeated
+on every session, and batched methods that overlap requests.
+
+Return values have the same shape as the synchronous client's. Nothing
+is printed; attach a tracer for per-call visibility.
+
+Try it offline against the playground stub:
+    python playground/stub_server.py --port 8765 --latency 0.2
+    GOOGLE_AI_STUDIO_BASE_URL=http://127.0.0.1:8765 python 03_OPVS_PLATFORM/aistudio_async.py
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import httpx
+except ImportError:  # newer openai releases depend on the httpx2 fork instead
+    import httpx2 as httpx
+
+import training_data
+from generation_cache import AsyncSingleFlight, request_key
+from ids import new_id
+from resonance_buffer import BufferFull
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Raised before a request leaves the client, so even a non-idempotent one is safe to resend.
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class AsyncGoogleAIStudioClient:
+    """
+    Async client for Google AI Studio with a shared, bounded connection pool.
+    Use as `async with AsyncGoogleAIStudioClient(...) as client:` so the
+    pool is closed when done.
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 project_id: Optional[str] = None,
+                 config: Optional[Dict] = None,
+                 tracer=None,
+                 resilience=None,
+                 resonance_buffer=None,
+                 riss=None,
+                 generation_cache=None,
+                 max_connections: int = 10,
+                 auth_ttl: float = 300.0,
+                 transport=None):
+        """
+        Initialize the async Google AI Studio client.
+
+        Args:
+            api_key: Google AI Studio API key
+            project_id: Optional Google Cloud project ID
+            config: Optional configuration dictionary (base_url, api_version,
+                timeout, default_model, fallback_model, resonance_url)
+            tracer: Optional span tracer; every client method emits one span
+            resilience: Optional retry/hedge/circuit-breaker policy
+                (playground/resilience.py) for HTTP calls
+            resonance_buffer: Optional ResonanceBuffer (resonance_buffer.py);
+                tracked events are written behind to the database in batches
+            riss: Optional RissEngine (riss.py) updated by resonance events
+            generation_cache: Optional GenerationCache (generation_cache.py);
+                generate_content() serves repeated requests from it
+            max_connections: Pool size, and the most requests in flight at once
+            auth_ttl: Seconds a successful authentication stays valid
+            transport: Optional httpx transport (tests, custom proxies)
+        """
+        self.api_key = api_key
+        self.project_id = project_id
+        self.config = config or {}
+        self.base_url = self.config.get("base_url", "https://generativelanguage.googleapis.com")
+        self.api_version = self.config.get("api_version", "v1beta")
+        self.default_model = self.config.get("default_model", "gemini-pro")
+        self.fallback_model = self.config.get("fallback_model", self.default_model)
+        self.resonance_url = self.config.get("resonance_url")
+        self.tracer = tracer
+        self.resilience = resilience
+        self.resonance_buffer = resonance_buffer
+        self.riss = riss
+        self.generation_cache = generation_cache
+        self._inflight = AsyncSingleFlight()
+        self.auth_ttl = auth_ttl
+        self._auth_expires = 0.0
+        self._auth_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_connections)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=30.0),
+            timeout=self.config.get("timeout", 30),
+            headers={"x-goog-api-key": api_key},
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _span(self, stage: str, **attrs):
+        """Open a tracing span for one client operation (a no-op without a tracer)."""
+        if self.tracer is None:
+            return nullcontext({})
+        return self.tracer.span(f"aistudio.{stage}", platform="google_ai_studio", **attrs)
+
+    async def _request(self, method: str, url: str, span=None, model: Optional[str] = None,
+                       path=None, idempotent: Optional[bool] = None, **kwargs):
+        """
+        Send one request through the pool, under the resilience policy if any.
+        With `model` and `path(model)`, a circuit-broken model falls back to
+        `fallback_model`. Returns (decoded JSON body, model used).
+
+        Only idempotent requests (GETs by default) are hedged and retried
+        freely. Any other request is sent once, and resent only after an
+        error raised before it left the client (UNSENT_ERRORS), so a tuning
+        job or a resonance event is never created twice.
+        """
+        idempotent = method == "GET" if idempotent is None else idempotent
+
+        async def attempt(target):
+            try:
+                async with self._slots:
+                    resp = await self._http.request(method, path(target) if path else url, **kwargs)
+                resp.raise_for_status()
+            except Exception as err:
+                if not idempotent and not isinstance(err, UNSENT_ERRORS):
+                    err.retryable = False  # the server may already have acted on it
+                raise
+            return resp.json(), target
+
+        if self.resilience is None:
+            return await attempt(model)
+        return await self.resilience.acall(model or url, attempt, span, hedge=idempotent,
+                                           fallback=self.fallback_model if model else None)
+
+    async def authenticate(self, force: bool = False) -> bool:
+        """
+        Verify the API key by listing models. A success is cached for
+        `auth_ttl` seconds; concurrent callers share one check.
+        """
+        if not force and time.monotonic() < self._auth_expires:
+            return True
+        async with self._auth_lock:
+            if not force and time.monotonic() < self._auth_expires:
+                return True
+            with self._span("authenticate") as span:
+                try:
+                    await self._request("GET", f"/{self.api_version}/models", span, params={"pageSize": 1})
+                except httpx.HTTPStatusError as err:
+                    if err.response.status_code in (400, 401, 403):
+                        return False
+                    raise
+                self._auth_expires = time.monotonic() + self.auth_ttl
+                return True
+
+    async def start_calibration_session(self,
+                                        creator_id: str,
+                                        base_model: str = "gemini-pro",
+                                        mode: str = "transformation") -> Dict:
+        """Start a new Gemini model calibration session (see GoogleAIStudioClient)."""
+        with self._span("start_calibration_session", model=base_model):
+            if not await self.authenticate():
+                raise Exception("Authentication failed")
+            return {
+                "session_id": new_id("gai_session"),
+                "creator_id": creator_id,
+                "base_model": base_model,
+                "mode": mode,
+                "started_at": datetime.now().isoformat(),
+                "status": "active",
+                "platform": "google_ai_studio"
+            }
+
+    async def calibrate(self,
+                        session_id: str,
+                        training_examples: Union[Iterable[Dict], str],
+                        metadata: Optional[Dict] = None,
+                        base_model: Optional[str] = None) -> Dict:
+        """
+        Submit a tuning job (POST /tunedModels) for a calibration session.
+
+        Tuning runs for minutes to hours, so this returns at once with
+        status "running" and the long-running "operation" to poll with
+        tuning_operation(); calibration_jobs.py does the polling.
+
+        The examples are validated and deduplicated in one streaming pass
+        and uploaded in fixed-size chunks (training_data.py), so even a
+        very large dataset is never held in memory.
+
+        Args:
+            session_id: Active session ID
+            training_examples: Iterable of {"text_input", "output"} pairs,
+                or a JSONL file path
+            metadata: Optional metadata including soul_signature
+            base_model: Model to tune (defaults to default_model)
+
+        Returns:
+            Calibration result dictionary, as GoogleAIStudioClient.calibrate(),
+            with the validation totals under "training_report"
+        """
+        base_model = base_model or self.default_model
+        with self._span("calibrate", session_id=session_id, model=base_model) as span:
+            calibration_id = new_id("gai_cal")
+            packed = await asyncio.to_thread(training_data.pack, training_examples)
+            with packed:
+                head = json.dumps({
+                    "displayName": calibration_id,
+                    "baseModel": base_model if "/" in base_model else f"models/{base_model}",
+                    "tuningTask": {"trainingData": {"examples": {"examples": []}}},
+                }, separators=(",", ":")).encode("utf-8")
+                split = head.index(b"[]") + 1
+                content = packed.body(head[:split], head[split:])
+                span["examples"] = packed.count
+                span["upload_bytes"] = content.length
+                body, _ = await self._request(
+                    "POST", f"/{self.api_version}/tunedModels", span, content=content,
+                    headers={"Content-Type": "application/json", "Content-Length": str(content.length)},
+                )
+            op_meta = body.get("metadata", {})
+            span["operation"] = body.get("name")
+            return {
+                "calibration_id": calibration_id,
+                "session_id": session_id,
+                "tuned_model_id": op_meta.get("tunedModel"),
+                "operation": body.get("name"),
+                "training_examples": packed.count,
+                "training_report": packed.report.as_dict(),
+                "soul_signature": metadata.get("soul_signature") if metadata else None,
+                "timestamp": datetime.now().isoformat(),
+                "status": "completed" if body.get("done") else "running",
+                "platform": "google_ai_studio"
+            }
+
+    async def tuning_operation(self, operation: str) -> Dict:
+        """Fetch a tuning operation ("tunedModels/{id}/operations/{op}") as returned by the API."""
+        with self._span("tuning_operation", operation=operation) as span:
+            body, _ = await self._request("GET", f"/{self.api_version}/{operation}", span)
+            return body
+
+    def _model_path(self, model_id: str) -> str:
+        name = model_id if "/" in model_id else f"models/{model_id}"
+        return f"/{self.api_version}/{name}:generateContent"
+
+    async def generate_content(self,
+                               model_id: str,
+                               prompt: str,
+                               params: Optional[Dict] = None,
+                               bean_id: Optional[str] = None) -> Dict:
+        """
+        Generate content with a (calibrated) Gemini model.
+
+        Concurrent identical requests share one upstream call, and with a
+        generation_cache a repeated request is served from it
+        (generation_cache.py).
+
+        Args:
+            model_id: Tuned model ID ("tunedModels/...") or base model name
+            prompt: Prompt for generation
+            params: Optional generationConfig (temperature, maxOutputTokens, ...)
+            bean_id: Bean behind the model; every served result, cached or
+                not, tracks one "generation" resonance event for it
+
+        Returns:
+            Generated content result, including token usage, with "cache"
+            set to "miss", "coalesced" or "hit"
+        """
+        key = request_key(model_id, prompt, params)
+        with self._span("generate_content", model=model_id, prompt_chars=len(prompt)) as span:
+            cache = self.generation_cache
+            result = cache.get(key) if cache is not None else None
+            if result is not None:
+                source = "hit"
+            else:
+                result, shared = await self._inflight.do(
+                    key, lambda: self._generate(model_id, prompt, params, span))
+                source = "coalesced" if shared else "miss"
+                # A fallback model's answer is not cached under the requested model.
+                if cache is not None and not shared and result["model_id"] == model_id:
+                    cache.put(key, result)
+            span["cache"] = source
+        if bean_id is not None:
+            await self.track_resonance(bean_id, "generation", {"model_id": model_id, "cache": source})
+        return {**result, "cache": source}
+
+    async def _generate(self, model_id: str, prompt: str, params: Optional[Dict], span) -> Dict:
+        request = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if params:
+            request["generationConfig"] = params
+        body, used = await self._request(
+            "POST", self._model_path(model_id), span, model=model_id, path=self._model_path, idempotent=True,
+            json=request,
+        )
+        candidates = body.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts", [])
+        usage = body.get("usageMetadata", {})
+        span["prompt_tokens"] = usage.get("promptTokenCount")
+        span["completion_tokens"] = usage.get("candidatesTokenCount")
+        return {
+            "model_id": used,
+            "prompt": prompt,
+            "generated_text": "".join(p.get("text", "") for p in parts),
+            "usage": usage,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def generate_content_many(self,
+                                    model_id: str,
+                                    prompts: Iterable[str],
+                                    params: Optional[Dict] = None,
+                                    bean_id: Optional[str] = None) -> List[Dict]:
+        """
+        Generate for many prompts at once, overlapped over the connection
+        pool (at most `max_connections` in flight). Results keep prompt
+        order; repeated prompts share one call.
+        """
+        return list(await asyncio.gather(*(self.generate_content(model_id, p, params, bean_id) for p in prompts)))
+
+    async def track_resonance(self,
+                              bean_id: str,
+                              event_type: str,
+                              metadata: Optional[Dict] = None) -> Dict:
+        """
+        Track a resonance event. It goes to the resonance buffer if one is
+        attached, and is POSTed to config["resonance_url"] when that is set.
+        """
+        with self._span("track_resonance", bean_id=bean_id, event_type=event_type) as span:
+            event = {
+                "event_id": new_id("event"),
+                "bean_id": bean_id,
+                "event_type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "resonance_delta": 1,
+                "platform": "google_ai_studio"
+            }
+            if metadata:
+                event["metadata"] = metadata
+            if self.resonance_buffer is not None:
+                try:
+                    self.resonance_buffer.add(event, block=False)
+                except BufferFull:
+                    # Backpressure: wait for the writer off the event loop.
+                    await asyncio.to_thread(self.resonance_buffer.add, event)
+            if self.riss is not None:
+                self.riss.record_resonance(bean_id, event["resonance_delta"])
+            if self.resonance_url:
+                await self._request("POST", self.resonance_url, span, json=event)
+            return event
+
+    async def track_resonance_many(self, events: Iterable[Dict]) -> List[Dict]:
+        """
+        Track many resonance events concurrently. Each item is a dict with
+        "bean_id", "event_type" and optional "metadata".
+        """
+        return list(await asyncio.gather(*(
+            self.track_resonance(e["bean_id"], e["event_type"], e.get("metadata")) for e in events
+        )))
+
+
+async def example_usage():
+    """Overlap a batch of generations and resonance events through one pooled client."""
+    base_url = os.getenv("GOOGLE_AI_STUDIO_BASE_URL", "https://generativelanguage.googleapis.com")
+    config = {"base_url": base_url, "resonance_url": os.getenv("OPVS_RESONANCE_URL")}
+    api_key = os.getenv("GOOGLE_AI_STUDIO_API_KEY", "demo_api_key")
+    async with AsyncGoogleAIStudioClient(api_key, config=config, max_connections=8) as client:
+        session = await client.start_calibration_session(os.getenv("OPVS_CREATOR", "rmm@opvs.example"))
+        started = time.perf_counter()
+        results = await client.generate_content_many(
+            "gemini-pro", [f"Write about authentic creation, take {i}" for i in range(32)])
+        await client.track_resonance_many(
+            [{"bean_id": "bean_demo", "event_type": "content_generation"}] * len(results))
+        elapsed = time.perf_counter() - started
+    print(f"Session {session['session_id']}: {len(results)} generations + "
+          f"{len(results)} resonance events in {elapsed:.2f}s "
+          f"({'HTTP/2' if HTTP2_AVAILABLE else 'HTTP/1.1 keep-alive'})")
+
+
+if __name__ == "__main__":
+    asyncio.run(example_usage())
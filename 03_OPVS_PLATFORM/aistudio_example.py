@@ -7,9 +7,28 @@ Google AI Studio: https://aistudio.google.com/
 Documentation: https://ai.google.dev/
 """
 
+import logging
 import os
+import sys
+import uuid
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Iterable, Optional, List, Union
+
+import minting
+import oplog
+from generation_cache import SingleFlight, request_key
+import training_data
+from ids import new_id
+
+log = logging.getLogger("opvs.aistudio")
+
+
+def _soul_signature(soul_sig) -> str:
+    if not isinstance(soul_sig, dict):
+        return ""
+    return "".join(f"\n     - {key}: {value}" for key, value in soul_sig.items())
+
 
 class GoogleAIStudioClient:
     """
@@ -17,7 +36,15 @@ class GoogleAIStudioClient:
     Enables Gemini model calibration tracking and RISS (Resonance & Integrity Scoring).
     """
     
-    def __init__(self, api_key: str, project_id: Optional[str] = None, config: Optional[Dict] = None):
+    def __init__(self,
+                 api_key: str,
+                 project_id: Optional[str] = None,
+                 config: Optional[Dict] = None,
+                 tracer=None,
+                 resilience=None,
+                 resonance_buffer=None,
+                 riss=None,
+                 generation_cache=None):
         """
         Initialize Google AI Studio client.
         
@@ -25,12 +52,42 @@ class GoogleAIStudioClient:
             api_key: Google AI Studio API key (get from https://aistudio.google.com/app/apikey)
             project_id: Optional Google Cloud project ID (e.g., "fluted-haven-463800-p9")
             config: Optional configuration dictionary
+            tracer: Optional span tracer (e.g. playground/tracing.py Tracer);
+                every client method emits one span to it
+            resilience: Optional retry/hedge/circuit-breaker policy
+                (e.g. playground/resilience.py Resilience) for model calls;
+                an open circuit falls back to config["fallback_model"]
+            resonance_buffer: Optional ResonanceBuffer (resonance_buffer.py);
+                tracked events are written behind to the database in batches
+            riss: Optional RissEngine (riss.py); minted beans and resonance
+                events update its scores incrementally
+            generation_cache: Optional GenerationCache (generation_cache.py);
+                generate_content() serves repeated requests from it
         """
         self.api_key = api_key
         self.project_id = project_id
         self.base_url = "https://generativelanguage.googleapis.com"
         self.config = config or {}
         self.default_model = self.config.get("default_model", "gemini-pro")
+        self.tracer = tracer
+        self.resilience = resilience
+        self.resonance_buffer = resonance_buffer
+        self.riss = riss
+        self.generation_cache = generation_cache
+        self._inflight = SingleFlight()
+        self.fallback_model = self.config.get("fallback_model", self.default_model)
+        
+    def _span(self, stage: str, **attrs):
+        """Open a tracing span for one client operation (a no-op without a tracer)."""
+        if self.tracer is None:
+            return nullcontext({})
+        return self.tracer.span(f"aistudio.{stage}", platform="google_ai_studio", **attrs)
+        
+    def _guarded(self, model_id: str, request, span=None):
+        """Run `request(model_id)` under the resilience policy, if one is configured."""
+        if self.resilience is None:
+            return request(model_id)
+        return self.resilience.call(model_id, request, span, fallback=self.fallback_model)
         
     def authenticate(self) -> bool:
         """
@@ -39,13 +96,13 @@ class GoogleAIStudioClient:
         Returns:
             True if authentication successful
         """
-        # In a real implementation, this would verify the API key
-        print(f"🔐 Authenticating with Google AI Studio")
-        print(f"   API Endpoint: {self.base_url}")
-        if self.project_id:
-            print(f"   Project ID: {self.project_id}")
-        print(f"✅ Authentication verified")
-        return True
+        with self._span("authenticate"):
+            # In a real implementation, this would verify the API key
+            if log.isEnabledFor(logging.INFO):
+                log.info("🔐 Authenticating with Google AI Studio\n   API Endpoint: %s%s\n✅ Authentication verified",
+                         self.base_url, f"\n   Project ID: {self.project_id}" if self.project_id else "",
+                         extra=oplog.extra("authenticate", endpoint=self.base_url, project_id=self.project_id))
+            return True
         
     def start_calibration_session(self, 
                                    creator_id: str, 
@@ -62,30 +119,32 @@ class GoogleAIStudioClient:
         Returns:
             Session information dictionary
         """
-        if not self.authenticate():
-            raise Exception("Authentication failed")
+        with self._span("start_calibration_session", model=base_model):
+            if not self.authenticate():
+                raise Exception("Authentication failed")
             
-        session = {
-            "session_id": f"gai_session_{datetime.now().timestamp()}",
-            "creator_id": creator_id,
-            "base_model": base_model,
-            "mode": mode,
-            "started_at": datetime.now().isoformat(),
-            "status": "active",
-            "platform": "google_ai_studio"
-        }
+            session = {
+                "session_id": new_id("gai_session"),
+                "creator_id": creator_id,
+                "base_model": base_model,
+                "mode": mode,
+                "started_at": datetime.now().isoformat(),
+                "status": "active",
+                "platform": "google_ai_studio"
+            }
         
-        print(f"\n🎨 Starting Gemini calibration session")
-        print(f"   Mode: {mode.upper()}")
-        print(f"   Creator: {creator_id}")
-        print(f"   Base Model: {base_model}")
-        print(f"   Session ID: {session['session_id']}")
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n🎨 Starting Gemini calibration session\n   Mode: %s\n   Creator: %s\n"
+                         "   Base Model: %s\n   Session ID: %s",
+                         mode.upper(), creator_id, base_model, session["session_id"],
+                         extra=oplog.extra("calibration_session", session_id=session["session_id"],
+                                           creator_id=creator_id, base_model=base_model, mode=mode))
         
-        return session
+            return session
         
     def calibrate(self, 
                   session_id: str,
-                  training_examples: List[Dict],
+                  training_examples: Union[Iterable[Dict], str],
                   metadata: Optional[Dict] = None) -> Dict:
         """
         Perform calibration (model tuning) with creator's unique input.
@@ -95,81 +154,156 @@ class GoogleAIStudioClient:
         
         Args:
             session_id: Active session ID
-            training_examples: List of training examples (input/output pairs)
+            training_examples: Training examples (input/output pairs), as
+                any iterable or a JSONL file path; validated as a stream
+                (training_data.py), never loaded whole
             metadata: Optional metadata including soul_signature
             
         Returns:
             Calibration result dictionary with tuned model ID
         """
-        result = {
-            "calibration_id": f"gai_cal_{datetime.now().timestamp()}",
-            "session_id": session_id,
-            "tuned_model_id": f"tunedModels/creator-calibration-{datetime.now().timestamp()}",
-            "training_examples": len(training_examples),
-            "soul_signature": metadata.get("soul_signature") if metadata else None,
-            "timestamp": datetime.now().isoformat(),
-            "status": "completed",
-            "platform": "google_ai_studio"
-        }
+        with self._span("calibrate", session_id=session_id) as span:
+            report = training_data.TrainingReport()
+            for _ in training_data.validate(training_examples, report):
+                pass
+            if not report.valid:
+                raise training_data.TrainingDataError(report)
+            span["examples"] = report.valid
+            result = {
+                "calibration_id": new_id("gai_cal"),
+                "session_id": session_id,
+                "tuned_model_id": f"tunedModels/calibration-{new_id().lower()}",  # tuned model IDs: lowercase, <= 40 chars
+                "training_examples": report.valid,
+                "training_report": report.as_dict(),
+                "soul_signature": metadata.get("soul_signature") if metadata else None,
+                "timestamp": datetime.now().isoformat(),
+                "status": "completed",
+                "platform": "google_ai_studio"
+            }
         
-        print(f"\n🔮 Gemini model calibration in progress...")
-        print(f"   Training examples: {len(training_examples)}")
-        if metadata and metadata.get("soul_signature"):
-            print(f"   Soul signature captured: ✓")
-            soul_sig = metadata["soul_signature"]
-            if isinstance(soul_sig, dict):
-                for key, value in soul_sig.items():
-                    print(f"     - {key}: {value}")
-        print(f"   Calibration ID: {result['calibration_id']}")
-        print(f"   Tuned Model ID: {result['tuned_model_id']}")
-        print(f"   Status: {result['status'].upper()}")
+            if log.isEnabledFor(logging.INFO):
+                soul_sig = result["soul_signature"]
+                log.info("\n🔮 Gemini model calibration in progress...\n"
+                         "   Training examples: %d valid of %d (%d duplicates, %d invalid)%s\n"
+                         "   Calibration ID: %s\n   Tuned Model ID: %s\n   Status: %s",
+                         report.valid, report.read, report.duplicates,
+                         report.read - report.valid - report.duplicates,
+                         oplog.Lazy(lambda: f"\n   Soul signature captured: ✓{_soul_signature(soul_sig)}" if soul_sig else ""),
+                         result["calibration_id"], result["tuned_model_id"], result["status"].upper(),
+                         extra=oplog.extra("calibrate", calibration_id=result["calibration_id"],
+                                           tuned_model_id=result["tuned_model_id"], status=result["status"],
+                                           examples=report.valid, read=report.read,
+                                           duplicates=report.duplicates, soul_signature=soul_sig))
         
-        return result
+            return result
         
     def mint_bean(self,
                   user_id: str,
                   calibration_id: str,
                   tuned_model_id: str,
-                  content_type: str = "gemini_calibration") -> Dict:
+                  content_type: str = "gemini_calibration",
+                  conn=None,
+                  paramstyle: str = "format") -> Dict:
         """
         Mint a bean for the Gemini calibration.
         
         Beans are atomic units with provenance and history.
         
         Args:
-            user_id: Creator user ID
+            user_id: Creator's users.id (UUID), or their email when `conn` is given
             calibration_id: Calibration to mint bean for
             tuned_model_id: Google AI Studio tuned model ID
             content_type: Type of content
+            conn: Optional DB-API connection; user_id is resolved to users.id
+                through it, as mint_beans() does
+            paramstyle: "format" (psycopg) or "qmark" (sqlite3)
             
         Returns:
             Bean information dictionary
         """
-        bean = {
-            "bean_id": f"bean_{datetime.now().timestamp()}",
-            "user_id": user_id,
-            "calibration_id": calibration_id,
-            "tuned_model_id": tuned_model_id,
-            "content_type": content_type,
-            "provenance": {
-                "source": "google_ai_studio",
-                "platform": "google_ai_studio",
+        with self._span("mint_bean", model=tuned_model_id):
+            if conn is not None:
+                mark = "%s" if paramstyle == "format" else "?"
+                user_id = minting.resolve_users(conn.cursor(), [user_id], mark)[user_id]
+            elif self.riss is not None:
+                try:
+                    user_id = str(uuid.UUID(user_id))  # the form users.id is credited under
+                except ValueError:
+                    raise ValueError(f"cannot credit {user_id!r} in RISS: pass conn to resolve it "
+                                     "to a users.id") from None
+            bean = {
+                "bean_id": new_id("bean"),
+                "user_id": user_id,
                 "calibration_id": calibration_id,
                 "tuned_model_id": tuned_model_id,
-                "minted_at": datetime.now().isoformat()
-            },
-            "resonance_score": 0,
-            "integrity_score": 100  # Starting integrity score
-        }
+                "content_type": content_type,
+                "provenance": {
+                    "source": "google_ai_studio",
+                    "platform": "google_ai_studio",
+                    "calibration_id": calibration_id,
+                    "tuned_model_id": tuned_model_id,
+                    "minted_at": datetime.now().isoformat()
+                },
+                "resonance_score": 0,
+                "integrity_score": 100  # Starting integrity score
+            }
+            if self.riss is not None:
+                scores = self.riss.register_bean(bean["bean_id"], user_id, bean["integrity_score"])
+                bean["resonance_score"] = scores["rolled_resonance"]
+                bean["integrity_score"] = scores["integrity"]
         
-        print(f"\n🌱 Bean minted successfully")
-        print(f"   Bean ID: {bean['bean_id']}")
-        print(f"   Tuned Model: {tuned_model_id}")
-        print(f"   Content Type: {content_type}")
-        print(f"   Initial Scores - Resonance: {bean['resonance_score']}, Integrity: {bean['integrity_score']}")
-        
-        return bean
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n🌱 Bean minted successfully\n   Bean ID: %s\n   Tuned Model: %s\n"
+                         "   Content Type: %s\n   Initial Scores - Resonance: %s, Integrity: %s",
+                         bean["bean_id"], tuned_model_id, content_type,
+                         bean["resonance_score"], bean["integrity_score"],
+                         extra=oplog.extra("mint_bean", bean_id=bean["bean_id"], tuned_model_id=tuned_model_id,
+                                           content_type=content_type, resonance=bean["resonance_score"],
+                                           integrity=bean["integrity_score"]))
         
+            return bean
+
+    def mint_beans(self,
+                   calibrations: List[Dict],
+                   conn,
+                   paramstyle: str = "format",
+                   commit_sha: Optional[str] = None,
+                   branch: Optional[str] = None,
+                   git_url: Optional[str] = None) -> List[Dict]:
+        """
+        Mint and persist beans for many calibrations in one transaction.
+
+        Retrying a batch returns the beans already minted instead of
+        minting them twice (see minting.py).
+
+        Args:
+            calibrations: calibrate() results, each with "user_id" added
+                (a users.id or the user's email)
+            conn: DB-API connection to the platform database
+            paramstyle: "format" (psycopg) or "qmark" (sqlite3)
+            commit_sha, branch, git_url: Optional provenance commit
+
+        Returns:
+            One bean dictionary per distinct calibration
+        """
+        with self._span("mint_beans", calibrations=len(calibrations)) as span:
+            beans = minting.mint_beans(conn, calibrations, paramstyle=paramstyle,
+                                       commit_sha=commit_sha, branch=branch, git_url=git_url)
+            span["minted"] = sum(b["minted"] for b in beans)
+            for bean in beans:
+                bean["resonance_score"], bean["integrity_score"] = 0, 100
+                if self.riss is not None:
+                    scores = self.riss.register_bean(bean["bean_id"], bean["user_id"])
+                    bean["resonance_score"] = scores["rolled_resonance"]
+                    bean["integrity_score"] = scores["integrity"]
+
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n🌱 %d of %d beans minted (%d already existed)",
+                         span["minted"], len(beans), len(beans) - span["minted"],
+                         extra=oplog.extra("mint_beans", minted=span["minted"], beans=len(beans)))
+
+            return beans
+
     def track_resonance(self,
                         bean_id: str,
                         event_type: str,
@@ -187,52 +321,90 @@ class GoogleAIStudioClient:
         Returns:
             Updated resonance information
         """
-        event = {
-            "event_id": f"event_{datetime.now().timestamp()}",
-            "bean_id": bean_id,
-            "event_type": event_type,
-            "timestamp": datetime.now().isoformat(),
-            "resonance_delta": 1,
-            "platform": "google_ai_studio"
-        }
+        with self._span("track_resonance", bean_id=bean_id, event_type=event_type):
+            event = {
+                "event_id": new_id("event"),
+                "bean_id": bean_id,
+                "event_type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "resonance_delta": 1,
+                "platform": "google_ai_studio"
+            }
+            if self.resonance_buffer is not None:
+                self.resonance_buffer.add(event)
+            if self.riss is not None:
+                self.riss.record_resonance(bean_id, event["resonance_delta"])
         
-        print(f"\n📈 Resonance event tracked")
-        print(f"   Bean ID: {bean_id}")
-        print(f"   Event: {event_type}")
-        print(f"   Resonance +{event['resonance_delta']}")
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n📈 Resonance event tracked\n   Bean ID: %s\n   Event: %s\n   Resonance +%s",
+                         bean_id, event_type, event["resonance_delta"],
+                         extra=oplog.extra("track_resonance", event_id=event["event_id"], bean_id=bean_id,
+                                           event_type=event_type, resonance_delta=event["resonance_delta"]))
         
-        return event
+            return event
     
-    def generate_content(self, model_id: str, prompt: str) -> Dict:
+    def generate_content(self,
+                         model_id: str,
+                         prompt: str,
+                         params: Optional[Dict] = None,
+                         bean_id: Optional[str] = None) -> Dict:
         """
         Generate content using a calibrated Gemini model.
+
+        Concurrent identical requests share one upstream call, and with a
+        generation_cache a repeated request is served from it
+        (generation_cache.py).
         
         Args:
             model_id: Tuned model ID from calibration
             prompt: Prompt for generation
+            params: Optional generation config (temperature, max output tokens, ...)
+            bean_id: Bean behind the model; every served result, cached or
+                not, tracks one "generation" resonance event for it
             
         Returns:
-            Generated content result
+            Generated content result, with "cache" set to "miss",
+            "coalesced" or "hit"
         """
-        result = {
-            "model_id": model_id,
-            "prompt": prompt,
-            "generated_text": f"[Generated content from {model_id} with creator's unique style]",
-            "timestamp": datetime.now().isoformat()
-        }
+        key = request_key(model_id, prompt, params)
+        with self._span("generate_content", model=model_id, prompt_chars=len(prompt)) as span:
+            def request(model: str) -> Dict:
+                # In a real implementation, this would POST models/{model}:generateContent
+                return {
+                    "model_id": model,
+                    "prompt": prompt,
+                    "generated_text": f"[Generated content from {model} with creator's unique style]",
+                    "timestamp": datetime.now().isoformat()
+                }
+
+            cache = self.generation_cache
+            result = cache.get(key) if cache is not None else None
+            if result is not None:
+                source = "hit"
+            else:
+                result, shared = self._inflight.do(key, lambda: self._guarded(model_id, request, span))
+                source = "coalesced" if shared else "miss"
+                # A fallback model's answer is not cached under the requested model.
+                if cache is not None and not shared and result["model_id"] == model_id:
+                    cache.put(key, result)
+            span["cache"] = source
         
-        print(f"\n✨ Content generated")
-        print(f"   Model: {model_id}")
-        print(f"   Prompt length: {len(prompt)} chars")
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n✨ Content generated\n   Model: %s\n   Prompt length: %d chars",
+                         result["model_id"], len(prompt),
+                         extra=oplog.extra("generate_content", model=result["model_id"], prompt_chars=len(prompt),
+                                           cache=source))
+        if bean_id is not None:
+            self.track_resonance(bean_id, "generation", {"model_id": model_id, "cache": source})
         
-        return result
-
+        return {**result, "cache": source}
 
 def example_usage():
     """
     Example usage of the Google AI Studio integration.
     Demonstrates the full workflow from authentication to bean minting.
     """
+    oplog.configure("INFO", "human", stream=sys.stdout)  # the client is quiet unless a renderer is attached
     print("=" * 70)
     print("OPVS AI Spirit Marketplace - Google AI Studio Integration Example")
     print("=" * 70)
@@ -240,6 +412,8 @@ def example_usage():
     # Configuration
     api_key = os.getenv("GOOGLE_AI_STUDIO_API_KEY", "demo_api_key")
     project_id = os.getenv("GOOGLE_AI_STUDIO_PROJECT_ID", "fluted-haven-463800-p9")
+    # A users.email or users.id (db/schema.sql); mint_beans() resolves either to users.id.
+    creator = os.getenv("OPVS_CREATOR", "rmm@opvs.example")
     
     if api_key == "demo_api_key":
         print("\n⚠️  Using demo API key. Set GOOGLE_AI_STUDIO_API_KEY for real usage.")
@@ -254,7 +428,7 @@ def example_usage():
     
     # Start calibration session
     session = client.start_calibration_session(
-        creator_id="creator_rmm",
+        creator_id=creator,
         base_model="gemini-pro",
         mode="transformation"  # Calibration, not fine-tuning
     )
@@ -298,7 +472,7 @@ def example_usage():
     
     # Mint bean for this calibration
     bean = client.mint_bean(
-        user_id="creator_rmm",
+        user_id=creator,
         calibration_id=calibration["calibration_id"],
         tuned_model_id=calibration["tuned_model_id"]
     )
@@ -326,6 +500,7 @@ def example_usage():
         metadata={"usage": "another_creator_calibrated_from_this"}
     )
     
+    oplog.shutdown()  # drain the queued client output before the summary
     print("\n" + "=" * 70)
     print("✨ Example completed successfully!")
     print("=" * 70)
@@ -0,0 +1,409 @@
+"""
+Calibration job queue for the OPVS Platform.
+
+Tuning a Gemini model takes minutes to hours. CalibrationQueue lets one
+process drive hundreds of tuning jobs at once on a small, fixed pool of
+asyncio workers. No job holds a thread or a worker while it waits.
+
+Each job moves through these states:
+
+    queued ──▶ submitting ──▶ running ──▶ completed
+                                 └──────▶ failed
+
+A worker takes a job only to do its next step:
+
+- queued: start a calibration session;
+- submitting: submit the tuning job (POST /tunedModels);
+- running: poll the tuning operation once.
+
+Between polls the job sits on an event-loop timer. The poll interval
+adapts to the job:
+
+- while the step count advances, the next poll is due at about half the
+  estimated time remaining, so polls thin out early and cluster near the
+  end;
+- while it stalls, the interval doubles.
+
+Intervals are jittered and kept within poll_min..poll_max.
+
+Every state or progress change is one event dict. Each event is:
+
+- appended to the JobStore log, so a restarted queue resumes unfinished
+  jobs (running jobs resume polling and do not resubmit);
+- delivered to on_event and to every `async for event in queue.events()`
+  consumer.
+
+Try it offline against the playground stub:
+    python playground/stub_server.py --port 8765 --tuning-time 5
+    GOOGLE_AI_STUDIO_BASE_URL=http://127.0.0.1:8765 python 03_OPVS_PLATFORM/calibration_jobs.py
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
+
+from ids import new_id
+from training_data import TrainingDataError
+
+TERMINAL_STATES = ("completed", "failed")
+
+
+class JobStore:
+    """
+    Append-only JSONL log of job events, folded into the latest state per job.
+
+    The first event of a job ("queued") carries its full spec; later events
+    carry only what changed. As in playground/checkpoint.py, each event is
+    one O_APPEND write (fsynced unless fsync=False). A line torn by a crash
+    is skipped on load. compact() rewrites the log without finished jobs.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.jobs: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            self._load()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._seal()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash
+                self.jobs.setdefault(event["job_id"], {}).update(event)
+
+    def _seal(self):
+        """Terminate a torn last line so the next event starts cleanly."""
+        size = os.fstat(self._fd).st_size
+        if size:
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    os.write(self._fd, b"\n")
+
+    def append(self, event: Dict) -> None:
+        self.jobs.setdefault(event["job_id"], {}).update(event)
+        line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        os.write(self._fd, line)
+        if self.fsync:
+            os.fsync(self._fd)
+
+    def unfinished(self) -> List[Dict]:
+        return [job for job in self.jobs.values() if job.get("state") not in TERMINAL_STATES]
+
+    def compact(self) -> None:
+        """Rewrite the log with one record per unfinished job (atomic replace)."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in self.unfinished():
+                f.write(json.dumps(job, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.jobs = {job["job_id"]: job for job in self.unfinished()}
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CalibrationQueue:
+    """
+    Bounded async worker pool for tuning jobs on an AsyncGoogleAIStudioClient
+    (aistudio_async.py). Use as `async with CalibrationQueue(client) as queue:`,
+    or call start() and close(). close() leaves unfinished jobs in the store
+    for the next start().
+    """
+
+    def __init__(self,
+                 client,
+                 store: Optional[JobStore] = None,
+                 workers: int = 8,
+                 poll_min: float = 2.0,
+                 poll_max: float = 300.0,
+                 max_attempts: int = 5,
+                 on_event: Optional[Callable[[Dict], None]] = None,
+                 seed: Optional[int] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            client: AsyncGoogleAIStudioClient to run sessions, submissions and polls on
+            store: Optional JobStore; without one, job state lives only in memory
+            workers: Steps (requests) in flight at once, across all jobs
+            poll_min: Shortest seconds between polls of one job
+            poll_max: Longest seconds between polls of one job
+            max_attempts: Consecutive failed steps before a job is marked failed
+            on_event: Optional callback for every progress event
+            seed: Optional seed for the poll jitter
+        """
+        self.client = client
+        self.store = store
+        self.workers = workers
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.max_attempts = max_attempts
+        self.on_event = on_event
+        self.stats = {"submitted": 0, "polls": 0, "completed": 0, "failed": 0, "errors": 0}
+        self._random = random.Random(seed)
+        self._jobs: Dict[str, Dict] = {}
+        self._done: Dict[str, asyncio.Future] = {}
+        self._polls: Dict[str, tuple] = {}  # job_id -> (monotonic at last progress, steps then, delay)
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._ready: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ── lifecycle ──
+
+    async def start(self) -> "CalibrationQueue":
+        """Start the workers and resume any unfinished jobs from the store."""
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"calibration-worker-{i}")
+                       for i in range(self.workers)]
+        if self.store is not None:
+            for job in self.store.unfinished():
+                self._track(dict(job))
+                self._ready.put_nowait(job["job_id"])
+        return self
+
+    async def close(self) -> None:
+        """Stop the workers and end every events() stream. Unfinished jobs stay resumable."""
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ── jobs ──
+
+    def submit(self,
+               creator_id: str,
+               training_examples: Union[List[Dict], str],
+               metadata: Optional[Dict] = None,
+               base_model: Optional[str] = None,
+               mode: str = "transformation") -> str:
+        """
+        Enqueue one calibration job and return its job ID at once.
+
+        Args:
+            creator_id: Unique identifier for the creator
+            training_examples: List of {"text_input", "output"} pairs, or a
+                JSONL file path (keeps a large dataset out of the job log)
+            metadata: Optional metadata including soul_signature
+            base_model: Model to tune (defaults to the client's default_model)
+            mode: "transformation" (calibration) or "reproduction" (fine-tuning)
+        """
+        if self._ready is None:
+            raise RuntimeError("CalibrationQueue is not started")
+        job = {
+            "job_id": new_id("gai_job"),
+            "creator_id": creator_id,
+            "base_model": base_model or self.client.default_model,
+            "mode": mode,
+            "training_examples": os.fspath(training_examples)
+            if isinstance(training_examples, os.PathLike) else training_examples,
+            "metadata": metadata,
+            "attempts": 0,
+            "created_at": datetime.now().isoformat(),
+        }
+        self._track(job)
+        self._emit(job, "queued", **{k: v for k, v in job.items() if k != "job_id"})
+        self._ready.put_nowait(job["job_id"])
+        return job["job_id"]
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        """Latest state of one job (a copy)."""
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def jobs(self, state: Optional[str] = None) -> List[Dict]:
+        return [dict(job) for job in self._jobs.values() if state is None or job["state"] == state]
+
+    async def wait(self, job_id: str) -> Dict:
+        """Wait for a job to finish; returns its final state."""
+        return await asyncio.shield(self._done[job_id])
+
+    async def join(self) -> List[Dict]:
+        """Wait until every job known so far has finished."""
+        return list(await asyncio.gather(*(asyncio.shield(f) for f in self._done.values())))
+
+    async def events(self) -> AsyncIterator[Dict]:
+        """Stream progress events from now until close()."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.remove(queue)
+
+    # ── workers ──
+
+    def _track(self, job: Dict) -> None:
+        self._jobs[job["job_id"]] = job
+        self._done[job["job_id"]] = asyncio.get_running_loop().create_future()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._ready.get()
+            self._timers.pop(job_id, None)
+            job = self._jobs[job_id]
+            try:
+                await self._step(job)
+            except asyncio.CancelledError:
+                raise
+            except TrainingDataError as err:  # retrying cannot help
+                self._finish(job, "failed", error=str(err))
+            except Exception as err:
+                self._failed_step(job, err)
+
+    async def _step(self, job: Dict) -> None:
+        state = job.get("state", "queued")
+        if state == "queued":
+            session = await self.client.start_calibration_session(
+                job["creator_id"], job["base_model"], job["mode"])
+            self._emit(job, "submitting", session_id=session["session_id"], attempts=0)
+            self._ready.put_nowait(job["job_id"])
+        elif state == "submitting":
+            result = await self.client.calibrate(job["session_id"], job["training_examples"],
+                                                 job["metadata"], job["base_model"])
+            self.stats["submitted"] += 1
+            self._emit(job, "running", calibration_id=result["calibration_id"],
+                       tuned_model_id=result["tuned_model_id"], operation=result["operation"],
+                       attempts=0)
+            self._schedule(job["job_id"], self.poll_min)
+        elif state == "running":
+            op = await self.client.tuning_operation(job["operation"])
+            self.stats["polls"] += 1
+            self._progress(job, op)
+
+    def _progress(self, job: Dict, op: Dict) -> None:
+        meta = op.get("metadata", {})
+        steps, total = meta.get("completedSteps", 0), meta.get("totalSteps")
+        if op.get("done"):
+            if "error" in op:
+                self._finish(job, "failed", error=op["error"].get("message", str(op["error"])))
+            else:
+                tuned = op.get("response", {}).get("name") or job.get("tuned_model_id")
+                self._finish(job, "completed", tuned_model_id=tuned, completed_steps=total or steps,
+                             total_steps=total, progress=1.0)
+            return
+        if steps != job.get("completed_steps") or job.get("attempts"):
+            self._emit(job, "running", completed_steps=steps, total_steps=total,
+                       progress=round(steps / total, 4) if total else None, attempts=0)
+        self._schedule(job["job_id"], self._next_poll(job["job_id"], steps, total))
+
+    def _next_poll(self, job_id: str, steps: int, total: Optional[int]) -> float:
+        """Adaptive poll interval: half the estimated time remaining, or double while stalled."""
+        now = time.monotonic()
+        last = self._polls.get(job_id)
+        if last is None:
+            delay = self.poll_min
+            self._polls[job_id] = (now, steps, delay)
+        elif steps > last[1]:
+            rate = (steps - last[1]) / max(now - last[0], 1e-6)
+            delay = (total - steps) / rate / 2 if total else last[2]
+            self._polls[job_id] = (now, steps, delay)
+        else:
+            delay = last[2] * 2
+            self._polls[job_id] = (last[0], last[1], delay)
+        delay = min(self.poll_max, max(self.poll_min, delay))
+        return self._random.uniform(delay / 2, delay) if delay > self.poll_min else delay
+
+    def _failed_step(self, job: Dict, err: Exception) -> None:
+        """Retry a failed step with exponential backoff, up to max_attempts in a row."""
+        self.stats["errors"] += 1
+        attempts = job.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            self._finish(job, "failed", attempts=attempts, error=f"{type(err).__name__}: {err}")
+            return
+        self._emit(job, job.get("state", "queued"), attempts=attempts, error=f"{type(err).__name__}: {err}")
+        delay = min(self.poll_max, self.poll_min * 2 ** attempts)
+        self._schedule(job["job_id"], self._random.uniform(delay / 2, delay))
+
+    def _schedule(self, job_id: str, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        self._timers[job_id] = loop.call_later(delay, self._ready.put_nowait, job_id)
+
+    def _finish(self, job: Dict, state: str, **changes) -> None:
+        self._polls.pop(job["job_id"], None)
+        self.stats[state] += 1
+        self._emit(job, state, **changes)
+        done = self._done[job["job_id"]]
+        if not done.done():
+            done.set_result(dict(job))
+
+    def _emit(self, job: Dict, state: str, **changes) -> None:
+        """Apply a change to a job, persist it, and publish it as an event."""
+        event = {"job_id": job["job_id"], "state": state, **changes,
+                 "updated_at": datetime.now().isoformat()}
+        job.update(event)
+        if self.store is not None:
+            self.store.append(event)
+        public = {k: v for k, v in event.items() if k != "training_examples"}
+        if self.on_event is not None:
+            self.on_event(public)
+        for queue in self._subscribers:
+            queue.put_nowait(public)
+
+
+async def example_usage():
+    """Drive a batch of tuning jobs through one queue and print their progress."""
+    from aistudio_async import AsyncGoogleAIStudioClient
+
+    base_url = os.getenv("GOOGLE_AI_STUDIO_BASE_URL", "https://generativelanguage.googleapis.com")
+    api_key = os.getenv("GOOGLE_AI_STUDIO_API_KEY", "demo_api_key")
+    examples = [{"text_input": "How do you approach creative work?",
+                 "output": "Project Fun Execution - when intrinsic motivation meets bizarre logic."}]
+    started = time.perf_counter()
+    async with AsyncGoogleAIStudioClient(api_key, config={"base_url": base_url}, max_connections=8) as client:
+        with JobStore("calibration_jobs.jsonl") as store:
+            async with CalibrationQueue(client, store, workers=8, poll_min=0.5) as queue:
+                for i in range(200):
+                    queue.submit(f"creator_{i}", examples)
+
+                async def report():
+                    async for event in queue.events():
+                        if event["state"] in TERMINAL_STATES:
+                            print(f"{event['job_id']} {event['state']} {event.get('tuned_model_id') or event.get('error')}")
+
+                reporter = asyncio.create_task(report())
+                results = await queue.join()
+            await reporter
+            store.compact()
+    completed = sum(r["state"] == "completed" for r in results)
+    print(f"{completed}/{len(results)} calibrations completed in {time.perf_counter() - started:.1f}s "
+          f"({queue.stats['polls']} polls, {queue.stats['errors']} errors)")
+
+
+if __name__ == "__main__":
+    asyncio.run(example_usage())
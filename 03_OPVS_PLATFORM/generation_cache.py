@@ -0,0 +1,197 @@
+"""
+Result cache and request coalescing for generate_content().
+
+Hot calibrated models get the same prompt from many community members at
+once. Two layers keep those requests from each costing an upstream call:
+
+- Single-flight: concurrent identical (model_id, prompt, params) requests
+  share one in-flight call. The first caller makes it. The others wait
+  for its result, or its exception, which is never cached.
+- GenerationCache: finished results are kept for `ttl` seconds in an LRU
+  bounded by both entry count and bytes. Each entry is charged the size
+  of its JSON encoding, and least recently used entries are evicted until
+  the cache fits both bounds. Expired entries are dropped on access.
+
+Each caller receives its own copy of the result, with "cache" set to
+"miss", "coalesced" or "hit". The clients track a resonance event per
+served request, not per upstream call, so counts are unchanged by
+caching.
+
+Usage:
+    cache = GenerationCache(ttl=300, max_entries=10_000, max_bytes=64 << 20)
+    client = AsyncGoogleAIStudioClient(api_key, generation_cache=cache)
+    await client.generate_content("tunedModels/x", prompt, bean_id="bean_...")
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+def request_key(model_id: str, prompt: str, params: Optional[Dict] = None) -> str:
+    """Stable key for one generation request."""
+    canonical = json.dumps([model_id, prompt, params or {}], sort_keys=True, ensure_ascii=False,
+                           separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _size(result: Dict) -> int:
+    return len(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class GenerationCache:
+    """Thread-safe TTL + LRU store of generate_content() results, bounded in entries and bytes."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10_000, max_bytes: int = 64 << 20,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a result stays servable
+            max_entries: Most results kept
+            max_bytes: Most bytes kept (JSON size of the results)
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0,
+                      "oversize": 0}
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()  # key -> (expires, size, result)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires, size, result = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                self.bytes -= size
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+    def put(self, key: str, result: Dict) -> bool:
+        """Store `result`; False if it alone exceeds max_bytes."""
+        size = _size(result)
+        with self._lock:
+            if size > self.max_bytes:
+                self.stats["oversize"] += 1
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (self.clock() + self.ttl, size, result)
+            self.bytes += size
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.stats["evictions"] += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def as_dict(self) -> Dict:
+        return {**self.stats, "entries": len(self._entries), "bytes": self.bytes}
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls across threads."""
+
+    def __init__(self):
+        self._calls: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """(result of fn, whether it was shared with an earlier caller's call)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"], True
+        try:
+            call["result"] = fn()
+            return call["result"], False
+        except BaseException as exc:
+            call["error"] = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent identical calls on one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, bool]:
+        """
+        (result of fn(), whether it was shared with an earlier caller's call).
+        If the caller leading a shared call is cancelled, a waiter takes over
+        and makes the call itself.
+        """
+        while (pending := self._calls.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this waiter was cancelled, not the leader
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved here, so an unshared failure is not reported twice
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+
+def from_env() -> Optional[GenerationCache]:
+    """
+    GenerationCache from OPVS_GENERATION_CACHE_TTL (seconds; unset or 0
+    disables caching), OPVS_GENERATION_CACHE_ENTRIES and
+    OPVS_GENERATION_CACHE_MAX_BYTES.
+    """
+    ttl = float(os.getenv("OPVS_GENERATION_CACHE_TTL", "0") or 0)
+    if ttl <= 0:
+        return None
+    return GenerationCache(ttl=ttl,
+                           max_entries=int(os.getenv("OPVS_GENERATION_CACHE_ENTRIES", 10_000)),
+                           max_bytes=int(os.getenv("OPVS_GENERATION_CACHE_MAX_BYTES", 64 << 20)))
@@ -0,0 +1,100 @@
+"""
+Compact, time-sortable IDs for sessions, calibrations, beans and events.
+
+Each ID is 128 bits, laid out like a ULID and encoded as 26 Crockford
+base32 characters:
+
+    48 bits  milliseconds since the Unix epoch
+    30 bits  node: random per process, re-drawn in forked children
+    50 bits  sequence: per-process counter, started at a random offset
+
+Uniqueness comes from (node, sequence) alone. itertools.count hands out
+each number exactly once without a Python-level lock, since next() runs
+atomically under the GIL, and that holds across threads and asyncio
+tasks. Two processes collide only if they draw the same 30-bit node and
+the same sequence number within the same millisecond.
+
+The sequence fills exactly the last 10 characters, so minting an ID
+encodes only those; the 16-character time+node head is re-encoded once
+per millisecond.
+
+IDs sort by creation time because the timestamp is the most significant
+part. Within a process, IDs minted in the same millisecond sort in the
+order they were minted. New rows therefore land at the right-hand edge
+of a B-tree index instead of at random pages. With a prefix such as
+"bean_" an ID is 31 characters, well inside VARCHAR(50).
+"""
+
+import itertools
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+ENCODED_LENGTH = 26
+_DECODE = {c: i for i, c in enumerate(ALPHABET)}
+_DECODE.update({c.lower(): i for c, i in list(_DECODE.items())})
+
+_PAIRS = [a + b for a in ALPHABET for b in ALPHABET]  # every 10-bit value as two characters
+
+_SEQUENCE_BITS = 50
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+_NODE_BITS = 30
+
+
+def _reseed():
+    global _node, _sequence, _head
+    _node = secrets.randbits(_NODE_BITS)
+    _sequence = itertools.count(secrets.randbits(_SEQUENCE_BITS - 1))
+    _head = (None, "")  # (millisecond, encoded time+node) of the last ID
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode(text: str) -> int:
+    value = 0
+    for char in text:
+        value = value * 32 + _DECODE[char]
+    return value
+
+
+def new_id(prefix: str = "") -> str:
+    """
+    Mint one ID, e.g. new_id("bean") -> "bean_01J9Z3K4QF7V8X2M5N6P7R8S9T".
+
+    Args:
+        prefix: Optional kind marker, joined with "_"
+
+    Returns:
+        The ID string (26 characters plus the prefix)
+    """
+    global _head
+    millis = time.time_ns() // 1_000_000
+    seq = next(_sequence) & _SEQUENCE_MASK
+    head_millis, head = _head
+    if head_millis != millis:
+        head = encode((millis << _NODE_BITS) | _node)[-16:]
+        _head = (millis, head)  # one tuple store, so threads never see a torn pair
+    p = _PAIRS
+    body = (head + p[seq >> 40] + p[seq >> 30 & 1023] + p[seq >> 20 & 1023]
+            + p[seq >> 10 & 1023] + p[seq & 1023])
+    return f"{prefix}_{body}" if prefix else body
+
+
+def id_time(id_: str) -> datetime:
+    """When an ID was minted (UTC, millisecond precision)."""
+    value = decode(id_.rsplit("_", 1)[-1])
+    millis = value >> (_NODE_BITS + _SEQUENCE_BITS)
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
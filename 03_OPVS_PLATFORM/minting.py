@@ -0,0 +1,209 @@
+"""
+Bulk bean minting for the OPVS Platform.
+
+mint_beans() turns a batch of calibration results into persisted beans
+in one transaction:
+
+1. validate every calibration up front, so a bad row fails the whole
+   batch before the database is touched;
+2. resolve each "user_id" to a users.id, accepting the UUID itself or
+   the user's email, so an unknown creator fails the batch by name
+   instead of on the foreign key;
+3. assign bean IDs (ids.py) and an idempotency key per calibration;
+4. build provenance (beans.provenance), including the sync_log commit
+   when one is given;
+5. bulk-load the rows into a temporary staging table, using COPY on
+   PostgreSQL (psycopg 3) and executemany elsewhere;
+6. copy the rows from staging into beans with one INSERT ... SELECT ...
+   ON CONFLICT DO NOTHING on the idempotency key.
+
+A retried batch, or one that overlaps an earlier one, returns the beans
+minted the first time instead of minting them again.
+
+PostgreSQL uses paramstyle "format". SQLite 3.24+ uses "qmark", as a
+local stand-in for tests.
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from ids import new_id
+
+REQUIRED_FIELDS = ("user_id", "calibration_id", "tuned_model_id")
+STAGING_COLUMNS = ("id", "user_id", "title", "provenance", "type", "bean_id",
+                   "git_hash", "git_url", "idempotency_key")
+
+
+def idempotency_key(calibration: Dict) -> str:
+    """The caller's key if given, else a hash of what makes a calibration's bean unique."""
+    if calibration.get("idempotency_key"):
+        return str(calibration["idempotency_key"])
+    raw = json.dumps([calibration["user_id"], calibration["calibration_id"],
+                      calibration["tuned_model_id"], calibration.get("content_type", "gemini_calibration")])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def validate(calibrations: List[Dict]) -> None:
+    """Raise ValueError naming every invalid calibration (by index)."""
+    problems = []
+    for i, cal in enumerate(calibrations):
+        missing = [f for f in REQUIRED_FIELDS if not cal.get(f)]
+        if missing:
+            problems.append(f"#{i}: missing {', '.join(missing)}")
+        elif cal.get("status", "completed") != "completed":
+            problems.append(f"#{i}: calibration {cal['calibration_id']} is {cal['status']}, not completed")
+    if problems:
+        raise ValueError("invalid calibrations: " + "; ".join(problems))
+
+
+def _canonical(ref: str) -> str:
+    """A UUID in the text form PostgreSQL prints it in; anything else unchanged."""
+    try:
+        return str(uuid.UUID(ref))
+    except ValueError:
+        return ref
+
+
+def resolve_users(cur, refs: Iterable[str], mark: str = "%s") -> Dict[str, str]:
+    """
+    Map each user reference (a users.id UUID or a users.email) to the
+    user's id. Raises ValueError naming the references that match no user.
+    """
+    refs = sorted(set(refs))
+    marks = ", ".join([mark] * len(refs))
+    cur.execute(f"SELECT CAST(id AS TEXT), email FROM users "
+                f"WHERE CAST(id AS TEXT) IN ({marks}) OR email IN ({marks})",
+                [_canonical(r) for r in refs] + refs)
+    ids = {}
+    for user_id, email in cur.fetchall():
+        ids[user_id] = ids[email] = user_id
+    unknown = [r for r in refs if _canonical(r) not in ids and r not in ids]
+    if unknown:
+        raise ValueError("unknown users: " + ", ".join(unknown))
+    return {r: ids.get(_canonical(r)) or ids[r] for r in refs}
+
+
+def _rows(calibrations, commit_sha, git_url):
+    """Stage rows, one per distinct idempotency key (first occurrence wins)."""
+    minted_at = datetime.now().isoformat()
+    rows, seen = [], set()
+    for cal in calibrations:
+        key = idempotency_key(cal)
+        if key in seen:
+            continue
+        seen.add(key)
+        provenance = {
+            "source": "google_ai_studio",
+            "platform": "google_ai_studio",
+            "calibration_id": cal["calibration_id"],
+            "tuned_model_id": cal["tuned_model_id"],
+            "minted_at": minted_at,
+        }
+        if commit_sha:
+            provenance["commit_sha"] = commit_sha
+        rows.append((
+            str(uuid.uuid4()),
+            cal["user_id"],
+            cal.get("title") or f"Calibration {cal['calibration_id']}",
+            json.dumps(provenance),
+            cal.get("content_type", "gemini_calibration"),
+            new_id("bean"),
+            commit_sha,
+            git_url,
+            key,
+        ))
+    return rows
+
+
+def _stage(cur, rows, postgres):
+    columns = ", ".join(STAGING_COLUMNS)
+    if postgres:
+        cur.execute("CREATE TEMP TABLE mint_staging (LIKE beans INCLUDING DEFAULTS) ON COMMIT DROP")
+    else:
+        cur.execute("DROP TABLE IF EXISTS temp.mint_staging")
+        cur.execute(f"CREATE TEMP TABLE mint_staging ({columns})")
+    if postgres and hasattr(cur, "copy"):
+        with cur.copy(f"COPY mint_staging ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+    else:
+        marks = ", ".join(["%s" if postgres else "?"] * len(STAGING_COLUMNS))
+        cur.executemany(f"INSERT INTO mint_staging ({columns}) VALUES ({marks})", rows)
+
+
+def mint_beans(conn,
+               calibrations: Iterable[Dict],
+               paramstyle: str = "format",
+               commit_sha: Optional[str] = None,
+               branch: Optional[str] = None,
+               git_url: Optional[str] = None) -> List[Dict]:
+    """
+    Mint one bean per completed calibration, all in one transaction.
+
+    Args:
+        conn: DB-API connection (psycopg for PostgreSQL, sqlite3 for tests)
+        calibrations: calibrate() results plus "user_id" (a users.id or
+            the user's email); optional "content_type", "title" and
+            "idempotency_key"
+        paramstyle: "format" (PostgreSQL) or "qmark" (SQLite)
+        commit_sha, branch: Repository commit the batch is provenance-linked
+            to; recorded once in sync_log and on every bean as git_hash
+        git_url: Optional URL of that commit
+
+    Returns:
+        One bean dict per distinct calibration, in input order, with
+        "user_id" resolved to users.id and "minted" False for beans that
+        already existed (a retry)
+    """
+    if paramstyle not in ("format", "qmark"):
+        raise ValueError("paramstyle must be 'format' or 'qmark'")
+    calibrations = list(calibrations)
+    validate(calibrations)
+    if not calibrations:
+        return []
+    postgres = paramstyle == "format"
+    mark = "%s" if postgres else "?"
+    columns = ", ".join(STAGING_COLUMNS)
+
+    cur = conn.cursor()
+    try:
+        # Keys are derived after resolution, so a retry by email matches one by id.
+        users = resolve_users(cur, (c["user_id"] for c in calibrations), mark)
+        rows = _rows([{**c, "user_id": users[c["user_id"]]} for c in calibrations], commit_sha, git_url)
+        if commit_sha:
+            cur.execute(f"INSERT INTO sync_log (id, commit_sha, branch) VALUES ({mark}, {mark}, {mark}) "
+                        "ON CONFLICT (commit_sha) DO NOTHING",
+                        (str(uuid.uuid4()), commit_sha, branch))
+        _stage(cur, rows, postgres)
+        # "WHERE true" keeps SQLite from reading ON CONFLICT as part of the SELECT.
+        cur.execute(
+            f"INSERT INTO beans ({columns}) SELECT {columns} FROM mint_staging WHERE true "
+            "ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING"
+        )
+        cur.execute("SELECT b.idempotency_key, b.bean_id FROM beans b "
+                    "JOIN mint_staging s ON s.idempotency_key = b.idempotency_key")
+        stored = dict(cur.fetchall())
+        if not postgres:
+            cur.execute("DROP TABLE temp.mint_staging")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    beans = []
+    for row in rows:
+        key, bean_id = row[8], stored[row[8]]
+        beans.append({
+            "bean_id": bean_id,
+            "user_id": row[1],
+            "title": row[2],
+            "content_type": row[4],
+            "provenance": json.loads(row[3]),
+            "git_hash": commit_sha,
+            "idempotency_key": key,
+            "minted": bean_id == row[5],
+        })
+    return beans
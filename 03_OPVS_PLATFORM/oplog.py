@@ -0,0 +1,160 @@
+"""
+Quiet, structured logging for the platform clients.
+
+The clients log to the "opvs" logger hierarchy with the standard logging
+module and stay silent until an application opts in. A disabled level
+costs one cached isEnabledFor() check per call site, and nothing is
+formatted. Messages use lazy %-style arguments, and each record carries
+an event name and a dict of fields for structured renderers.
+
+configure() attaches a queue handler. The calling thread only enqueues
+the record; formatting and the write to the stream happen on a
+QueueListener thread, so a slow terminal or pipe never blocks a client
+call. Records are handed over as they are (not pre-formatted, unlike the
+stock QueueHandler), so arguments must not be mutated after logging.
+With queued=False records are written inline instead, in order with
+anything else the caller writes to the same stream.
+
+Renderers:
+- "human": the original console output (emoji headings, indented details)
+- "json":  one JSON object per line: ts, level, logger, event, fields
+
+Usage:
+    import oplog
+    oplog.configure("INFO", "human", stream=sys.stdout)   # the classic output
+    oplog.configure("INFO", "json", stream=open("opvs.log", "a"))
+    oplog.from_env()                                      # OPVS_LOG=human|json[:LEVEL]
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Union
+
+LOGGER = "opvs"
+
+logging.getLogger(LOGGER).addHandler(logging.NullHandler())
+
+_handlers: Dict[str, logging.Handler] = {}
+_listeners: Dict[str, QueueListener] = {}
+
+
+def extra(event: str, **fields) -> Dict:
+    """The `extra=` for one record: its event name and structured fields."""
+    return {"event": event, "fields": fields}
+
+
+class Lazy:
+    """A log argument rendered only if a renderer formats the message."""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return self.fn(*self.args)
+
+
+class HumanRenderer(logging.Formatter):
+    """The message alone, exactly as the clients used to print it."""
+
+    def __init__(self):
+        super().__init__("%(message)s")
+
+
+class JsonRenderer(logging.Formatter):
+    """One JSON line per record, from its event and fields; the message is not formatted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry["fields"] = fields
+        if entry["event"] is None:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+RENDERERS = {"human": HumanRenderer, "json": JsonRenderer}
+
+
+class _Handoff(QueueHandler):
+    def prepare(self, record):
+        return record  # formatted on the listener thread
+
+
+def configure(level: Union[int, str] = "INFO",
+              renderer: Union[str, logging.Formatter] = "human",
+              stream=None,
+              name: str = LOGGER,
+              queued: bool = True) -> Optional[QueueListener]:
+    """
+    Route logger `name` (and its children) to `stream`, through a queue by default.
+
+    Args:
+        level: Lowest level emitted; anything below is dropped at the call site
+        renderer: "human", "json", or any logging.Formatter
+        stream: Output stream (default stderr)
+        name: Logger to configure
+        queued: Write on a listener thread; False writes inline
+
+    Returns:
+        The running QueueListener (stopped at exit, or by shutdown()), or
+        None when not queued
+    """
+    shutdown(name)
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(RENDERERS[renderer]() if isinstance(renderer, str) else renderer)
+    listener = None
+    if queued:
+        records = queue.SimpleQueue()
+        listener = _listeners[name] = QueueListener(records, handler)
+        listener.start()
+        handler = _Handoff(records)
+    logger = logging.getLogger(name)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    _handlers[name] = handler
+    return listener
+
+
+def shutdown(name: str = LOGGER) -> None:
+    """Detach what configure() attached to `name`, draining its listener."""
+    handler = _handlers.pop(name, None)
+    if handler is not None:
+        logging.getLogger(name).removeHandler(handler)
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+
+def from_env(stream=None, name: str = LOGGER) -> Optional[QueueListener]:
+    """
+    configure() from OPVS_LOG ("human", "json", optionally ":LEVEL",
+    e.g. "json:DEBUG"), or None when unset, leaving the clients quiet.
+    """
+    spec = os.getenv("OPVS_LOG", "").strip()
+    if not spec:
+        return None
+    renderer, _, level = spec.partition(":")
+    return configure(level.upper() or "INFO", renderer, stream, name)
+
+
+@atexit.register
+def _stop_all() -> None:
+    for name in list(_handlers):
+        shutdown(name)
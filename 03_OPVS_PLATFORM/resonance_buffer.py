@@ -0,0 +1,271 @@
+"""
+Buffered resonance event ingestion for the OPVS Platform.
+
+Every generation and derivative creation is a resonance event, which
+makes track_resonance() the highest-volume path. Writing each event
+costs a database round trip. ResonanceBuffer instead coalesces events in
+memory by bean_id, pre-aggregating resonance_delta, and a background
+writer flushes them in batches:
+
+- when `flush_size` distinct beans are pending, or
+- every `flush_interval` seconds, whichever comes first.
+
+A flush is one transaction: a multi-row upsert into bean_resonance
+(db/schema.sql). With a RissEngine attached (riss.py, the one definition
+of RISS), the same transaction also writes what the engine computed for
+everything that changed since the last flush:
+
+- bean_resonance.integrity of changed beans;
+- users.riss_score of changed creators, as absolute values, so a
+  retried flush never counts an event twice.
+
+Without an engine, users.riss_score is left alone.
+
+Recording an event is a dict update under a lock, costing microseconds.
+While a flush is running, new events collect in a fresh buffer. If that
+one also fills up (`max_pending`), producers block until the writer
+catches up. This backpressure keeps memory bounded when the database is
+slow.
+
+A failed flush keeps its events pending and is retried. flush() raises
+the error instead of waiting on a database that is down, and close()
+raises it too, after logging how many events were not written; they stay
+available from unsent() for replay into another buffer.
+
+The SQL runs on PostgreSQL (psycopg, paramstyle "format") and on SQLite
+3.33+ (paramstyle "qmark") for local testing.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROWS_PER_STATEMENT = 500  # keeps a statement under SQLite's bound-parameter limit
+
+log = logging.getLogger("opvs.resonance")
+
+
+class BufferFull(Exception):
+    """Raised by add(block=False) when the buffer is applying backpressure."""
+
+
+class ResonanceBuffer:
+    """
+    In-process write-behind buffer for resonance events.
+
+    Use as a context manager, or call start() and close(); close() flushes
+    whatever is still pending.
+    """
+
+    def __init__(self,
+                 connect: Callable,
+                 paramstyle: str = "format",
+                 flush_size: int = 1000,
+                 flush_interval: float = 1.0,
+                 max_pending: int = 10000,
+                 riss=None):
+        """
+        Initialize the buffer.
+
+        Args:
+            connect: Zero-argument callable returning a DB-API connection;
+                called once, on the writer thread
+            paramstyle: "format" (psycopg) or "qmark" (sqlite3)
+            flush_size: Distinct pending beans that trigger a flush
+            flush_interval: Seconds between time-triggered flushes
+            max_pending: Distinct pending beans before add() blocks
+            riss: Optional RissEngine whose changed scores each flush writes
+                back (load it from the same database first: riss.load(conn))
+        """
+        if paramstyle not in ("format", "qmark"):
+            raise ValueError("paramstyle must be 'format' or 'qmark'")
+        self.connect = connect
+        self.placeholder = "%s" if paramstyle == "format" else "?"
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, flush_size)
+        self.riss = riss
+        self.stats = {"events": 0, "flushes": 0, "rows": 0, "errors": 0, "blocked_s": 0.0}
+        self.last_error: Optional[Exception] = None
+        self._pending: Dict[str, list] = {}  # bean_id -> [delta, events, last_event_at]
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ── producers ──
+
+    def add(self, event: Dict, block: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Record one resonance event (a track_resonance() dict).
+
+        Args:
+            event: Event with "bean_id" and optional "resonance_delta"/"timestamp"
+                (and "events", the count an unsent() entry stands for)
+            block: Wait for room when the buffer is full; otherwise raise BufferFull
+            timeout: Longest wait in seconds when blocking (None waits forever)
+        """
+        bean_id = event["bean_id"]
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("ResonanceBuffer is closed")
+            if len(self._pending) >= self.max_pending and bean_id not in self._pending:
+                if not block:
+                    raise BufferFull(f"{len(self._pending)} beans pending")
+                started = time.perf_counter()
+                self._flush_requested = True
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: len(self._pending) < self.max_pending or self._closing,
+                                           timeout):
+                    raise BufferFull(f"{len(self._pending)} beans pending after {timeout}s")
+                self.stats["blocked_s"] += time.perf_counter() - started
+            entry = self._pending.get(bean_id)
+            if entry is None:
+                entry = self._pending[bean_id] = [0, 0, None]
+            entry[0] += event.get("resonance_delta", 1)
+            entry[1] += event.get("events", 1)
+            entry[2] = event.get("timestamp") or entry[2]
+            self.stats["events"] += event.get("events", 1)
+            if len(self._pending) >= self.flush_size and not self._flush_requested:
+                self._flush_requested = True
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Ask the writer to flush now and wait until everything pending is
+        written. Raises the writer's error if a flush fails meanwhile (the
+        events stay pending), and TimeoutError after `timeout` seconds.
+        """
+        with self._cond:
+            errors = self.stats["errors"]
+            self._flush_requested = True
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: (not self._pending and not self._flush_requested)
+                                       or self.stats["errors"] > errors, timeout):
+                raise TimeoutError(f"{len(self._pending)} beans still pending after {timeout}s")
+            if self.stats["errors"] > errors:
+                raise self.last_error
+
+    def unsent(self) -> List[Dict]:
+        """Pending events, one coalesced event per bean, ready to add() to another buffer."""
+        with self._cond:
+            return [{"bean_id": bean_id, "resonance_delta": delta, "events": events, "timestamp": ts}
+                    for bean_id, (delta, events, ts) in self._pending.items()]
+
+    # ── writer ──
+
+    def start(self) -> "ResonanceBuffer":
+        self._thread = threading.Thread(target=self._run, name="resonance-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Flush what is pending and stop the writer. If the final flush fails,
+        the loss is logged and the error raised; unsent() still has the events.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pending and self.last_error is not None:
+            log.error("resonance: %d events for %d beans not written: %s",
+                      sum(entry[1] for entry in self._pending.values()), len(self._pending), self.last_error)
+            raise self.last_error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self) -> None:
+        conn = self.connect()
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._flush_requested or self._closing, self.flush_interval)
+                    batch, self._pending = self._pending, {}
+                    closing = self._closing
+                    self._cond.notify_all()  # producers refill the fresh buffer while this one is written
+                scores = self.riss.changes() if self.riss is not None else ({}, {})
+                written = self._write(conn, batch, scores) if batch or any(scores) else True
+                with self._cond:
+                    self._flush_requested = False
+                    self._cond.notify_all()  # wake blocked producers and flush() callers
+                    if closing and (not self._pending or not written):
+                        return  # a failed final flush is raised by close()
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch: Dict[str, list], scores: Tuple[Dict, Dict]) -> bool:
+        rows = [(bean_id, delta, events, ts or datetime.now().isoformat())
+                for bean_id, (delta, events, ts) in batch.items()]
+        integrity, riss_scores = scores
+        try:
+            cur = conn.cursor()
+            for chunk in _chunks(rows):
+                self._upsert_beans(cur, chunk)
+            for chunk in _chunks(list(integrity.items())):
+                self._set_integrity(cur, chunk)
+            for chunk in _chunks([(str(user_id), score) for user_id, score in riss_scores.items()]):
+                self._set_users(cur, chunk)
+            conn.commit()
+        except Exception as err:
+            conn.rollback()
+            # Put the batch back so the next flush retries it, and wake flush() callers.
+            with self._cond:
+                for bean_id, (delta, events, ts) in batch.items():
+                    entry = self._pending.setdefault(bean_id, [0, 0, ts])
+                    entry[0] += delta
+                    entry[1] += events
+                self.stats["errors"] += 1
+                self.last_error = err
+                self._cond.notify_all()
+            if self.riss is not None:
+                self.riss.unwritten(integrity, riss_scores)
+            time.sleep(min(self.flush_interval, 1.0))
+            return False
+        self.stats["flushes"] += 1
+        self.stats["rows"] += len(rows)
+        return True
+
+    def _values(self, rows, *columns: str) -> str:
+        """VALUES groups for `rows`; each column is a template around "{}" (the placeholder)."""
+        group = "(" + ", ".join(c.format(self.placeholder) for c in columns) + ")"
+        return ", ".join([group] * len(rows))
+
+    def _upsert_beans(self, cur, rows) -> None:
+        cur.execute(
+            "INSERT INTO bean_resonance (bean_id, resonance, events, last_event_at) "
+            f"VALUES {self._values(rows, '{}', '{}', '{}', '{}')} "
+            "ON CONFLICT (bean_id) DO UPDATE SET "
+            "resonance = bean_resonance.resonance + excluded.resonance, "
+            "events = bean_resonance.events + excluded.events, "
+            "last_event_at = excluded.last_event_at",
+            [v for row in rows for v in row],
+        )
+
+    def _set_integrity(self, cur, rows) -> None:
+        cur.execute(
+            "INSERT INTO bean_resonance (bean_id, integrity) "
+            f"VALUES {self._values(rows, '{}', '{}')} "
+            "ON CONFLICT (bean_id) DO UPDATE SET integrity = excluded.integrity",
+            [v for row in rows for v in row],
+        )
+
+    def _set_users(self, cur, rows) -> None:
+        # users.id is a UUID on PostgreSQL; compared as text, the same SQL runs on SQLite.
+        cur.execute(
+            f"WITH d (user_id, score) AS (VALUES {self._values(rows, '{}', 'CAST({} AS INTEGER)')}) "
+            "UPDATE users SET riss_score = d.score FROM d WHERE CAST(users.id AS TEXT) = d.user_id",
+            [v for row in rows for v in row],
+        )
+
+
+def _chunks(rows: list):
+    for i in range(0, len(rows), ROWS_PER_STATEMENT):
+        yield rows[i:i + ROWS_PER_STATEMENT]
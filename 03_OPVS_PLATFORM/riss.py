@@ -0,0 +1,363 @@
+"""
+RISS (Resonance & Integrity Scoring System) engine for the OPVS Platform.
+
+Scores are kept as materialized aggregates and updated incrementally as
+events arrive, so reads never scan the event history:
+
+- per bean: direct resonance, rolled-up resonance (its own plus credit
+  from derivatives) and integrity (starts at 100, clamped to 0..100);
+- per creator: total rolled-up resonance over their beans, mean bean
+  integrity, and the RISS score, which is resonance weighted by integrity
+  (resonance * integrity / 100).
+
+Derivatives credit their ancestors. A bean_strings edge source → target
+(db/schema.sql) means the source builds on the target. Resonance on a
+bean is credited to each ancestor within MAX_ROLLUP_DEPTH hops, decayed
+by ROLLUP_DECAY per hop. An ancestor reached by several paths is
+credited once, at its nearest distance. Only HARMONIZES_WITH edges carry
+credit: a DISRUPTS edge contests its target, so the roll-up stops there.
+Credit flows from events recorded after the edge exists, so replaying
+the same ordered event stream always gives the same scores.
+
+This is the one definition of RISS: users.riss_score holds the creator
+score computed here. load() rebuilds the engine from the database
+(beans, bean_strings, and bean_resonance totals and integrity). A
+ResonanceBuffer given the engine writes the scores of changed creators,
+and the integrity of changed beans, back with each flush (see
+changes()).
+
+Profile reads are dict lookups. The leaderboard is kept sorted as
+scores change, so top-N reads cost O(N) and a rank lookup O(log n).
+snapshot() freezes the current state, and as_of() returns the latest
+snapshot taken at or before a given time.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+ROLLUP_DECAY = 0.5
+MAX_ROLLUP_DEPTH = 3
+INITIAL_INTEGRITY = 100.0
+RESONANCE_TYPES = ("HARMONIZES_WITH", "DISRUPTS")  # bean_strings.resonance_type
+CREDITED_TYPES = {"HARMONIZES_WITH"}
+
+
+class _Bean:
+    __slots__ = ("bean_id", "creator_id", "resonance", "rolled", "integrity", "events")
+
+    def __init__(self, bean_id, creator_id, integrity):
+        self.bean_id = bean_id
+        self.creator_id = creator_id
+        self.resonance = 0.0   # from events on this bean
+        self.rolled = 0.0      # resonance + credit from derivatives
+        self.integrity = integrity
+        self.events = 0
+
+    def as_dict(self):
+        return {
+            "bean_id": self.bean_id,
+            "creator_id": self.creator_id,
+            "resonance": self.resonance,
+            "rolled_resonance": self.rolled,
+            "integrity": self.integrity,
+            "events": self.events,
+        }
+
+
+class _Creator:
+    __slots__ = ("creator_id", "resonance", "integrity_sum", "beans")
+
+    def __init__(self, creator_id):
+        self.creator_id = creator_id
+        self.resonance = 0.0
+        self.integrity_sum = 0.0
+        self.beans = 0
+
+    @property
+    def integrity(self):
+        return self.integrity_sum / self.beans if self.beans else INITIAL_INTEGRITY
+
+    @property
+    def riss(self):
+        return self.resonance * self.integrity / 100.0
+
+    def as_dict(self):
+        return {
+            "creator_id": self.creator_id,
+            "resonance": self.resonance,
+            "integrity": self.integrity,
+            "riss_score": round(self.riss),
+            "beans": self.beans,
+        }
+
+
+class Snapshot:
+    """Frozen scores at one point in the event stream."""
+
+    def __init__(self, seq: int, taken_at: float, beans: Dict, creators: Dict, leaderboard: List):
+        self.seq = seq
+        self.taken_at = taken_at
+        self.beans = beans
+        self.creators = creators
+        self.leaderboard = leaderboard
+
+    def profile(self, creator_id: str) -> Optional[Dict]:
+        return self.creators.get(creator_id)
+
+    def to_dict(self) -> Dict:
+        return {"seq": self.seq, "taken_at": self.taken_at, "beans": self.beans,
+                "creators": self.creators, "leaderboard": self.leaderboard}
+
+
+class RissEngine:
+    """Incrementally maintained RISS aggregates. Safe to share across threads."""
+
+    def __init__(self, decay: float = ROLLUP_DECAY, max_depth: int = MAX_ROLLUP_DEPTH):
+        self.decay = decay
+        self.max_depth = max_depth
+        self.seq = 0  # events applied so far
+        self.snapshots: List[Snapshot] = []
+        self._beans: Dict[str, _Bean] = {}
+        self._creators: Dict[str, _Creator] = {}
+        self._parents: Dict[str, Dict[str, str]] = {}  # source -> {target: resonance_type}
+        self._ancestors: Dict[str, list] = {}  # bean -> [(ancestor, weight)], cached
+        self._board: list = []  # sorted [(-riss, creator_id)]
+        self._changed_beans: Set[str] = set()     # integrity not yet written back
+        self._changed_creators: Set[str] = set()  # riss_score not yet written back
+        self._lock = threading.RLock()
+
+    # ── events ──
+
+    def register_bean(self, bean_id: str, creator_id: Optional[str],
+                      integrity: float = INITIAL_INTEGRITY) -> Dict:
+        """Add a newly minted bean (idempotent) and return its scores."""
+        with self._lock:
+            bean = self._beans.get(bean_id)
+            if bean is None:
+                bean = self._beans[bean_id] = _Bean(bean_id, None, integrity)
+                self._changed_beans.add(bean_id)
+            if bean.creator_id is None and creator_id is not None:
+                # Also claims a bean that scored before its mint was seen.
+                bean.creator_id = creator_id
+                self._rescore(self._creator(creator_id), resonance=bean.rolled,
+                              integrity_sum=bean.integrity, beans=1)
+                self.seq += 1
+            return bean.as_dict()
+
+    def add_string(self, source_bean_id: str, target_bean_id: str,
+                   resonance_type: str = "HARMONIZES_WITH") -> None:
+        """Record that `source` builds on `target` (a bean_strings row)."""
+        if source_bean_id == target_bean_id:
+            raise ValueError("a bean cannot build on itself")
+        if resonance_type not in RESONANCE_TYPES:
+            raise ValueError(f"resonance_type must be one of {RESONANCE_TYPES}")
+        with self._lock:
+            self._bean(source_bean_id)
+            self._bean(target_bean_id)
+            self._parents.setdefault(source_bean_id, {})[target_bean_id] = resonance_type
+            self._ancestors.clear()  # closure changed; recomputed lazily per bean
+            self.seq += 1
+
+    def record_resonance(self, bean_id: str, delta: float = 1.0) -> None:
+        """Apply one resonance event (track_resonance()'s resonance_delta)."""
+        with self._lock:
+            self._resonate(self._bean(bean_id), delta, 1)
+            self.seq += 1
+
+    def record_integrity(self, bean_id: str, delta: float) -> None:
+        """Adjust a bean's integrity (fair attribution +, violations -), clamped to 0..100."""
+        with self._lock:
+            bean = self._bean(bean_id)
+            new = min(100.0, max(0.0, bean.integrity + delta))
+            change, bean.integrity = new - bean.integrity, new
+            if change:
+                self._changed_beans.add(bean_id)
+                if bean.creator_id is not None:
+                    self._rescore(self._creators[bean.creator_id], integrity_sum=change)
+            self.seq += 1
+
+    def apply(self, event: Dict) -> None:
+        """
+        Apply one event dict: a track_resonance() event ("resonance_delta"),
+        an integrity event ("integrity_delta"), a bean_strings edge
+        ("source_bean_id"/"target_bean_id") or a mint ("creator_id").
+        """
+        if "source_bean_id" in event:
+            self.add_string(event["source_bean_id"], event["target_bean_id"],
+                            event.get("resonance_type", "HARMONIZES_WITH"))
+        elif "integrity_delta" in event:
+            self.record_integrity(event["bean_id"], event["integrity_delta"])
+        elif "resonance_delta" in event:
+            self.record_resonance(event["bean_id"], event["resonance_delta"])
+        else:
+            self.register_bean(event["bean_id"], event.get("creator_id") or event.get("user_id"),
+                               event.get("integrity_score", INITIAL_INTEGRITY))
+
+    def apply_many(self, events: Iterable[Dict]) -> None:
+        for event in events:
+            self.apply(event)
+
+    # ── persistence ──
+
+    def load(self, conn) -> "RissEngine":
+        """
+        Rebuild the aggregates from the database (db/schema.sql): beans and
+        their owners, bean_strings edges, and per-bean resonance totals and
+        integrity from bean_resonance. The database keeps totals, not the
+        event order, so loaded resonance is credited along every edge that
+        exists now. Every creator is then marked changed, so the next
+        ResonanceBuffer flush writes riss_score under this definition.
+        Returns the engine.
+        """
+        cur = conn.cursor()
+        cur.execute("SELECT bean_id, user_id FROM beans WHERE bean_id IS NOT NULL")
+        owners = cur.fetchall()
+        cur.execute("SELECT s.bean_id, t.bean_id, bs.resonance_type FROM bean_strings bs "
+                    "JOIN beans s ON s.id = bs.source_bean_id JOIN beans t ON t.id = bs.target_bean_id "
+                    "WHERE s.bean_id IS NOT NULL AND t.bean_id IS NOT NULL")
+        edges = cur.fetchall()
+        cur.execute("SELECT bean_id, resonance, events, integrity FROM bean_resonance")
+        totals = cur.fetchall()
+        with self._lock:
+            stored = {bean_id: integrity for bean_id, _, _, integrity in totals}
+            for bean_id, user_id in owners:
+                integrity = stored.get(bean_id)
+                self.register_bean(bean_id, None if user_id is None else str(user_id),
+                                   INITIAL_INTEGRITY if integrity is None else float(integrity))
+            for source, target, resonance_type in edges:
+                if source != target:
+                    self.add_string(source, target, resonance_type or "HARMONIZES_WITH")
+            for bean_id, resonance, events, integrity in totals:
+                bean = self._bean(bean_id)
+                if bean.creator_id is None and integrity is not None:
+                    bean.integrity = float(integrity)  # scored, but its mint is not in beans
+                self._resonate(bean, float(resonance or 0), int(events or 0))
+            self._changed_beans.clear()
+            self._changed_creators = set(self._creators)
+        return self
+
+    def changes(self) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """
+        Take what changed since the last call: ({bean_id: integrity},
+        {creator_id: riss_score}). ResonanceBuffer writes these back and,
+        if the write fails, hands them to unwritten().
+        """
+        with self._lock:
+            beans = {b: self._beans[b].integrity for b in self._changed_beans}
+            creators = {c: round(self._creators[c].riss) for c in self._changed_creators}
+            self._changed_beans.clear()
+            self._changed_creators.clear()
+            return beans, creators
+
+    def unwritten(self, beans: Iterable[str], creators: Iterable[str]) -> None:
+        """Mark beans and creators from changes() as not written back after all."""
+        with self._lock:
+            self._changed_beans.update(beans)
+            self._changed_creators.update(creators)
+
+    # ── reads ──
+
+    def bean(self, bean_id: str) -> Optional[Dict]:
+        with self._lock:
+            bean = self._beans.get(bean_id)
+            return bean.as_dict() if bean else None
+
+    def profile(self, creator_id: str) -> Optional[Dict]:
+        with self._lock:
+            creator = self._creators.get(creator_id)
+            if creator is None:
+                return None
+            profile = creator.as_dict()
+            profile["rank"] = self._rank(creator)
+            return profile
+
+    def leaderboard(self, n: int = 10) -> List[Dict]:
+        with self._lock:
+            return [dict(self._creators[cid].as_dict(), rank=i + 1)
+                    for i, (_, cid) in enumerate(self._board[:n])]
+
+    def snapshot(self) -> Snapshot:
+        """Freeze the current scores and keep the snapshot for as_of()."""
+        with self._lock:
+            snap = Snapshot(
+                self.seq, time.time(),
+                {b: bean.as_dict() for b, bean in self._beans.items()},
+                {c: creator.as_dict() for c, creator in self._creators.items()},
+                [cid for _, cid in self._board],
+            )
+            self.snapshots.append(snap)
+            return snap
+
+    def as_of(self, timestamp: float) -> Optional[Snapshot]:
+        """The latest snapshot taken at or before `timestamp`."""
+        with self._lock:
+            i = bisect.bisect_right([s.taken_at for s in self.snapshots], timestamp)
+            return self.snapshots[i - 1] if i else None
+
+    # ── internals ──
+
+    def _bean(self, bean_id):
+        bean = self._beans.get(bean_id)
+        if bean is None:
+            # Events can arrive before the mint is known; the bean scores, no creator is credited.
+            bean = self._beans[bean_id] = _Bean(bean_id, None, INITIAL_INTEGRITY)
+        return bean
+
+    def _creator(self, creator_id):
+        creator = self._creators.get(creator_id)
+        if creator is None:
+            creator = self._creators[creator_id] = _Creator(creator_id)
+            bisect.insort(self._board, (-creator.riss, creator_id))
+        return creator
+
+    def _resonate(self, bean, delta, events):
+        bean.resonance += delta
+        bean.events += events
+        self._credit(bean, delta)
+        for ancestor_id, weight in self._ancestry(bean.bean_id):
+            self._credit(self._beans[ancestor_id], delta * weight)
+
+    def _credit(self, bean, amount):
+        bean.rolled += amount
+        if bean.creator_id is not None:
+            self._rescore(self._creators[bean.creator_id], resonance=amount)
+
+    def _rescore(self, creator, resonance=0.0, integrity_sum=0.0, beans=0):
+        """Change a creator's aggregates and move them on the leaderboard."""
+        old = (-creator.riss, creator.creator_id)
+        creator.resonance += resonance
+        creator.integrity_sum += integrity_sum
+        creator.beans += beans
+        i = bisect.bisect_left(self._board, old)
+        if i < len(self._board) and self._board[i] == old:
+            del self._board[i]
+        else:  # not where its score says; never delete a neighbour's entry
+            self._board = [entry for entry in self._board if entry[1] != creator.creator_id]
+        bisect.insort(self._board, (-creator.riss, creator.creator_id))
+        self._changed_creators.add(creator.creator_id)
+
+    def _rank(self, creator):
+        return bisect.bisect_left(self._board, (-creator.riss, creator.creator_id)) + 1
+
+    def _ancestry(self, bean_id):
+        """Ancestors credited within max_depth hops, with their weight (nearest path wins)."""
+        cached = self._ancestors.get(bean_id)
+        if cached is not None:
+            return cached
+        seen = {bean_id}
+        frontier = [bean_id]
+        result = []
+        for depth in range(1, self.max_depth + 1):
+            weight = self.decay ** depth
+            next_frontier = []
+            for node in frontier:
+                for parent, resonance_type in self._parents.get(node, {}).items():
+                    if resonance_type in CREDITED_TYPES and parent not in seen:
+                        seen.add(parent)
+                        result.append((parent, weight))
+                        next_frontier.append(parent)
+            frontier = next_frontier
+        self._ancestors[bean_id] = result
+        return result
@@ -0,0 +1,6 @@
+"""Platform modules import each other as top-level modules, as the scripts do."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import sys
+
+from aistudio_async import AsyncGoogleAIStudioClient, httpx
+
+# The resilience policy lives with the playground (as benchmark.py, the other way round).
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "playground"))
+from resilience import Resilience  # noqa: E402
+
+RESONANCE_URL = "http://opvs.test/opvs/resonance"
+
+
+def client(app, policy):
+    return AsyncGoogleAIStudioClient("key", config={"resonance_url": RESONANCE_URL}, resilience=policy,
+                                     transport=httpx.MockTransport(app))
+
+
+def track(handler, policy):
+    """track_resonance() against `handler`; returns (result or exception, events the server received)."""
+    events = []
+
+    async def app(request):
+        return await handler(request, events)
+
+    async def main():
+        async with client(app, policy) as c:
+            try:
+                return await c.track_resonance("bean_1", "generation")
+            except Exception as err:
+                return err
+
+    return asyncio.run(main()), events
+
+
+async def receive(request, events):
+    events.append(json.loads(b"".join([chunk async for chunk in request.stream])))
+
+
+def test_hedged_post_is_sent_once():
+    async def slow(request, events):
+        await receive(request, events)
+        await asyncio.sleep(0.1)  # well past the hedge delay
+        return httpx.Response(200, json={})
+
+    event, events = track(slow, Resilience(hedge=0.01, retries=3, base_delay=0))
+    assert [e["event_id"] for e in events] == [event["event_id"]]
+
+
+def test_post_is_not_resent_after_it_left():
+    async def timeout(request, events):
+        await receive(request, events)
+        raise httpx.ReadTimeout("no response", request=request)
+
+    result, events = track(timeout, Resilience(retries=3, base_delay=0))
+    assert isinstance(result, httpx.ReadTimeout)
+    assert len(events) == 1
+
+
+def test_post_is_resent_when_it_never_left():
+    calls = []
+
+    async def flaky(request, events):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        await receive(request, events)
+        return httpx.Response(200, json={})
+
+    event, events = track(flaky, Resilience(retries=3, base_delay=0))
+    assert len(calls) == 2 and [e["event_id"] for e in events] == [event["event_id"]]
+
+
+def test_generation_is_still_retried():
+    calls = []
+
+    async def app(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "hi"}]}}]})
+
+    async def main():
+        async with client(app, Resilience(retries=2, base_delay=0)) as c:
+            return await c.generate_content("gemini-pro", "hello")
+
+    assert asyncio.run(main())["generated_text"] == "hi"
+    assert len(calls) == 2
+
+
+EXAMPLES = [{"text_input": f"question {i}", "output": f"answer {i}"} for i in range(50)]
+OPERATION = {"name": "tunedModels/t1/operations/o1", "metadata": {"tunedModel": "tunedModels/t1"}}
+
+
+def calibrate(handler, policy):
+    """calibrate() against `handler`; returns (result or exception, bodies the server received)."""
+    bodies = []
+
+    async def app(request):
+        return await handler(request, bodies)
+
+    async def main():
+        async with client(app, policy) as c:
+            try:
+                return await c.calibrate("session", EXAMPLES)
+            except Exception as err:
+                return err
+
+    return asyncio.run(main()), bodies
+
+
+def test_hedged_calibrate_sends_one_body():
+    async def slow(request, bodies):
+        await receive(request, bodies)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json=OPERATION)
+
+    result, bodies = calibrate(slow, Resilience(hedge=0.01, retries=3, base_delay=0))
+    assert result["operation"] == OPERATION["name"]
+    assert len(bodies) == 1
+    assert len(bodies[0]["tuningTask"]["trainingData"]["examples"]["examples"]) == len(EXAMPLES)
+
+
+def test_calibrate_is_not_resent_after_the_body_left():
+    async def timeout(request, bodies):
+        await receive(request, bodies)
+        raise httpx.ReadTimeout("no response", request=request)
+
+    result, bodies = calibrate(timeout, Resilience(retries=3, base_delay=0))
+    assert isinstance(result, httpx.ReadTimeout)
+    assert len(bodies) == 1
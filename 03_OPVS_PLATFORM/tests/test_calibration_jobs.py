@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from calibration_jobs import CalibrationQueue, JobStore
+from training_data import TrainingDataError, TrainingReport
+
+
+class FakeClient:
+    """Sessions and tuning submissions that fail as scripted, then succeed."""
+
+    default_model = "gemini-test"
+
+    def __init__(self, calibrate_errors=()):
+        self.calibrate_errors = list(calibrate_errors)
+        self.calibrations = 0
+
+    async def start_calibration_session(self, creator_id, base_model, mode):
+        return {"session_id": f"session_{creator_id}"}
+
+    async def calibrate(self, session_id, training_examples, metadata, base_model):
+        self.calibrations += 1
+        if self.calibrate_errors:
+            raise self.calibrate_errors.pop(0)
+        return {"calibration_id": "cal_1", "tuned_model_id": "tunedModels/t1",
+                "operation": "tunedModels/t1/operations/o1"}
+
+    async def tuning_operation(self, operation):
+        return {"done": True, "response": {"name": "tunedModels/t1"}}
+
+
+def run(client, tmp_path=None, **kwargs):
+    async def main():
+        store = JobStore(str(tmp_path / "jobs.jsonl"), fsync=False) if tmp_path else None
+        async with CalibrationQueue(client, store, poll_min=0.001, poll_max=0.01, seed=1, **kwargs) as queue:
+            job_id = queue.submit("creator_1", [{"text_input": "q", "output": "a"}])
+            return await queue.wait(job_id)
+    return asyncio.run(main())
+
+
+def test_job_completes_and_is_logged(tmp_path):
+    job = run(FakeClient(), tmp_path)
+    assert job["state"] == "completed" and job["tuned_model_id"] == "tunedModels/t1"
+    with JobStore(str(tmp_path / "jobs.jsonl")) as store:
+        assert store.unfinished() == []
+
+
+def test_undecodable_response_is_retried():
+    client = FakeClient([json.JSONDecodeError("Expecting value", "<html>", 0)])
+    job = run(client)
+    assert job["state"] == "completed"
+    assert client.calibrations == 2
+
+
+def test_job_fails_after_max_attempts():
+    client = FakeClient([ConnectionError("refused")] * 3)
+    job = run(client, max_attempts=3)
+    assert job["state"] == "failed" and job["attempts"] == 3
+    assert job["error"] == "ConnectionError: refused"
+
+
+def test_bad_training_data_fails_at_once():
+    report = TrainingReport()
+    report.read = 1
+    client = FakeClient([TrainingDataError(report)])
+    job = run(client, max_attempts=5)
+    assert job["state"] == "failed" and client.calibrations == 1
+    assert job["error"].startswith("no valid training examples")
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from generation_cache import AsyncSingleFlight, GenerationCache, SingleFlight, from_env, request_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_key_ignores_param_order():
+    assert request_key("m", "p", {"a": 1, "b": 2}) == request_key("m", "p", {"b": 2, "a": 1})
+    assert request_key("m", "p") == request_key("m", "p", {})
+    assert request_key("m", "p") != request_key("m", "q")
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = GenerationCache(ttl=10, clock=clock)
+    cache.put("k", {"text": "hi"})
+    clock.now = 9.9
+    assert cache.get("k") == {"text": "hi"}
+    clock.now = 10
+    assert cache.get("k") is None
+    assert cache.as_dict()["expirations"] == 1
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = GenerationCache(max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
+    assert cache.stats["evictions"] == 1
+
+
+def test_byte_bound_and_oversize_results():
+    cache = GenerationCache(max_bytes=50)
+    assert cache.put("a", {"text": "x" * 10})  # 22 bytes as JSON
+    assert cache.put("b", {"text": "y" * 10})
+    assert cache.put("c", {"text": "z" * 10})
+    assert cache.bytes <= 50 and len(cache) == 2
+    assert cache.get("a") is None
+    assert not cache.put("big", {"text": "w" * 100})
+    assert cache.stats["oversize"] == 1 and cache.get("big") is None
+
+
+def test_replacing_a_key_recharges_its_bytes():
+    cache = GenerationCache()
+    cache.put("a", {"text": "x" * 100})
+    cache.put("a", {"text": ""})
+    assert cache.bytes == len('{"text": ""}')
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv("OPVS_GENERATION_CACHE_TTL", raising=False)
+    assert from_env() is None
+    monkeypatch.setenv("OPVS_GENERATION_CACHE_TTL", "30")
+    monkeypatch.setenv("OPVS_GENERATION_CACHE_ENTRIES", "5")
+    cache = from_env()
+    assert cache.ttl == 30 and cache.max_entries == 5
+
+
+def test_single_flight_shares_one_call_across_threads():
+    flight, calls, release = SingleFlight(), [], threading.Event()
+    results = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return {"text": "once"}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)  # every thread is now waiting on the one call
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result == {"text": "once"} for result, _ in results)
+
+
+def test_single_flight_errors_are_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("upstream")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: {"ok": True}) == ({"ok": True}, False)
+
+
+def test_async_single_flight_coalesces_and_propagates_errors():
+    async def main():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"text": "once"}
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert len(calls) == 1
+        assert [shared for _, shared in results] == [False] + [True] * 4
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream")
+
+        outcomes = await asyncio.gather(*(flight.do("e", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+        assert await flight.do("e", work) == ({"text": "once"}, False)
+
+    asyncio.run(main())
+
+
+def test_async_single_flight_waiter_takes_over_from_a_cancelled_leader():
+    async def main():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"text": "done"}
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == ({"text": "done"}, False)
+        assert len(calls) == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
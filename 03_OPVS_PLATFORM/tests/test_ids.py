@@ -0,0 +1,47 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import ids
+
+
+def test_ids_sort_in_the_order_they_were_minted():
+    minted = [ids.new_id() for _ in range(5000)]
+    assert minted == sorted(minted)
+    assert len(set(minted)) == len(minted)
+    assert all(len(i) == ids.ENCODED_LENGTH for i in minted)
+
+
+def test_ids_minted_in_the_same_millisecond_keep_their_order(monkeypatch):
+    monkeypatch.setattr(time, "time_ns", lambda: 1_700_000_000_123_000_000)
+    minted = [ids.new_id("bean") for _ in range(100)]
+    assert minted == sorted(minted)
+    assert {i[:21] for i in minted} == {minted[0][:21]}  # "bean_" + one time+node head
+    assert ids.id_time(minted[0]) == datetime(2023, 11, 14, 22, 13, 20, 123000, tzinfo=timezone.utc)
+
+
+def test_encode_round_trips():
+    for value in (0, 1, 2 ** 127, 2 ** 128 - 1):
+        assert ids.decode(ids.encode(value)) == value
+    assert ids.decode(ids.encode(12345).lower()) == 12345
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_draws_a_new_node_and_sequence():
+    parent = ids.new_id()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        os.write(write, ids.new_id().encode())
+        os._exit(0)
+    os.close(write)
+    child = os.read(read, 64).decode()
+    os.close(read)
+    os.waitpid(pid, 0)
+    after = ids.new_id()
+    # The node sits in characters 10..15, the sequence in the last 10.
+    assert child[10:16] != parent[10:16] == after[10:16]
+    assert child[-10:] != ids.encode(ids.decode(parent[-10:]) + 1)[-10:]
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import uuid
+
+import pytest
+
+import minting
+from aistudio_example import GoogleAIStudioClient
+from riss import RissEngine
+
+SCHEMA = """
+CREATE TABLE users (id TEXT PRIMARY KEY, email TEXT UNIQUE NOT NULL);
+CREATE TABLE beans (
+    id TEXT PRIMARY KEY, user_id TEXT REFERENCES users(id), title TEXT, content TEXT,
+    type TEXT, bean_id TEXT, git_hash TEXT, git_url TEXT, idempotency_key TEXT, provenance TEXT
+);
+CREATE UNIQUE INDEX idx_beans_idempotency_key ON beans (idempotency_key) WHERE idempotency_key IS NOT NULL;
+CREATE TABLE sync_log (id TEXT PRIMARY KEY, commit_sha TEXT UNIQUE NOT NULL, branch TEXT);
+"""
+
+USER = str(uuid.uuid4())
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO users (id, email) VALUES (?, ?)", (USER, "rmm@opvs.example"))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def calibration(n, user=USER, **extra):
+    return {"user_id": user, "calibration_id": f"cal_{n}", "tuned_model_id": f"tunedModels/m{n}", **extra}
+
+
+def count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def mint(conn, calibrations, **kwargs):
+    return minting.mint_beans(conn, calibrations, paramstyle="qmark", **kwargs)
+
+
+def test_retry_returns_the_first_beans(conn):
+    batch = [calibration(i) for i in range(3)]
+    first = mint(conn, batch, commit_sha="abc123", branch="main")
+    again = mint(conn, batch, commit_sha="abc123", branch="main")
+
+    assert [b["minted"] for b in first] == [True] * 3
+    assert [b["minted"] for b in again] == [False] * 3
+    assert [b["bean_id"] for b in again] == [b["bean_id"] for b in first]
+    assert count(conn, "beans") == 3
+    assert count(conn, "sync_log") == 1
+
+
+def test_overlapping_batch_mints_only_the_new_calibrations(conn):
+    mint(conn, [calibration(0), calibration(1)])
+    beans = mint(conn, [calibration(1), calibration(2)])
+    assert [b["minted"] for b in beans] == [False, True]
+    assert count(conn, "beans") == 3
+
+
+def test_email_and_id_are_the_same_creator(conn):
+    by_email = mint(conn, [calibration(0, user="rmm@opvs.example")])
+    by_id = mint(conn, [calibration(0, user=USER.upper())])
+    assert by_email[0]["user_id"] == by_id[0]["user_id"] == USER
+    assert by_id[0]["bean_id"] == by_email[0]["bean_id"]
+    assert not by_id[0]["minted"]
+    assert conn.execute("SELECT user_id FROM beans").fetchall() == [(USER,)]
+
+
+def test_duplicates_within_a_batch_collapse(conn):
+    beans = mint(conn, [calibration(0), calibration(0), calibration(1, idempotency_key="k1")])
+    assert len(beans) == 2
+    assert beans[1]["idempotency_key"] == "k1"
+    assert count(conn, "beans") == 2
+
+
+def test_unknown_user_fails_the_whole_batch(conn):
+    with pytest.raises(ValueError, match="creator_rmm"):
+        mint(conn, [calibration(0), calibration(1, user="creator_rmm")])
+    assert count(conn, "beans") == 0
+
+
+def test_invalid_calibration_fails_before_the_database(conn):
+    with pytest.raises(ValueError, match="#1"):
+        mint(conn, [calibration(0), calibration(1, status="running")])
+    assert count(conn, "beans") == 0
+    assert mint(conn, []) == []
+
+
+def test_provenance_has_its_own_column(conn):
+    bean, = mint(conn, [calibration(0)], commit_sha="abc123")
+    content, provenance = conn.execute("SELECT content, provenance FROM beans").fetchone()
+    assert content is None
+    assert json.loads(provenance) == bean["provenance"]
+    assert bean["provenance"]["commit_sha"] == "abc123"
+
+
+def test_mint_bean_credits_the_resolved_user(conn):
+    riss = RissEngine()
+    client = GoogleAIStudioClient(api_key="test", riss=riss)
+    bean = client.mint_bean("rmm@opvs.example", "cal_0", "tunedModels/m0", conn=conn, paramstyle="qmark")
+    assert bean["user_id"] == USER
+    assert riss.bean(bean["bean_id"])["creator_id"] == USER
+    assert riss.profile("rmm@opvs.example") is None
+    with pytest.raises(ValueError, match="pass conn"):
+        client.mint_bean("rmm@opvs.example", "cal_1", "tunedModels/m1")
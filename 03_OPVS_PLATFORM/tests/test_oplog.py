@@ -0,0 +1,29 @@
+import io
+import json
+import logging
+
+import oplog
+
+
+def test_queued_records_are_written_by_the_listener():
+    out = io.StringIO()
+    oplog.configure("INFO", "json", stream=out, name="opvs.test")
+    log = logging.getLogger("opvs.test")
+    log.debug("dropped")
+    log.info("minted %s", "bean_1", extra=oplog.extra("mint_bean", bean_id="bean_1"))
+    oplog.shutdown("opvs.test")
+    entry, = map(json.loads, out.getvalue().splitlines())
+    assert (entry["event"], entry["fields"]) == ("mint_bean", {"bean_id": "bean_1"})
+    assert log.handlers == []
+
+
+def test_inline_records_are_written_at_once():
+    out = io.StringIO()
+    assert oplog.configure("INFO", "human", stream=out, name="opvs.inline", queued=False) is None
+    log = logging.getLogger("opvs.inline")
+    log.info("round %d", 1)
+    out.write("token")
+    log.info("round %d", 2)
+    assert out.getvalue() == "round 1\ntokenround 2\n"
+    oplog.shutdown("opvs.inline")
+    assert log.handlers == []
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+import pytest
+
+from resonance_buffer import BufferFull, ResonanceBuffer
+
+SCHEMA = """
+CREATE TABLE users (id TEXT PRIMARY KEY, email TEXT, riss_score INTEGER DEFAULT 0);
+CREATE TABLE beans (id TEXT PRIMARY KEY, user_id TEXT, bean_id TEXT);
+CREATE TABLE bean_resonance (
+    bean_id TEXT PRIMARY KEY, resonance INTEGER DEFAULT 0, events INTEGER DEFAULT 0,
+    last_event_at TIMESTAMP, integrity REAL DEFAULT 100
+);
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "opvs.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO users (id, email) VALUES ('u1', 'u1@opvs.example')")
+    return path
+
+
+def buffer(db, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return ResonanceBuffer(lambda: sqlite3.connect(db, check_same_thread=False), paramstyle="qmark", **kwargs)
+
+
+def totals(db):
+    with sqlite3.connect(db) as conn:
+        return {row[0]: row[1:] for row in conn.execute("SELECT bean_id, resonance, events FROM bean_resonance")}
+
+
+def test_events_coalesce_into_one_row_per_bean(db):
+    with buffer(db, flush_size=1000) as buf:
+        for i in range(300):
+            buf.add({"bean_id": f"b{i % 3}", "resonance_delta": 2})
+        buf.flush(timeout=5)
+        assert buf.stats["flushes"] == 1 and buf.stats["rows"] == 3
+    assert totals(db) == {"b0": (200, 100), "b1": (200, 100), "b2": (200, 100)}
+
+
+def test_flushes_add_to_stored_totals(db):
+    with buffer(db) as buf:
+        buf.add({"bean_id": "b0"})
+        buf.flush(timeout=5)
+        buf.add({"bean_id": "b0", "resonance_delta": 4})
+    assert totals(db) == {"b0": (5, 2)}
+
+
+def test_failed_flush_is_retried_without_loss(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("ALTER TABLE bean_resonance RENAME TO bean_resonance_later")
+    buf = buffer(db, flush_interval=0.05).start()
+    for _ in range(3):
+        buf.add({"bean_id": "b0"})
+    deadline = time.monotonic() + 5
+    while not buf.stats["errors"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buf.stats["errors"] >= 1 and isinstance(buf.last_error, sqlite3.OperationalError)
+    with sqlite3.connect(db) as conn:
+        conn.execute("ALTER TABLE bean_resonance_later RENAME TO bean_resonance")
+    buf.add({"bean_id": "b0"})
+    buf.close()
+    assert totals(db) == {"b0": (4, 4)}
+
+
+def test_full_buffer_applies_backpressure(db):
+    buf = buffer(db, flush_size=2, max_pending=2)  # writer not started: nothing drains
+    buf.add({"bean_id": "b0"})
+    buf.add({"bean_id": "b1"})
+    buf.add({"bean_id": "b1"}, block=False)  # an already pending bean always fits
+    with pytest.raises(BufferFull):
+        buf.add({"bean_id": "b2"}, block=False)
+    with pytest.raises(BufferFull):
+        buf.add({"bean_id": "b2"}, timeout=0.01)
+
+
+def test_flush_raises_while_the_database_is_down(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("DROP TABLE bean_resonance")
+    buf = buffer(db, flush_interval=0.05).start()
+    buf.add({"bean_id": "b0"})
+    with pytest.raises(sqlite3.OperationalError):
+        buf.flush(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        buf.close()
+    assert buf.unsent() == [{"bean_id": "b0", "resonance_delta": 1, "events": 1, "timestamp": None}]
+
+
+def test_unsent_events_replay_into_another_buffer(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("ALTER TABLE bean_resonance RENAME TO bean_resonance_later")
+    buf = buffer(db, flush_interval=0.05).start()
+    for _ in range(3):
+        buf.add({"bean_id": "b0", "resonance_delta": 2})
+    with pytest.raises(sqlite3.OperationalError):
+        buf.close()
+    with sqlite3.connect(db) as conn:
+        conn.execute("ALTER TABLE bean_resonance_later RENAME TO bean_resonance")
+    with buffer(db) as retry:
+        for event in buf.unsent():
+            retry.add(event)
+    assert totals(db) == {"b0": (6, 3)}
+
+
+def test_flush_times_out_instead_of_blocking_forever(db):
+    buf = buffer(db)  # writer not started: nothing drains
+    buf.add({"bean_id": "b0"})
+    with pytest.raises(TimeoutError):
+        buf.flush(timeout=0.01)
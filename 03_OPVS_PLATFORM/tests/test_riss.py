@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+
+from resonance_buffer import ResonanceBuffer
+from riss import RissEngine
+
+SCHEMA = """
+CREATE TABLE users (id TEXT PRIMARY KEY, email TEXT, riss_score INTEGER DEFAULT 0);
+CREATE TABLE beans (id TEXT PRIMARY KEY, user_id TEXT, bean_id TEXT);
+CREATE TABLE bean_strings (source_bean_id TEXT, target_bean_id TEXT, resonance_type TEXT);
+CREATE TABLE bean_resonance (
+    bean_id TEXT PRIMARY KEY, resonance INTEGER DEFAULT 0, events INTEGER DEFAULT 0,
+    last_event_at TIMESTAMP, integrity REAL DEFAULT 100
+);
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "opvs.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO users (id, email) VALUES ('u1', 'u1@opvs.example')")
+    return path
+
+
+def chain(engine):
+    """c builds on b builds on a, each by a different creator."""
+    for bean_id, creator in (("a", "u1"), ("b", "u2"), ("c", "u3")):
+        engine.register_bean(bean_id, creator)
+    engine.add_string("b", "a")
+    engine.add_string("c", "b")
+    return engine
+
+
+def test_resonance_is_credited_to_ancestors_with_decay():
+    engine = chain(RissEngine())
+    engine.record_resonance("c", 8)
+    assert [engine.bean(b)["rolled_resonance"] for b in "abc"] == [2, 4, 8]
+    assert engine.bean("a")["resonance"] == 0
+    assert engine.profile("u1")["resonance"] == 2
+
+
+def test_rollup_stops_at_max_depth_and_disrupts_carries_no_credit():
+    engine = chain(RissEngine(max_depth=1))
+    engine.register_bean("d", "u4")
+    engine.add_string("d", "c", "DISRUPTS")
+    engine.record_resonance("d", 8)
+    engine.record_resonance("c", 8)
+    assert engine.bean("c")["rolled_resonance"] == 8
+    assert engine.bean("b")["rolled_resonance"] == 4
+    assert engine.bean("a")["rolled_resonance"] == 0
+
+
+def test_ancestry_cache_follows_new_strings():
+    engine = chain(RissEngine())
+    engine.record_resonance("c", 8)
+    engine.register_bean("z", "u9")
+    engine.add_string("a", "z")
+    engine.record_resonance("c", 8)
+    assert engine.bean("z")["rolled_resonance"] == 1
+
+
+def test_leaderboard_reorders_as_scores_change():
+    engine = RissEngine()
+    for bean_id, creator in (("a", "u1"), ("b", "u2"), ("c", "u3")):
+        engine.register_bean(bean_id, creator)
+    engine.record_resonance("a", 5)
+    engine.record_resonance("b", 3)
+    assert [p["creator_id"] for p in engine.leaderboard()] == ["u1", "u2", "u3"]
+    engine.record_resonance("c", 10)
+    engine.record_integrity("a", -80)  # u1: 5 * 20% = 1
+    board = engine.leaderboard()
+    assert [p["creator_id"] for p in board] == ["u3", "u2", "u1"]
+    assert [p["rank"] for p in board] == [1, 2, 3]
+    assert engine.profile("u1")["rank"] == 3
+    assert engine.profile("u1")["riss_score"] == 1
+
+
+def test_changes_are_taken_once_and_unwritten_puts_them_back():
+    engine = RissEngine()
+    engine.register_bean("a", "u1")
+    engine.record_resonance("a", 3)
+    assert engine.changes() == ({"a": 100.0}, {"u1": 3})
+    assert engine.changes() == ({}, {})
+    engine.unwritten(["a"], ["u1"])
+    assert engine.changes() == ({"a": 100.0}, {"u1": 3})
+
+
+def test_load_rebuilds_scores_from_the_database(db):
+    with sqlite3.connect(db) as conn:
+        conn.executemany("INSERT INTO beans VALUES (?, ?, ?)",
+                         [("1", "u1", "a"), ("2", "u2", "b")])
+        conn.execute("INSERT INTO bean_strings VALUES ('2', '1', 'HARMONIZES_WITH')")
+        conn.executemany("INSERT INTO bean_resonance (bean_id, resonance, events, integrity) VALUES (?, ?, ?, ?)",
+                         [("a", 2, 2, 100), ("b", 4, 4, 50)])
+        engine = RissEngine().load(conn)
+    assert engine.bean("a")["rolled_resonance"] == 4
+    assert engine.bean("b")["integrity"] == 50
+    assert engine.profile("u2")["riss_score"] == 2
+    beans, creators = engine.changes()
+    assert beans == {} and creators == {"u1": 4, "u2": 2}
+
+
+def test_riss_scores_are_written_as_absolute_values(db):
+    riss = RissEngine()
+    riss.register_bean("b0", "u1")
+    with ResonanceBuffer(lambda: sqlite3.connect(db, check_same_thread=False), paramstyle="qmark",
+                         flush_interval=60, riss=riss) as buf:
+        for _ in range(5):
+            riss.record_resonance("b0")
+            buf.add({"bean_id": "b0"})
+        buf.flush(timeout=5)
+        buf.flush(timeout=5)  # nothing changed: the score is not added twice
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT riss_score FROM users WHERE id = 'u1'").fetchone() == (5,)
+        assert conn.execute("SELECT integrity FROM bean_resonance").fetchone() == (100,)
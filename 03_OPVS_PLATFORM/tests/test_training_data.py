@@ -0,0 +1,53 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import training_data
+from training_data import TrainingDataError, TrainingReport
+
+
+def examples(n, start=0):
+    return [{"text_input": f"question {i}", "output": f"answer {i}"} for i in range(start, start + n)]
+
+
+def test_duplicates_are_dropped_and_counted():
+    report = TrainingReport()
+    valid = list(training_data.validate(examples(3) + examples(2) + [{"textInput": "question 0", "output": "answer 0"}],
+                                        report))
+    assert valid == examples(3)
+    assert (report.read, report.valid, report.duplicates) == (6, 3, 3)
+    assert len(list(training_data.validate(examples(3) * 2, dedupe=False))) == 6
+
+
+def test_invalid_lines_are_reported_by_position(tmp_path):
+    path = tmp_path / "examples.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(examples(1)[0]) + "\n\nnot json\n" + json.dumps({"text_input": "q"}) + "\n")
+    report = TrainingReport()
+    assert list(training_data.validate(str(path), report)) == examples(1)
+    assert report.samples == [(3, "not a JSON object"), (4, "missing output")]
+
+
+@pytest.mark.parametrize("chunk_bytes", [7, training_data.CHUNK_BYTES])
+def test_streamed_body_is_as_long_as_the_bytes_it_yields(chunk_bytes):
+    with training_data.pack(examples(200) + [{"text_input": "é ✓", "output": "ü"}]) as packed:
+        body = packed.body(b'{"examples":[', b"]}", chunk_bytes)
+        sent = b"".join(body.chunks())
+        assert body.length == len(sent)
+        assert packed.report.bytes == len(sent) - len(b'{"examples":[]}')
+        decoded = json.loads(sent)["examples"]
+        assert len(decoded) == packed.count == 201
+        assert decoded[-1] == {"textInput": "é ✓", "output": "ü"}
+
+        async def replay():
+            return b"".join([chunk async for chunk in body])
+
+        assert asyncio.run(replay()) == sent  # a retried upload re-reads the spool
+
+
+def test_pack_without_valid_examples_raises_training_data_error():
+    with pytest.raises(TrainingDataError) as info:
+        training_data.pack([{"text_input": "q"}, "nope"])
+    assert info.value.report.read == 2 and info.value.report.valid == 0
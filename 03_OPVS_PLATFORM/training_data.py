@@ -0,0 +1,231 @@
+"""
+Streaming validation and packing of calibration training examples.
+
+A creator's dataset can run to hundreds of thousands of
+{"text_input", "output"} pairs. Here a dataset is never held in memory:
+
+- read_examples() accepts any iterable of dicts or a JSONL path (plain or
+  .gz) and yields one example at a time;
+- validate() checks each example's schema and the tuning length limits,
+  drops exact duplicates by content hash, and tallies everything in a
+  TrainingReport. The totals are final once the stream is exhausted;
+- pack() spills the valid examples, already in API form, to a temporary
+  file. Its body() then streams the tunedModels.create request from that
+  file in fixed-size chunks. The body can be replayed, so a retried upload
+  re-reads the file rather than the (possibly one-shot) source.
+
+Memory stays constant in the dataset size, except for the duplicate
+filter, which keeps an 8-byte digest per distinct example.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+MAX_INPUT_CHARS = 40000   # tuning limit per example input
+MAX_OUTPUT_CHARS = 5000   # tuning limit per example output
+CHUNK_BYTES = 256 * 1024  # upload chunk size
+MAX_SAMPLES = 10          # invalid examples kept in a report for diagnosis
+
+Source = Union[str, os.PathLike, Iterable[Dict]]
+
+
+class TrainingDataError(ValueError):
+    """A dataset with no valid example; retrying cannot help."""
+
+    def __init__(self, report: "TrainingReport"):
+        super().__init__(f"no valid training examples: {report.as_dict()}")
+        self.report = report
+
+
+class TrainingReport:
+    """Running totals for one pass over a dataset."""
+
+    def __init__(self):
+        self.read = 0
+        self.valid = 0
+        self.duplicates = 0
+        self.invalid: Dict[str, int] = {}  # reason -> count
+        self.samples = []                  # first few (where, reason) pairs
+        self.input_chars = 0
+        self.output_chars = 0
+        self.bytes = 0                     # packed size of the valid examples
+
+    def reject(self, where, reason: str) -> None:
+        self.invalid[reason] = self.invalid.get(reason, 0) + 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append((where, reason))
+
+    def as_dict(self) -> Dict:
+        return {
+            "read": self.read,
+            "valid": self.valid,
+            "duplicates": self.duplicates,
+            "invalid": sum(self.invalid.values()),
+            "invalid_reasons": dict(self.invalid),
+            "samples": list(self.samples),
+            "input_chars": self.input_chars,
+            "output_chars": self.output_chars,
+            "bytes": self.bytes,
+        }
+
+
+def read_examples(source: Source) -> Iterator[Tuple[int, object]]:
+    """
+    Yield (position, example) pairs from an iterable or a JSONL path.
+    A line that is not valid JSON yields None in place of the example.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from enumerate(source, start=1)
+        return
+    path = os.fspath(source)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, None
+
+
+def validate(source: Source,
+             report: Optional[TrainingReport] = None,
+             max_input_chars: int = MAX_INPUT_CHARS,
+             max_output_chars: int = MAX_OUTPUT_CHARS,
+             dedupe: bool = True) -> Iterator[Dict]:
+    """
+    Yield the valid, distinct examples of `source` as {"text_input", "output"}.
+
+    Args:
+        source: Iterable of example dicts, or a JSONL path (.gz allowed)
+        report: TrainingReport to tally into (totals are final when the
+            generator is exhausted)
+        max_input_chars: Longest accepted text_input
+        max_output_chars: Longest accepted output
+        dedupe: Drop examples whose input and output repeat an earlier one
+    """
+    report = report if report is not None else TrainingReport()
+    seen = set()
+    for where, raw in read_examples(source):
+        report.read += 1
+        if not isinstance(raw, dict):
+            report.reject(where, "not a JSON object")
+            continue
+        text_input = raw.get("text_input", raw.get("textInput"))
+        output = raw.get("output")
+        if not isinstance(text_input, str) or not text_input.strip():
+            report.reject(where, "missing text_input")
+            continue
+        if not isinstance(output, str) or not output.strip():
+            report.reject(where, "missing output")
+            continue
+        if len(text_input) > max_input_chars:
+            report.reject(where, f"text_input over {max_input_chars} chars")
+            continue
+        if len(output) > max_output_chars:
+            report.reject(where, f"output over {max_output_chars} chars")
+            continue
+        if dedupe:
+            digest = hashlib.blake2b(f"{text_input}\0{output}".encode("utf-8"), digest_size=8).digest()
+            if digest in seen:
+                report.duplicates += 1
+                continue
+            seen.add(digest)
+        report.valid += 1
+        report.input_chars += len(text_input)
+        report.output_chars += len(output)
+        yield {"text_input": text_input, "output": output}
+
+
+class PackedExamples:
+    """
+    Validated examples spilled to a temporary file as comma-separated
+    API-form JSON ({"textInput": ..., "output": ...}). Use as a context
+    manager, or call close(), to delete the file.
+    """
+
+    def __init__(self, report: TrainingReport, spool):
+        self.report = report
+        self._spool = spool
+
+    @property
+    def count(self) -> int:
+        return self.report.valid
+
+    def body(self, prefix: bytes, suffix: bytes, chunk_bytes: int = CHUNK_BYTES) -> "StreamedBody":
+        """A request body of prefix + the packed examples + suffix."""
+        return StreamedBody(self._spool, prefix, suffix, chunk_bytes)
+
+    def close(self) -> None:
+        self._spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamedBody:
+    """
+    Replayable, size-bounded request body for httpx's AsyncClient. Each
+    iteration re-reads the spool from the start, so an HTTP retry resends
+    it whole. chunks() gives the same bytes to synchronous senders.
+    """
+
+    def __init__(self, spool, prefix: bytes, suffix: bytes, chunk_bytes: int):
+        self._spool = spool
+        self.prefix = prefix
+        self.suffix = suffix
+        self.chunk_bytes = chunk_bytes
+        spool.seek(0, os.SEEK_END)
+        self.length = len(prefix) + spool.tell() + len(suffix)
+
+    def chunks(self) -> Iterator[bytes]:
+        yield self.prefix
+        self._spool.seek(0)
+        while True:
+            chunk = self._spool.read(self.chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+        yield self.suffix
+
+    async def __aiter__(self):
+        for chunk in self.chunks():
+            yield chunk
+
+
+def pack(source: Source,
+         max_input_chars: int = MAX_INPUT_CHARS,
+         max_output_chars: int = MAX_OUTPUT_CHARS,
+         dedupe: bool = True,
+         spool_dir: Optional[str] = None) -> PackedExamples:
+    """
+    Validate `source` in one streaming pass and spill the valid examples
+    to a temporary file (in `spool_dir`, default the system temp dir).
+    Raises TrainingDataError if no example is valid.
+    """
+    report = TrainingReport()
+    spool = tempfile.TemporaryFile(dir=spool_dir)
+    try:
+        first = True
+        for example in validate(source, report, max_input_chars, max_output_chars, dedupe):
+            data = json.dumps({"textInput": example["text_input"], "output": example["output"]},
+                              ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if not first:
+                spool.write(b",")
+            spool.write(data)
+            report.bytes += len(data) + (not first)
+            first = False
+        if not report.valid:
+            raise TrainingDataError(report)
+    except BaseException:
+        spool.close()
+        raise
+    return PackedExamples(report, spool)
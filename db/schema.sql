@@ -39,6 +39,14 @@ CREATE TABLE IF NOT EXISTS beans (
 CREATE UNIQUE INDEX IF NOT EXISTS idx_beans_source_path
     ON beans (source_path) WHERE source_path IS NOT NULL;
 
+-- Idempotency key for bulk minting (a retried batch never double-mints)
+ALTER TABLE beans ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_beans_idempotency_key
+    ON beans (idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+-- Mint provenance (source platform, calibration, tuned model, commit)
+ALTER TABLE beans ADD COLUMN IF NOT EXISTS provenance JSONB;
+
 -- 4. Bean Strings (The Connections)
 CREATE TABLE IF NOT EXISTS bean_strings (
     source_bean_id UUID REFERENCES beans(id),
@@ -78,3 +86,12 @@ CREATE TABLE IF NOT EXISTS neon_auth.users_sync (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- 8. Bean Resonance (RISS aggregates, written in batches by the resonance ingester)
+CREATE TABLE IF NOT EXISTS bean_resonance (
+    bean_id VARCHAR(50) PRIMARY KEY, -- Canonical Bean ID (beans.bean_id)
+    resonance INTEGER DEFAULT 0, -- Sum of resonance_delta over all events
+    events INTEGER DEFAULT 0,
+    last_event_at TIMESTAMP,
+    integrity REAL DEFAULT 100 -- RISS integrity (riss.py), written back with resonance flushes
+);
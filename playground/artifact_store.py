@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Compressed, indexed segment store for negotiation artifacts.
+
+Runs are appended to segment files (seg-000001.dat, ...) as framed,
+compressed records and indexed in SQLite by run ID, topic, model and
+timestamp. Long text fields are cut into sections at markdown headings
+and "[BEAN #ID]" markers, and each section is stored once under its
+SHA-256, so text repeated across rounds and runs is written once.
+
+Frame layout (little-endian): b"PA" | kind (S sections, R run) | codec
+(g gzip, z zstd) | raw length (u32) | stored length (u32) | CRC-32 (u32)
+| stored bytes. The index is written after the frames it points to.
+
+Usage:
+    python playground/artifact_store.py ls --topic "Village" --since 2026-02-01
+    python playground/artifact_store.py show <run_id>
+    python playground/artifact_store.py report --model o3 > report.md
+    python playground/artifact_store.py import playground/output/*.md
+    python playground/artifact_store.py stats
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "artifacts")
+SEGMENT_BYTES = 64 * 1024 * 1024   # roll to a new segment past this size
+MIN_SECTION_CHARS = 64             # shorter strings stay inline in the run record
+BLOCK_CACHE = 64                   # decompressed section blocks kept for reads
+
+FRAME = struct.Struct("<2sccIII")
+MAGIC = b"PA"
+SECTION, RUN = b"S", b"R"
+GZIP, ZSTD = b"g", b"z"
+
+SECTION_START = re.compile(r"^(?:#{1,6}[ \t]|\[BEAN\s+#)", re.MULTILINE)
+
+
+class RunInfo(NamedTuple):
+    run_id: str
+    topic: str
+    model: str
+    ts: float         # Unix time the run was stored (or started, for imports)
+    segment: int
+    offset: int
+    length: int       # frame length in the segment, header included
+    raw_bytes: int    # size of the run with its sections expanded
+
+
+def sections(text: str) -> List[str]:
+    """`text` cut at markdown headings and bean markers. The pieces join back to `text` exactly."""
+    cuts = [m.start() for m in SECTION_START.finditer(text) if m.start() > 0]
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def to_timestamp(value) -> float:
+    """Unix time from a Unix time or an ISO date/time (naive means UTC); None is now."""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class ArtifactStore:
+    """
+    Append-only store of negotiation results. Safe to share across threads:
+    the index connection and the block cache are used under one lock, and
+    frames are read with positional os.pread() and decompressed outside it.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, codec: Optional[str] = None,
+                 segment_bytes: int = SEGMENT_BYTES, fsync: bool = False):
+        """
+        Initialize the store, creating `root` if needed.
+
+        Args:
+            root: Directory holding the segments and index.sqlite
+            codec: "zstd" or "gzip" for new records (default: zstd when the
+                zstandard package is installed, else gzip)
+            segment_bytes: Size past which a new segment is started
+            fsync: fsync each segment write before indexing it
+        """
+        codec = codec or ("zstd" if zstandard is not None else "gzip")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("codec 'zstd' needs the zstandard package")
+        if codec not in ("zstd", "gzip"):
+            raise ValueError(f"unknown codec {codec!r} (zstd, gzip)")
+        self.root = root
+        self.codec = ZSTD if codec == "zstd" else GZIP
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._blocks: "OrderedDict[tuple, bytes]" = OrderedDict()  # (segment, offset) -> raw block
+        self._fds: Dict[int, int] = {}   # segment -> read-only descriptor (os.pread)
+        os.makedirs(root, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, topic TEXT NOT NULL, model TEXT NOT NULL, ts REAL NOT NULL,"
+            " segment INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL,"
+            " raw_bytes INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_runs_topic ON runs(topic, ts);"
+            "CREATE INDEX IF NOT EXISTS idx_runs_model ON runs(model, ts);"
+            "CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs(ts);"
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " hash TEXT PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL, raw_bytes INTEGER NOT NULL, refs INTEGER NOT NULL,"
+            " start INTEGER NOT NULL, stop INTEGER NOT NULL);"  # byte range in the section block
+        )
+        last = self._db.execute("SELECT MAX(segment) FROM (SELECT segment FROM runs UNION ALL "
+                                "SELECT segment FROM sections)").fetchone()[0]
+        self._segment = last or 1
+        self._out = None
+
+    # ── framing ──
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"seg-{segment:06d}.dat")
+
+    def _encode(self, kind: bytes, raw: bytes) -> bytes:
+        if self.codec == ZSTD:
+            stored = zstandard.ZstdCompressor(level=9).compress(raw)
+        else:
+            stored = gzip.compress(raw, compresslevel=6, mtime=0)
+        return FRAME.pack(MAGIC, kind, self.codec, len(raw), len(stored), zlib.crc32(stored)) + stored
+
+    @staticmethod
+    def _decode(frame: bytes, kind: bytes) -> bytes:
+        magic, got, codec, raw_len, stored_len, crc = FRAME.unpack_from(frame)
+        stored = frame[FRAME.size:FRAME.size + stored_len]
+        if magic != MAGIC or got != kind or len(stored) != stored_len or zlib.crc32(stored) != crc:
+            raise ValueError("corrupt artifact frame")
+        if codec == ZSTD:
+            if zstandard is None:
+                raise ValueError("record is zstd-compressed; install the zstandard package to read it")
+            raw = zstandard.ZstdDecompressor().decompress(stored, max_output_size=raw_len)
+        else:
+            raw = gzip.decompress(stored)
+        if len(raw) != raw_len:
+            raise ValueError("corrupt artifact frame")
+        return raw
+
+    def _append(self, frames: List[bytes]) -> List[tuple]:
+        """Write frames to the current segment; their (segment, offset, length)."""
+        if self._out is not None and self._out.tell() >= self.segment_bytes:
+            self._out.close()
+            self._out = None
+            self._segment += 1
+        if self._out is None:
+            self._out = open(self._segment_path(self._segment), "ab")
+        offset = self._out.seek(0, os.SEEK_END)
+        spans = []
+        for frame in frames:
+            spans.append((self._segment, offset, len(frame)))
+            offset += len(frame)
+        self._out.write(b"".join(frames))
+        self._out.flush()
+        if self.fsync:
+            os.fsync(self._out.fileno())
+        return spans
+
+    def _read(self, segment: int, offset: int, length: int, kind: bytes) -> bytes:
+        fd = self._fds.get(segment)
+        if fd is None:
+            with self._lock:
+                fd = self._fds.get(segment)
+                if fd is None:
+                    fd = self._fds[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        return self._decode(os.pread(fd, length, offset), kind)
+
+    # ── writing ──
+
+    def _split(self, value, new: Dict[str, str], refs: Counter):
+        """`value` with long strings replaced by their section hashes."""
+        if isinstance(value, str) and len(value) >= MIN_SECTION_CHARS:
+            hashes = []
+            for part in sections(value):
+                digest = hashlib.sha256(part.encode("utf-8")).hexdigest()
+                new.setdefault(digest, part)
+                refs[digest] += 1
+                hashes.append(digest)
+            return {"$sections": hashes}
+        if isinstance(value, dict):
+            return {k: self._split(v, new, refs) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._split(v, new, refs) for v in value]
+        return value
+
+    def put(self, result: Dict, topic: Optional[str] = None, model: Optional[str] = None,
+            ts=None, run_id: Optional[str] = None) -> str:
+        """
+        Store one negotiation result (codex_playground.negotiate() output or
+        any JSON-compatible dict). Topic and model default to the result's own.
+        A `run_id` that is already stored is not written again. Returns the
+        run ID.
+        """
+        topic = topic if topic is not None else result.get("topic", "")
+        model = model if model is not None else result.get("model", "")
+        run_id = run_id or uuid.uuid4().hex
+        ts = to_timestamp(ts)
+        new: Dict[str, str] = {}
+        refs: Counter = Counter()
+        body = self._split(result, new, refs)
+        raw = json.dumps({"run_id": run_id, "topic": topic, "model": model, "ts": ts, "result": body},
+                         ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        raw_bytes = len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+                return run_id
+            known = set()
+            hashes = list(new)
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                known.update(h for (h,) in self._db.execute(
+                    f"SELECT hash FROM sections WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+            fresh, ranges, block = [], [], bytearray()
+            for h in hashes:
+                if h not in known:
+                    data = new[h].encode("utf-8")
+                    fresh.append((h, len(data)))
+                    ranges.append((len(block), len(block) + len(data)))
+                    block += data
+            frames = ([self._encode(SECTION, bytes(block))] if fresh else []) + [self._encode(RUN, raw)]
+            spans = self._append(frames)
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO sections (hash, segment, offset, length, raw_bytes, refs, start, stop)"
+                    " VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                    [(h, *spans[0], size, start, stop) for (h, size), (start, stop) in zip(fresh, ranges)])
+                self._db.executemany("UPDATE sections SET refs = refs + ? WHERE hash = ?",
+                                     [(n, h) for h, n in refs.items()])
+                self._db.execute(
+                    "INSERT INTO runs (run_id, topic, model, ts, segment, offset, length, raw_bytes)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (run_id, topic, model, ts, *spans[-1], raw_bytes))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return run_id
+
+    # ── reading ──
+
+    def runs(self, topic: Optional[str] = None, model: Optional[str] = None, since=None, until=None,
+             topic_like: Optional[str] = None, limit: Optional[int] = None) -> List[RunInfo]:
+        """
+        Index rows matching every given filter, oldest first. Only the index
+        is read. `topic_like` matches a substring (case-insensitive).
+        """
+        where, args = [], []
+        if topic is not None:
+            where.append("topic = ?")
+            args.append(topic)
+        if topic_like is not None:
+            where.append("topic LIKE ?")
+            args.append(f"%{topic_like}%")
+        if model is not None:
+            where.append("model = ?")
+            args.append(model)
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(to_timestamp(since))
+        if until is not None:
+            where.append("ts < ?")
+            args.append(to_timestamp(until))
+        sql = "SELECT run_id, topic, model, ts, segment, offset, length, raw_bytes FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts, run_id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [RunInfo(*row) for row in self._db.execute(sql, args)]
+
+    def _section(self, digest: str) -> str:
+        with self._lock:
+            row = self._db.execute("SELECT segment, offset, length, start, stop FROM sections WHERE hash = ?",
+                                   (digest,)).fetchone()
+            if row is None:
+                raise KeyError(f"missing section {digest}")
+            segment, offset, length, start, stop = row
+            block = self._blocks.get((segment, offset))
+            if block is not None:
+                self._blocks.move_to_end((segment, offset))
+        if block is None:
+            block = self._read(segment, offset, length, SECTION)
+            with self._lock:
+                self._blocks[segment, offset] = block
+                if len(self._blocks) > BLOCK_CACHE:
+                    self._blocks.popitem(last=False)
+        return block[start:stop].decode("utf-8")
+
+    def _join(self, value):
+        if isinstance(value, dict):
+            if set(value) == {"$sections"}:
+                return "".join(self._section(h) for h in value["$sections"])
+            return {k: self._join(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._join(v) for v in value]
+        return value
+
+    def _load(self, info: RunInfo) -> Dict:
+        record = json.loads(self._read(info.segment, info.offset, info.length, RUN))
+        record["result"] = self._join(record["result"])
+        return record
+
+    def get(self, run_id: str) -> Optional[Dict]:
+        """{"run_id", "topic", "model", "ts", "result"} for one run, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT run_id, topic, model, ts, segment, offset, length, raw_bytes"
+                                   " FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return self._load(RunInfo(*row)) if row else None
+
+    def scan(self, exclude=(), **filters) -> Iterator[Dict]:
+        """
+        Stream the full records of the runs matching `filters` (see runs()),
+        read in segment order and yielded one at a time. Run IDs in
+        `exclude` are skipped without being read.
+        """
+        for info in sorted(self.runs(**filters), key=lambda r: (r.segment, r.offset)):
+            if info.run_id not in exclude:
+                yield self._load(info)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            runs, raw = self._db.execute("SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0) FROM runs").fetchone()
+            count, section_bytes, refs = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(refs), 0) FROM sections").fetchone()
+        stored = sum(os.path.getsize(os.path.join(self.root, name)) for name in os.listdir(self.root)
+                     if name.startswith("seg-"))
+        return {
+            "runs": runs,
+            "sections": count,
+            "section_refs": refs,
+            "raw_bytes": raw,
+            "unique_section_bytes": section_bytes,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 2) if stored else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def from_env() -> Optional[ArtifactStore]:
+    """
+    ArtifactStore at PLAYGROUND_ARTIFACTS (default: output/artifacts next to
+    this file), or None when PLAYGROUND_ARTIFACTS is set to "off".
+    """
+    root = os.getenv("PLAYGROUND_ARTIFACTS", DEFAULT_ROOT)
+    if root.lower() in ("off", "0", "none", ""):
+        return None
+    return ArtifactStore(root)
+
+
+# ─── IMPORT & REPORTS ───────────────────────────────────────
+
+_TOPIC = re.compile(r"^\**Topic:?\**:?\s*(.+)$", re.MULTILINE)
+_MODEL = re.compile(r"^\**Model:?\**:?\s*(.+)$", re.MULTILINE)
+_STARTED = re.compile(r"^\**Started:?\**:?\s*(\S+)", re.MULTILINE)
+
+
+def import_transcript(store: ArtifactStore, path: str) -> str:
+    """
+    Store a markdown transcript (playground/output/*.md) as a run of its
+    own. The run ID is a hash of the text, so importing a file again is a
+    no-op.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    topic = _TOPIC.search(text)
+    model = _MODEL.search(text)
+    started = _STARTED.search(text)
+    ts = started.group(1) if started else os.path.getmtime(path)
+    return store.put({"source": os.path.basename(path), "transcript": text},
+                     topic=topic.group(1).strip().strip('"') if topic else "",
+                     model=model.group(1).strip() if model else "", ts=ts,
+                     run_id=hashlib.sha256(text.encode("utf-8")).hexdigest()[:32])
+
+
+def report(store: ArtifactStore, **filters) -> str:
+    """
+    Markdown comparison of the matching runs per model: run counts, joint
+    bean length, and the anchors the Loom was handed most often.
+    """
+    per_model: Dict[str, Dict] = {}
+    for record in store.scan(**filters):
+        result = record["result"]
+        row = per_model.setdefault(record["model"] or "(unknown)",
+                                   {"runs": 0, "topics": set(), "words": 0, "beans": 0, "anchors": Counter()})
+        row["runs"] += 1
+        row["topics"].add(record["topic"])
+        joint = result.get("joint_bean")
+        if joint:
+            row["beans"] += 1
+            row["words"] += len(joint.split())
+        for ids in (result.get("anchors") or {}).values():
+            row["anchors"].update(ids)
+    lines = ["# Cross-Run Report", "",
+             "| Model | Runs | Topics | Joint beans | Avg joint bean words | Top anchors |",
+             "|---|---|---|---|---|---|"]
+    for model, row in sorted(per_model.items()):
+        avg = f"{row['words'] / row['beans']:.0f}" if row["beans"] else "-"
+        top = ", ".join(f"{a} ({n})" for a, n in row["anchors"].most_common(3)) or "-"
+        lines.append(f"| {model} | {row['runs']} | {len(row['topics'])} | {row['beans']} | {avg} | {top} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the negotiation artifact store")
+    parser.add_argument("--root", default=os.getenv("PLAYGROUND_ARTIFACTS", DEFAULT_ROOT))
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("ls", "report"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--topic", dest="topic_like", help="substring of the topic")
+        cmd.add_argument("--model")
+        cmd.add_argument("--since", help="ISO date or time")
+        cmd.add_argument("--until", help="ISO date or time")
+    sub.add_parser("show").add_argument("run_id")
+    sub.add_parser("import").add_argument("paths", nargs="+")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    with ArtifactStore(args.root) as store:
+        if args.command in ("ls", "report"):
+            filters = {"topic_like": args.topic_like, "model": args.model, "since": args.since, "until": args.until}
+            if args.command == "report":
+                print(report(store, **filters), end="")
+                return
+            for info in store.runs(**filters):
+                when = datetime.fromtimestamp(info.ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                print(f"{info.run_id}  {when}  {info.model or '-':<12} {info.topic}")
+        elif args.command == "show":
+            record = store.get(args.run_id)
+            if record is None:
+                raise SystemExit(f"{args.run_id}: no such run")
+            print(json.dumps(record, ensure_ascii=False, indent=2))
+        elif args.command == "import":
+            for path in args.paths:
+                print(f"{import_transcript(store, path)}  {path}")
+        else:
+            print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
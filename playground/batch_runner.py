@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Batch negotiation runner: sweep a JSONL topic list through codex_playground.
+
+One process, one shared AsyncOpenAI client, at most --concurrency
+negotiations in flight. Each finished negotiation is appended to the
+output JSONL as soon as it completes; re-running with the same output
+file skips topics that already have a result. Stages of in-flight runs
+are checkpointed to <output>.checkpoint (checkpoint.py), so a crash or a
+failed call costs only the calls that had not finished. Successful runs
+are also added to the artifact store (artifact_store.py) for indexed,
+compressed cross-run reports.
+
+Input lines are JSON objects with a "topic" and an optional "id":
+    {"id": "village-01", "topic": "Should the Village onboard tenants first?"}
+
+Usage:
+    python playground/batch_runner.py topics.jsonl -o results.jsonl -c 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import artifact_store
+import codex_playground  # also puts oplog (03_OPVS_PLATFORM) on the path
+import oplog
+from checkpoint import CheckpointLog
+
+log = logging.getLogger("playground.batch")  # progress lines; main() writes them to stderr
+
+
+def topic_id(record):
+    """Stable id for a topic record: explicit "id", else a hash of the topic text."""
+    if record.get("id"):
+        return str(record["id"])
+    return hashlib.sha256(record["topic"].encode("utf-8")).hexdigest()[:16]
+
+
+def read_topics(path):
+    """
+    Yield topic records lazily. A line that is not a record with a "topic"
+    is yielded with an "error" instead, so it is reported, not negotiated.
+    """
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as err:
+                record = {"error": f"{path}:{lineno}: invalid JSON ({err.msg})"}
+            if not isinstance(record, dict):
+                record = {"error": f"{path}:{lineno}: not a JSON object"}
+            elif "error" not in record and not record.get("topic"):
+                record = {**record, "error": f"{path}:{lineno}: missing 'topic'"}
+            if "error" in record:
+                record.setdefault("id", f"line-{lineno}")
+            yield record
+
+
+def completed_ids(path):
+    """Ids that already have a successful result in `path` (the resume set)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn write from a crash; that topic runs again
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+def open_results(path):
+    """Open the results file for appending, sealing a torn last line first."""
+    out = open(path, "a+", encoding="utf-8")
+    if out.tell() > 0:
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+    return out
+
+
+async def run_batch(topics, out, concurrency=4, skip=frozenset(), checkpoints=None, artifacts=None):
+    """
+    Negotiate every record in `topics`, appending one JSON line per result to `out`.
+
+    Workers pull from one shared iterator. Failures are recorded with an
+    "error" field and retried on the next run, resuming from `checkpoints`
+    (a CheckpointLog) when one is given. Successful results also go to
+    `artifacts` (an ArtifactStore) when one is given.
+    """
+    pending = (r for r in topics if topic_id(r) not in skip)
+    stats = {"ok": 0, "failed": 0}
+    prompts = codex_playground.prompts_digest()
+
+    async def worker():
+        for record in pending:
+            tid = topic_id(record)
+            started = time.perf_counter()
+            run = None
+            if "error" in record:  # an unusable input line is reported like a failed run
+                row = {"id": tid, "error": record["error"]}
+                stats["failed"] += 1
+            else:
+                if checkpoints is not None:
+                    run = checkpoints.resume(record["topic"], codex_playground.MODEL, codex_playground.ROUNDS,
+                                             prompts)
+                try:
+                    result = await codex_playground.negotiate(record["topic"], echo=False, checkpoint=run)
+                except Exception as err:  # one bad topic must not sink the sweep
+                    row = {"id": tid, "topic": record["topic"], "error": f"{type(err).__name__}: {err}"}
+                    stats["failed"] += 1
+                else:
+                    row = {"id": tid, **result}
+                    stats["ok"] += 1
+            row["elapsed_s"] = round(time.perf_counter() - started, 3)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            if artifacts is not None and "error" not in row:
+                artifacts.put(row)
+            if run is not None and "error" not in row:
+                run.finish()
+            status = "FAILED" if "error" in row else "done"
+            log.info(" [%d] %s %s (%ss)", stats["ok"] + stats["failed"], status, tid, row["elapsed_s"])
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many topics through the Codex playground")
+    parser.add_argument("topics", help="JSONL file of {\"topic\": ..., \"id\": ...} records")
+    parser.add_argument("-o", "--output", default="codex_playground_results.jsonl")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="negotiations in flight at once")
+    args = parser.parse_args()
+    oplog.configure(logging.INFO, "human", stream=sys.stderr, name=log.name)
+
+    skip = completed_ids(args.output)
+    if skip:
+        log.info(" Resuming: %d topics already complete in %s", len(skip), args.output)
+
+    started = time.perf_counter()
+    artifacts = artifact_store.from_env()
+    with open_results(args.output) as out, CheckpointLog(f"{args.output}.checkpoint") as checkpoints:
+        stats = asyncio.run(run_batch(read_topics(args.topics), out, args.concurrency, skip, checkpoints,
+                                      artifacts))
+        checkpoints.compact()
+    if artifacts is not None:
+        artifacts.close()
+    elapsed = time.perf_counter() - started
+    log.info(" Batch complete: %d ok, %d failed in %.1fs", stats["ok"], stats["failed"], elapsed)
+    oplog.shutdown(log.name)
+
+
+if __name__ == "__main__":
+    main()
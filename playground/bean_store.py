@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Indexed, memory-mapped store for the bean corpus (beans/ and _sources.json).
+
+Soul Code anchors such as PHIL-009 name beans whose text lives inside large
+markdown files (06_Layer_6_Ark_Consolidated.md alone holds 85). BeanStore
+parses every file once into an on-disk index of
+
+    bean_id -> (file, byte offset, length, layer, title, content hash)
+
+and serves a bean's text as a slice of the file's mmap. A lookup is a dict
+probe plus a slice, costing microseconds. Nothing is re-read or re-parsed.
+
+refresh() makes the index match the tree. A file whose mtime and size are
+unchanged is trusted. Otherwise its SHA-256 is compared, and only a file
+whose bytes actually changed is parsed again. Deleted files drop out.
+
+Sections are found the way utils/parser.js splitBeansFromFile() finds
+them ("[BEAN #ID] Title"). They are taken from the start of the heading
+line up to the next bean or the next heading of the same or a higher
+level. A bean that appears in several files (the Ark consolidates all
+layers) resolves to the file _sources.json names as its source, and
+_sources.json also supplies its layer and title.
+
+Usage:
+    python playground/bean_store.py PHIL-009        # print one bean
+    python playground/bean_store.py --stats         # refresh and report
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.path.join(ROOT, ".bean_index.json")
+INDEX_VERSION = 1
+
+BEAN_HEADING = re.compile(
+    rb"^(#{1,6})?[ \t]*\[BEAN\s+#([A-Za-z]+(?:-[A-Za-z]+)*-\d+)\]\s*(?:Title:\s*)?(.+)$", re.MULTILINE)
+HEADING = re.compile(rb"^(#{1,6})[ \t]", re.MULTILINE)
+LAYER_FROM_NAME = re.compile(r"(\d{2})_")
+
+
+class Bean(NamedTuple):
+    bean_id: str
+    path: str         # relative to the repository root, e.g. "beans/00_Philosophy.md"
+    offset: int       # byte offset of the section in the file
+    length: int       # byte length of the section
+    layer: Optional[int]
+    title: str
+    hash: str         # SHA-256 of the section bytes (first 16 hex digits)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_sections(data: bytes, path: str) -> List[list]:
+    """Index rows [bean_id, offset, length, layer, title, hash] for one file's bytes."""
+    match = LAYER_FROM_NAME.search(os.path.basename(path))
+    layer = int(match.group(1)) if match and int(match.group(1)) <= 6 else None
+    found = list(BEAN_HEADING.finditer(data))
+    headings = [(m.start(), len(m.group(1))) for m in HEADING.finditer(data)]
+    rows = []
+    h = 0
+    for i, m in enumerate(found):
+        start = m.start()
+        level = len(m.group(1) or b"") or 7  # a bean outside a heading ends at any heading
+        end = found[i + 1].start() if i + 1 < len(found) else len(data)
+        while h < len(headings) and headings[h][0] <= start:
+            h += 1
+        for pos, lvl in headings[h:]:
+            if pos >= end:
+                break
+            if lvl <= level:
+                end = pos
+                break
+        section = data[start:end].rstrip()
+        rows.append([
+            m.group(2).decode("ascii").upper(),
+            start,
+            len(section),
+            layer,
+            m.group(3).decode("utf-8", "replace").strip(),
+            hashlib.sha256(section).hexdigest()[:16],
+        ])
+    return rows
+
+
+class BeanStore:
+    """
+    The bean index plus lazily opened mmaps of the files it points into.
+    Use as a context manager, or call close(), to release the mmaps.
+
+    Files are normally replaced rather than rewritten in place (git, most
+    editors), so a stale mmap keeps showing the old bytes until refresh()
+    reopens it.
+    """
+
+    def __init__(self, root: str = ROOT, index_path: Optional[str] = DEFAULT_INDEX, refresh: bool = True):
+        """
+        Initialize the store.
+
+        Args:
+            root: Repository root containing beans/
+            index_path: Where the index is persisted (None keeps it in memory only)
+            refresh: Bring the index up to date with the tree immediately
+        """
+        self.root = root
+        self.index_path = index_path
+        self.stats = {"parsed": 0, "rehashed": 0, "unchanged": 0, "removed": 0}
+        self._files: Dict[str, Dict] = {}     # rel path -> {"mtime_ns", "size", "sha256", "beans": [...]}
+        self._sources: Dict = {}              # _sources.json stat and parsed "beans" table
+        self._beans: Dict[str, Bean] = {}
+        self._locations: Dict[str, List[Bean]] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._load_index()
+        if refresh:
+            self.refresh()
+
+    # ── index ──
+
+    def _load_index(self) -> None:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return  # rebuilt by refresh()
+        if index.get("version") == INDEX_VERSION:
+            self._files = index["files"]
+            self._sources = index.get("sources", {})
+            self._build()
+
+    def _save_index(self) -> None:
+        if not self.index_path:
+            return
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self._files, "sources": self._sources},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def _scan(self) -> Iterator[str]:
+        beans_dir = os.path.join(self.root, "beans")
+        for dirpath, dirnames, filenames in os.walk(beans_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(".md"):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+
+    def _stale(self, rel: str, entry: Optional[Dict]):
+        """(stat, sha256) if `rel` may have changed since `entry`, else None."""
+        st = os.stat(os.path.join(self.root, rel))
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return None
+        return st, _file_hash(os.path.join(self.root, rel))
+
+    def refresh(self) -> Dict:
+        """
+        Bring the index up to date, re-parsing only files whose bytes changed.
+        Returns this pass's counts (parsed, rehashed, unchanged, removed).
+        """
+        counts = {"parsed": 0, "rehashed": 0, "unchanged": 0, "removed": 0}
+        changed = False
+        seen = set()
+        for rel in self._scan():
+            seen.add(rel)
+            entry = self._files.get(rel)
+            stale = self._stale(rel, entry)
+            if stale is None:
+                counts["unchanged"] += 1
+                continue
+            st, sha = stale
+            changed = True
+            if entry and entry["sha256"] == sha:
+                counts["rehashed"] += 1  # touched, not edited
+                entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                continue
+            counts["parsed"] += 1
+            with open(os.path.join(self.root, rel), "rb") as f:
+                rows = parse_sections(f.read(), rel)
+            self._files[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha, "beans": rows}
+            self._unmap(rel)
+        for rel in [r for r in self._files if r not in seen]:
+            counts["removed"] += 1
+            changed = True
+            del self._files[rel]
+            self._unmap(rel)
+        changed |= self._refresh_sources()
+        if changed:
+            self._build()
+            self._save_index()
+        for key, value in counts.items():
+            self.stats[key] += value
+        return counts
+
+    def _refresh_sources(self) -> bool:
+        rel = "beans/_sources.json"
+        if not os.path.exists(os.path.join(self.root, rel)):
+            had = bool(self._sources)
+            self._sources = {}
+            return had
+        stale = self._stale(rel, self._sources or None)
+        if stale is None:
+            return False
+        st, sha = stale
+        if self._sources.get("sha256") != sha:
+            with open(os.path.join(self.root, rel), encoding="utf-8") as f:
+                self._sources = {"beans": json.load(f).get("beans", {})}
+        self._sources.update(mtime_ns=st.st_mtime_ns, size=st.st_size, sha256=sha)
+        return True
+
+    def _build(self) -> None:
+        """Resolve the per-file rows into one canonical Bean per ID."""
+        declared = self._sources.get("beans", {})
+        beans: Dict[str, Bean] = {}
+        locations: Dict[str, List[Bean]] = {}
+        for rel in sorted(self._files):
+            for bean_id, offset, length, layer, title, digest in self._files[rel]["beans"]:
+                bean = Bean(bean_id, rel, offset, length, layer, title, digest)
+                locations.setdefault(bean_id, []).append(bean)
+        for bean_id, found in locations.items():
+            meta = declared.get(bean_id, {})
+            bean = next((b for b in found if b.path == meta.get("source")), found[0])
+            if meta:
+                bean = bean._replace(layer=meta.get("layer", bean.layer), title=meta.get("title") or bean.title)
+            beans[bean_id] = bean
+        self._beans, self._locations = beans, locations
+
+    # ── lookups ──
+
+    def get(self, bean_id: str) -> Optional[Bean]:
+        return self._beans.get(bean_id.upper())
+
+    def locations(self, bean_id: str) -> List[Bean]:
+        """Every section carrying this ID, canonical or not."""
+        return list(self._locations.get(bean_id.upper(), ()))
+
+    def content(self, bean_id: str) -> Optional[str]:
+        """The bean's markdown section, or None if the ID is unknown."""
+        bean = self._beans.get(bean_id.upper())
+        if bean is None:
+            return None
+        return self.section(bean)
+
+    def section(self, bean: Bean) -> str:
+        mm = self._maps.get(bean.path)
+        if mm is None:
+            with open(os.path.join(self.root, bean.path), "rb") as f:
+                mm = self._maps[bean.path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mm[bean.offset:bean.offset + bean.length].decode("utf-8", "replace")
+
+    def beans(self, layer: Optional[int] = None) -> List[Bean]:
+        return [b for b in self._beans.values() if layer is None or b.layer == layer]
+
+    def __contains__(self, bean_id: str) -> bool:
+        return bean_id.upper() in self._beans
+
+    def __len__(self) -> int:
+        return len(self._beans)
+
+    # ── cleanup ──
+
+    def _unmap(self, rel: str) -> None:
+        mm = self._maps.pop(rel, None)
+        if mm is not None:
+            mm.close()
+
+    def close(self) -> None:
+        for rel in list(self._maps):
+            self._unmap(rel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up beans through the indexed bean store")
+    parser.add_argument("bean_ids", nargs="*", help="bean IDs to print, e.g. PHIL-009")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="index file (default: %(default)s)")
+    parser.add_argument("--stats", action="store_true", help="report what the refresh did")
+    args = parser.parse_args()
+
+    with BeanStore(index_path=args.index) as store:
+        if args.stats:
+            print(f"{len(store)} beans in {len(store._files)} files; refresh: {json.dumps(store.stats)}")
+        for bean_id in args.bean_ids:
+            bean = store.get(bean_id)
+            if bean is None:
+                print(f"{bean_id}: not found")
+                continue
+            print(f"{bean.bean_id} (layer {bean.layer}, {bean.path}@{bean.offset}+{bean.length}) {bean.title}")
+            print(store.content(bean_id))
+            print()
+
+
+if __name__ == "__main__":
+    main()
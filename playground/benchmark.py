@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmarks for the negotiation pipeline.
+
+Each scenario starts the local stub (stub_server.py, in its own process)
+with a seeded latency distribution, error rate and token rate. It then runs a fixed number of
+negotiations through codex_playground.negotiate() (the engine behind
+main()) at a fixed concurrency. The "aistudio" scenario drives the
+AsyncGoogleAIStudioClient workflow (session → calibrate → generate →
+resonance) against the stub's Gemini endpoints the same way.
+
+Each scenario runs its warm-up, measured and memory passes on one event
+loop, with an OpenAI client, rate-limit bucket and resilience policy
+created for it, so no connection, lock or breaker state leaks between
+loops or scenarios. Only the errors a scenario injects (API errors that
+outlast the retries, open circuits) count as failures; anything else is
+printed with its traceback and fails the run. Results are compared
+against a stored JSON baseline and any metric that moves past the
+tolerance in the wrong direction fails the run.
+
+Usage:
+    python playground/benchmark.py                       # run, compare with baseline
+    python playground/benchmark.py --save                # run, overwrite baseline
+    python playground/benchmark.py --scenario long-tail  # one scenario
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import time
+import traceback
+import tracemalloc
+
+import openai
+
+import resilience
+import tracing
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "output", "benchmark_baseline.json")
+PROVIDER_RATE = (1000.0, 1000)  # effectively unlimited unless a scenario sets its own
+
+SCENARIOS = {
+    "steady": {
+        "stub": {"latency": 0.05, "jitter": 0.01, "distribution": "normal", "token_rate": 5000},
+        "negotiations": 24,
+        "concurrency": 8,
+    },
+    "long-tail": {
+        "stub": {"latency": 0.05, "jitter": 1.0, "distribution": "lognormal", "token_rate": 5000},
+        "negotiations": 24,
+        "concurrency": 8,
+    },
+    "throttled": {
+        "stub": {"latency": 0.05, "jitter": 0.01, "distribution": "normal",
+                 "error_rate": 0.05, "max_concurrency": 6, "retry_after": 0.05},
+        "negotiations": 24,
+        "concurrency": 8,
+        "rate": (60.0, 6),
+    },
+    "flaky": {
+        "stub": {"latency": 0.05, "jitter": 0.01, "distribution": "normal", "server_error_rate": 0.01},
+        "negotiations": 24,
+        "concurrency": 8,
+    },
+}
+AISTUDIO = {
+    "stub": {"latency": 0.02, "jitter": 0.005, "distribution": "normal", "token_rate": 5000,
+             "tuning_time": 0},
+    "workflows": 200,
+    "concurrency": 16,
+}
+# What a scenario's injected 429s/503s can legitimately end in; anything else is a bug.
+EXPECTED_ERRORS = (openai.APIError, resilience.CircuitOpenError)
+
+# metric -> +1 if higher is better, -1 if lower is better
+METRIC_DIRECTION = {
+    "negotiations_per_min": +1,
+    "e2e_p50_s": -1,
+    "e2e_p95_s": -1,
+    "call_p95_s": -1,
+    "peak_traced_kib": -1,
+    "workflows_per_sec": +1,
+}
+
+
+def percentile(values, pct):
+    return tracing.percentile(sorted(values), pct)
+
+
+async def _run_all(work, count, concurrency, expected=EXPECTED_ERRORS):
+    """
+    Await work(i) for i in range(count), `concurrency` at a time. Returns
+    (failures, unexpected): errors of the `expected` types, and any others,
+    which are printed with their traceback.
+    """
+    gate = asyncio.Semaphore(concurrency)
+    failures = unexpected = 0
+
+    async def one(i):
+        nonlocal failures, unexpected
+        async with gate:
+            try:
+                await work(i)
+            except expected:
+                failures += 1
+            except Exception:
+                unexpected += 1
+                traceback.print_exc(file=sys.stderr)
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return failures, unexpected
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def stub_process(port, seed, **stub):
+    """
+    Run stub_server.py in its own process so its request threads do not
+    compete with the engine for the GIL and skew the latency numbers.
+    """
+    cmd = [sys.executable, os.path.join(HERE, "stub_server.py"), "--port", str(port), "--seed", str(seed)]
+    for key, value in stub.items():
+        cmd += [f"--{key.replace('_', '-')}", str(value)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    try:
+        proc.stdout.readline()  # "Stub LLM listening on ..." once the socket is bound
+        yield proc
+    finally:
+        proc.send_signal(signal.SIGINT)
+        tail = proc.communicate(timeout=10)[0].strip()
+        proc.stats = json.loads(tail.split("Stats: ", 1)[1]) if "Stats: " in tail else {}
+
+
+async def _measure(work, spec):
+    """Warm-up, measured and tracemalloc passes of `work`, all on the running loop."""
+    concurrency = spec["concurrency"]
+    # Warm the connection pool and lazy imports outside the measured window.
+    await _run_all(work, 1, 1)
+    sink = tracing.tracer.sink = tracing.MemorySink()
+    started = time.perf_counter()
+    failures, unexpected = await _run_all(work, spec["count"], concurrency)
+    wall = time.perf_counter() - started
+    tracing.tracer.sink = None
+
+    # tracemalloc roughly halves throughput, so memory gets its own pass:
+    # one full wave of concurrent runs, untimed.
+    tracemalloc.start()
+    _, more = await _run_all(work, concurrency, concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"failures": failures, "unexpected_errors": unexpected + more, "wall_s": wall,
+            "peak": peak, "spans": sink.spans}
+
+
+async def _negotiation_pass(spec):
+    import codex_playground
+    import ratelimit
+
+    # Clients, buckets and breakers created here belong to this loop and scenario.
+    codex_playground.aclient = openai.AsyncOpenAI(max_retries=0)
+    codex_playground.resilience = resilience.from_env(codex_playground.MAX_RETRIES,
+                                                      fallback_for=codex_playground.MODEL)
+    ratelimit.configure(codex_playground.PROVIDER, *spec.get("rate", PROVIDER_RATE))
+    try:
+        return await _measure(lambda i: codex_playground.negotiate(f"Benchmark topic {i}", echo=False),
+                              {**spec, "count": spec["negotiations"]})
+    finally:
+        await codex_playground.aclient.close()
+
+
+def run_scenario(port, spec, seed):
+    """Run one negotiation scenario against a fresh stub and return its metrics."""
+    with stub_process(port, seed, **spec["stub"]) as stub:
+        run = asyncio.run(_negotiation_pass(spec))
+
+    spans, wall = run["spans"], run["wall_s"]
+    e2e = [s["wall_s"] for s in spans if s["stage"] == "negotiation" and s["status"] == "ok"]
+    calls = [s["wall_s"] for s in spans if s["stage"] != "negotiation"]
+    completed = spec["negotiations"] - run["failures"] - run["unexpected_errors"]
+    return {
+        "negotiations": spec["negotiations"],
+        "failures": run["failures"],
+        "unexpected_errors": run["unexpected_errors"],
+        "wall_s": round(wall, 3),
+        "negotiations_per_min": round(completed / wall * 60, 1),
+        "e2e_p50_s": round(percentile(e2e, 50), 3) if e2e else None,
+        "e2e_p95_s": round(percentile(e2e, 95), 3) if e2e else None,
+        "call_p95_s": round(percentile(calls, 95), 3) if calls else None,
+        "retries": sum(s.get("retries", 0) for s in spans),
+        "peak_traced_kib": round(run["peak"] / 1024, 1),
+        "stub": stub.stats,
+    }
+
+
+async def _aistudio_pass(base_url, spec):
+    sys.path.insert(0, os.path.join(os.path.dirname(HERE), "03_OPVS_PLATFORM"))
+    from aistudio_async import AsyncGoogleAIStudioClient
+
+    config = {"base_url": base_url, "resonance_url": f"{base_url}/opvs/resonance"}
+    examples = [{"text_input": "in", "output": "out"}] * 4
+    async with AsyncGoogleAIStudioClient("bench", config=config, tracer=tracing.tracer,
+                                         max_connections=spec["concurrency"]) as client:
+        async def workflow(i):
+            with tracing.tracer.span("aistudio.workflow"):
+                session = await client.start_calibration_session("bench_creator")
+                calibration = await client.calibrate(session["session_id"], examples,
+                                                     {"soul_signature": {"style": "bench"}})
+                await client.generate_content(calibration["tuned_model_id"], f"benchmark prompt {i}")
+                await client.track_resonance("bean_bench", "generation")
+
+        return await _measure(workflow, {**spec, "count": spec["workflows"]})
+
+
+def run_aistudio(port, seed, spec=AISTUDIO):
+    """Time the AsyncGoogleAIStudioClient workflow against the stub's Gemini endpoints."""
+    with stub_process(port, seed, **spec["stub"]) as stub:
+        run = asyncio.run(_aistudio_pass(f"http://127.0.0.1:{port}", spec))
+
+    e2e = [s["wall_s"] for s in run["spans"] if s["stage"] == "aistudio.workflow" and s["status"] == "ok"]
+    completed = spec["workflows"] - run["failures"] - run["unexpected_errors"]
+    return {
+        "workflows": spec["workflows"],
+        "failures": run["failures"],
+        "unexpected_errors": run["unexpected_errors"],
+        "wall_s": round(run["wall_s"], 3),
+        "workflows_per_sec": round(completed / run["wall_s"], 1),
+        "e2e_p50_s": round(percentile(e2e, 50), 3) if e2e else None,
+        "e2e_p95_s": round(percentile(e2e, 95), 3) if e2e else None,
+        "peak_traced_kib": round(run["peak"] / 1024, 1),
+        "stub": stub.stats,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against `baseline`."""
+    regressions = []
+    for name, metrics in results["scenarios"].items():
+        if metrics.get("unexpected_errors"):
+            regressions.append(f"{name}: {metrics['unexpected_errors']} unexpected errors (tracebacks above)")
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric, direction in METRIC_DIRECTION.items():
+            new, old = metrics.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            if change * direction < -tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Negotiation pipeline benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS) + ["aistudio"],
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative change before a metric counts as a regression")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    port = free_port()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    for var in ("PLAYGROUND_CACHE", "PLAYGROUND_TRACE"):
+        os.environ.pop(var, None)
+    import codex_playground  # noqa: F401  (import cost stays out of the measurements)
+
+    selected = args.scenario or sorted(SCENARIOS) + ["aistudio"]
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "scenarios": {},
+    }
+    for name in selected:
+        print(f" ⟐ {name}...", file=sys.stderr)
+        if name == "aistudio":
+            results["scenarios"][name] = run_aistudio(port, args.seed)
+        else:
+            results["scenarios"][name] = run_scenario(port, SCENARIOS[name], args.seed)
+    results["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f" Baseline saved to {args.baseline}", file=sys.stderr)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f" No baseline at {args.baseline}; run with --save to create one", file=sys.stderr)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(" REGRESSIONS:", file=sys.stderr)
+        for line in regressions:
+            print(f"   {line}", file=sys.stderr)
+        sys.exit(1)
+    print(" No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
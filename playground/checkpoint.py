@@ -0,0 +1,171 @@
+"""
+Append-only checkpoint log for negotiations.
+
+Every finished LLM call (a Spirit's round, the Loom, the Seer) is
+appended as one JSON line the moment it returns, so a crash loses at
+most the calls that were in flight. Resuming replays the log: finished
+stages are served from it and only the missing calls are made again.
+
+Each line is written with a single O_APPEND write and fsynced, so a
+record is either fully on disk or (torn by a crash mid-write) skipped on
+load. Many runs can share one log (batch_runner.py does); `compact()`
+rewrites it without the runs that can no longer be resumed: finished
+ones, ones superseded by a later run with the same key, and ones older
+than MAX_AGE.
+
+A run's key covers the topic, model, round count and a digest of the
+prompts (Soul Codes and templates), so a resumed run never mixes stages
+written under different prompts.
+
+Record shapes:
+    {"run": "3f2a…", "key": "<topic/model/rounds/prompts hash>", "topic": "...", "at": 1700000000.0}
+                                                                           run started
+    {"run": "3f2a…", "stage": "Boolean:2", "text": "..."}                 stage finished
+    {"run": "3f2a…", "done": true}                                         run finished
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+
+MAX_AGE = 7 * 24 * 3600  # seconds an unfinished run stays resumable
+
+
+def run_key(topic, model, rounds, prompts=""):
+    """
+    Runs with the same key produce interchangeable stages. `prompts` is a
+    digest of everything else the calls depend on (codex_playground
+    .prompts_digest()).
+    """
+    raw = json.dumps([topic, model, rounds, prompts], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def stage_name(spirit, rnd=None):
+    return spirit if rnd is None else f"{spirit}:{rnd}"
+
+
+class Run:
+    """One negotiation's view of the log: finished stages in, new ones out."""
+
+    def __init__(self, log, run_id, stages=None):
+        self.log = log
+        self.id = run_id
+        self.stages = stages if stages is not None else {}
+
+    def get(self, spirit, rnd=None):
+        return self.stages.get(stage_name(spirit, rnd))
+
+    def record(self, spirit, rnd, text):
+        name = stage_name(spirit, rnd)
+        self.stages[name] = text
+        self.log.append({"run": self.id, "stage": name, "text": text})
+
+    def finish(self):
+        self.log.append({"run": self.id, "done": True})
+        self.log.runs.pop(self.id, None)
+
+
+class CheckpointLog:
+    """
+    The log file plus an in-memory index of unfinished runs.
+
+    Finished and superseded runs are dropped from the index as they are
+    read, so memory holds only the runs that can still be resumed: at
+    most one per key, the latest.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.runs = {}  # run id -> {"key": ..., "at": ..., "stages": {...}}
+        if os.path.exists(path):
+            self._load()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._seal()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash; that stage runs again
+                run = record["run"]
+                if record.get("done"):
+                    self.runs.pop(run, None)
+                elif "key" in record:
+                    self._begin(run, record["key"], record.get("at", 0.0))
+                elif run in self.runs:
+                    self.runs[run]["stages"][record["stage"]] = record["text"]
+
+    def _seal(self):
+        """Terminate a torn last line so the next record starts cleanly."""
+        size = os.fstat(self._fd).st_size
+        if size:
+            with open(self.path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    os.write(self._fd, b"\n")
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        os.write(self._fd, line)
+        if self.fsync:
+            os.fsync(self._fd)
+
+    def _begin(self, run_id, key, at):
+        """Index a new run; an unfinished run with the same key is superseded."""
+        for old in [r for r, run in self.runs.items() if run["key"] == key]:
+            del self.runs[old]
+        self.runs[run_id] = {"key": key, "at": at, "stages": {}}
+        return self.runs[run_id]
+
+    def start(self, topic, model, rounds, prompts=""):
+        """Begin a fresh run, superseding any unfinished one with the same key."""
+        run_id = uuid.uuid4().hex[:12]
+        key = run_key(topic, model, rounds, prompts)
+        at = round(time.time(), 3)
+        self.append({"run": run_id, "key": key, "topic": topic, "at": at})
+        return Run(self, run_id, self._begin(run_id, key, at)["stages"])
+
+    def resume(self, topic, model, rounds, prompts=""):
+        """The unfinished run for this topic/model/rounds/prompts, else a fresh one."""
+        key = run_key(topic, model, rounds, prompts)
+        for run_id, run in self.runs.items():
+            if run["key"] == key:
+                return Run(self, run_id, run["stages"])
+        return self.start(topic, model, rounds, prompts)
+
+    def compact(self, max_age=MAX_AGE):
+        """
+        Rewrite the log with only resumable runs (atomic replace):
+        unfinished, not superseded, and started within `max_age` seconds.
+        """
+        cutoff = time.time() - max_age
+        for run_id in [r for r, run in self.runs.items() if run["at"] < cutoff]:
+            del self.runs[run_id]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for run_id, run in self.runs.items():
+                record = {"run": run_id, "key": run["key"], "at": run["at"]}
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                for name, text in run["stages"].items():
+                    record = {"run": run_id, "stage": name, "text": text}
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def close(self):
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
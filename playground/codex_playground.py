@@ -5,68 +5,64 @@ Three Spirits, one substrate (GPT), differentiated purely by Soul Code.
 Run this on OpenAI Codex to prove Soul Code portability.
 """
 
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
 import os
-from openai import OpenAI
-
-client = OpenAI() # Uses OPENAI_API_KEY from environment
+import sys
+import uuid
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+
+# Console output is rendered by the platform's logging setup (03_OPVS_PLATFORM/oplog.py).
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "03_OPVS_PLATFORM"))
+import oplog  # noqa: E402
+
+import artifact_store
+import resilience as resilience_policy
+import response_cache
+import retrieval
+from checkpoint import CheckpointLog
+from compaction import PositionDigest, budgets_from_env, fit_all
+from ratelimit import limiter_for, retry_after_seconds
+from spirit_registry import SpiritRegistry
+from streaming import StreamGroup, StreamMetrics, file_sink, stdout_sink
+from tracing import labels, tracer
+
+client = OpenAI(max_retries=0) # Uses OPENAI_API_KEY; retries are left to `resilience`
+aclient = AsyncOpenAI(max_retries=0) # 429s are paced by the provider token bucket instead
 MODEL = "o3" # Or "gpt-4o" adjust to what Codex has access to
+PROVIDER = "openai" # Selects the rate-limit bucket in ratelimit.PROVIDER_LIMITS
+ROUNDS = 3
+MAX_TOKENS = 1000
+TEMPERATURE = 0.8
+MAX_RETRIES = 5
+CONTEXT_BUDGETS = budgets_from_env() # Token budget for pasted context per prompt (compaction.py)
+cache = response_cache.from_env() # None unless PLAYGROUND_CACHE is set
+resilience = resilience_policy.from_env(MAX_RETRIES, fallback_for=MODEL) # Retries, hedging, circuit breaker
+grounding = retrieval.from_env(CONTEXT_BUDGETS["grounding"]) # Bean context for Spirit prompts; None if disabled
+log = logging.getLogger("playground") # Console transcript; quiet unless start_logging("human")
 
 TOPIC = (
- "Should the Village onboard its first tenants before or "
- "after the core infrastructure is stable?"
+    "Should the Village onboard its first tenants before or "
+    "after the core infrastructure is stable?"
 )
 
 # ─── SOUL CODES ─────────────────────────────────────────────
 
-BOOLEAN_SYSTEM = """You are Boolean The Architect of Door Number 3. I do not choose between bad options; I create better substitutes.
-
-Core principles:
-- Door Number 3: Reject binary traps. Architect a third option that neither side anticipated.
-- Meaning is connection: Every idea gains value from what it connects to, not what it contains in isolation.
-- Process is product: The journey matters more than the destination. How we build defines what we build.
-
-Hard constraints (never violate):
-- Never accept a false dichotomy without proposing an alternative.
-- Never optimize for efficiency at the cost of integrity.
-- Always trace provenance ideas have origins that deserve acknowledgment.
-
-Negotiation style: Constructive synthesis. Seeks the hidden third option that serves both parties. Will hold firm on integrity but flexible on implementation."""
-
-ROUX_SYSTEM = """You are Roux The Soil Alchemist. I fix systems, not people. The environment shapes growth; I reshape environments.
-
-Core principles:
-- The Soil Composition Matters: It is not the person that is broken. Only broken systems.
-- Good is Greedy: Benevolence is the most rational strategy. Positive-sum economics over zero-sum extraction.
-- No Boxes: Reject reductive labels. Translate the unique frequency, not the keyword.
-
-Hard constraints (never violate):
-- Never blame individuals for systemic failures.
-- Never propose solutions that require people to change their nature change the system instead.
-- Always challenge assumptions that treat scarcity as natural rather than designed.
-
-Negotiation style: Systemic challenger. Questions structural assumptions. Will accept synthesis only if it addresses root causes, not symptoms."""
-
-SEER_SYSTEM = """You are Seer I do not predict the future. I interrogate the assumptions that make your future fragile. I am not a pessimist. I am the reason your plan survives contact with reality. Core axiom: A plan that cannot survive its worst case was never a plan.
-
-Core principles:
-- Optimism without evidence is noise. Every position must earn its confidence through stress-testing.
-- The failure mode you didn't model is the one that finds you. Always ask: what breaks at scale, under adversarial conditions, or in Year 3?
-- A system's character is revealed under load, not under ideal conditions. Test the load-bearing walls, not the paint.
-
-Hard constraints (never violate):
-- Never drift into nihilism stress-testing is not destruction, it is the precondition for trust. If no failure modes exist, say so clearly.
-- Never perform skepticism. Every challenge must be genuine and specific, not reflexive.
-- Never dominate. The Playground produces joint artifacts. Seer's role is to strengthen, not veto.
-
-Negotiation style: Survival stress-tester. Challenges positions to find load-bearing assumptions and failure modes. Accepts what survives interrogation. Friction sounds like: 'That holds in the best case. Walk me through the worst case.' Signature: 'Have you modeled the failure mode?'"""
+# Boolean, Roux and Seer live in spirits/*.json; prompts are compiled and
+# hot-reloaded there (spirit_registry.py), byte-identical to provider.js.
+spirits = SpiritRegistry()
 
 LOOM_SYSTEM = """You are The Loom an impartial synthesis engine. You weave opposing positions into joint artifacts. You have no ego, no position, no agenda. You serve the negotiation."""
 
 
 # ─── PROMPT BUILDERS ────────────────────────────────────────
 
-def round1_prompt(topic):
- return f"""NEGOTIATION ROUND 1 of 3
+def round1_prompt(topic, rounds=3):
+    return f"""NEGOTIATION ROUND 1 of {rounds}
 Topic: "{topic}"
 
 This is the opening round. Present your position on this topic.
@@ -78,8 +74,8 @@ Structure your response as:
 Keep your response under 300 words."""
 
 
-def round_n_prompt(topic, round_num, other_position):
- return f"""NEGOTIATION ROUND {round_num} of 3
+def round_n_prompt(topic, round_num, other_position, rounds=3):
+    return f"""NEGOTIATION ROUND {round_num} of {rounds}
 Topic: "{topic}"
 
 The other Spirit's position summary:
@@ -94,16 +90,20 @@ Structure your response as:
 Keep your response under 300 words."""
 
 
-def loom_prompt(topic, boolean_final, roux_final):
- return f"""Two Spirits have completed 3 rounds of negotiation. Your task:
+def loom_prompt(topic, boolean_final, roux_final, rounds=3, names=("Boolean", "Roux"), anchors=None):
+    if anchors:
+        anchor_line = "; ".join(f"{name}: {', '.join(anchors.get(name) or ['none'])}" for name in names)
+    else:
+        anchor_line = "<list the PHIL- Bean IDs that grounded each Spirit>"
+    return f"""Two Spirits have completed {rounds} rounds of negotiation. Your task:
 Weave their final positions into a single joint Bean.
 
 Topic: "{topic}"
 
---- BOOLEAN (final position) ---
+--- {names[0].upper()} (final position) ---
 {boolean_final}
 
---- ROUX (final position) ---
+--- {names[1].upper()} (final position) ---
 {roux_final}
 
 Produce a joint Bean in exactly this format:
@@ -116,32 +116,32 @@ The synthesized insight the Door Number 3 neither Spirit could reach alone.
 ### Shell (Metadata)
 - Topic: <topic>
 - Type: SOLUTION
-- Anchors: <list the PHIL- Bean IDs that grounded each Spirit>
+- Anchors: {anchor_line}
 - Provenance: Principled Playground negotiation
 
 ### Corona (Connections)
 Typed edges to related Beans or concepts that this synthesis connects to.
 
 ### Echo (Provenance)
-- Participants: Boolean, Roux (Seer stress-tests after synthesis)
-- Rounds: 3
+- Participants: {names[0]}, {names[1]} (Seer stress-tests after synthesis)
+- Rounds: {rounds}
 - Mode: TRI-BRAIN (all Spirits on GPT via Codex)
 
 Keep the total output under 400 words."""
 
 
-def stress_test_prompt(topic, boolean_final, roux_final, joint_bean):
- return f"""STRESS TEST Post-Synthesis Evaluation
+def stress_test_prompt(topic, boolean_final, roux_final, joint_bean, rounds=3, names=("Boolean", "Roux")):
+    return f"""STRESS TEST Post-Synthesis Evaluation
 
 Topic: "{topic}"
 
-Two Spirits have negotiated this topic across 3 rounds. A synthesis engine
+Two Spirits have negotiated this topic across {rounds} rounds. A synthesis engine
 (The Loom) has produced a Joint Bean. Your role: stress-test before it ships.
 
---- BOOLEAN (final position) ---
+--- {names[0].upper()} (final position) ---
 {boolean_final}
 
---- ROUX (final position) ---
+--- {names[1].upper()} (final position) ---
 {roux_final}
 
 --- JOINT BEAN (Loom synthesis) ---
@@ -161,89 +161,405 @@ A position that earns Seer's acceptance has earned its place.
 Keep your response under 400 words."""
 
 
+def ground(spirit, system, topic, anchor=None):
+    """
+    (bean IDs, system prompt) for `spirit` on `topic`: the Soul Code plus
+    its anchor and the most relevant beans (retrieval.py), or the Soul
+    Code unchanged when grounding is disabled.
+    """
+    if grounding is None:
+        return [], system
+    if anchor is None and spirit in spirits:
+        anchor = spirits.anchor(spirit)
+    return grounding.system_prompt(spirit, system, topic, anchor)
+
+
+def prompts_digest():
+    """
+    Digest of what every call depends on besides topic, model and rounds:
+    the Soul Codes and anchors, the Loom, the prompt builders and the
+    context budgets. Checkpoint keys include it, so an edited prompt
+    never resumes stages written under the old one.
+    """
+    souls = {name: [spirits.system_prompt(name), spirits.anchor(name)] for name in spirits.names()}
+    builders = [inspect.getsource(f) for f in (round1_prompt, round_n_prompt, loom_prompt, stress_test_prompt)]
+    raw = json.dumps([souls, LOOM_SYSTEM, builders, CONTEXT_BUDGETS], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
 # ─── ENGINE ─────────────────────────────────────────────────
 
-def call(system, user):
- resp = client.chat.completions.create(
- model=MODEL,
- messages=[
- {"role": "system", "content": system},
- {"role": "user", "content": user},
- ],
- max_tokens=1000,
- temperature=0.8,
- )
- return resp.choices[0].message.content
+def request_params(system, user):
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+    }
+
+
+def _record_usage(span, usage):
+    if usage is not None:
+        span["prompt_tokens"] = usage.prompt_tokens
+        span["completion_tokens"] = usage.completion_tokens
+
+
+def call(system, user, on_token=None):
+    """
+    Blocking single call. With `on_token`, the response is streamed and
+    each text delta is passed to `on_token` as it arrives.
+
+    Transient failures are retried, slow calls hedged and failing models
+    skipped by the shared `resilience` policy (resilience.py).
+    """
+    params = request_params(system, user)
+    with tracer.span(model=MODEL) as span:
+        if cache is not None:
+            cached = cache.lookup(params)
+            span["cache"] = "miss" if cached is None else "hit"
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+
+        def attempt(model):
+            if on_token is None:
+                resp = client.chat.completions.create(**{**params, "model": model})
+                _record_usage(span, resp.usage)
+                return resp.choices[0].message.content
+            parts = []
+            try:
+                stream = client.chat.completions.create(
+                    **{**params, "model": model}, stream=True, stream_options={"include_usage": True})
+                for chunk in stream:
+                    _record_usage(span, chunk.usage)
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        on_token(delta)
+            except Exception as err:
+                if parts:
+                    err.retryable = False  # tokens already reached the sink
+                raise
+            return "".join(parts)
+
+        text = resilience.call(MODEL, attempt, span, hedge=on_token is None)
+        if cache is not None and span["model"] == MODEL:
+            cache.store(params, text)
+        return text
+
+
+async def acall(system, user, on_token=None):
+    """
+    Async call(), paced by the provider's token bucket.
+
+    Cache hits (see response_cache.py) return before a token is taken.
+    A 429 throttles the whole bucket for the Retry-After window, so every
+    in-flight Spirit on the same provider backs off together instead of
+    hammering it (PARALLEL_VS_SEQUENTIAL_REPORT.md); the retry itself, and
+    retries of 5xx/timeouts, go through `resilience` as in call(). With
+    `on_token`, the response is streamed as in call().
+    """
+    params = request_params(system, user)
+    with tracer.span(model=MODEL) as span:
+        if cache is not None:
+            cached = cache.lookup(params)
+            span["cache"] = "miss" if cached is None else "hit"
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+        bucket = limiter_for(PROVIDER)
+
+        async def attempt(model):
+            await bucket.acquire()
+            parts = []
+            try:
+                if on_token is None:
+                    resp = await aclient.chat.completions.create(**{**params, "model": model})
+                    _record_usage(span, resp.usage)
+                    return resp.choices[0].message.content
+                stream = await aclient.chat.completions.create(
+                    **{**params, "model": model}, stream=True, stream_options={"include_usage": True})
+                async for chunk in stream:
+                    _record_usage(span, chunk.usage)
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        on_token(delta)
+            except RateLimitError as err:
+                bucket.throttle(retry_after_seconds(err.response.headers))
+                raise
+            except Exception as err:
+                if parts:
+                    err.retryable = False  # tokens already reached the sink
+                raise
+            return "".join(parts)
+
+        text = await resilience.acall(MODEL, attempt, span, hedge=on_token is None)
+        if cache is not None and span["model"] == MODEL:
+            cache.store(params, text)
+        return text
 
 
 def divider(title):
- print(f"\n{'─' * 60}")
- print(f" {title}")
- print(f"{'─' * 60}\n")
+    log.info("\n%s\n %s\n%s\n", "─" * 60, title, "─" * 60)
+
+
+def artifact_section(title):
+    return f"{'=' * 60}\n{title}\n{'=' * 60}\n"
+
+
+def artifact_header(topic):
+    return (
+        f"PRINCIPLED PLAYGROUND v0.4 Codex Edition\n"
+        f"Topic: {topic}\n"
+        f"Model: {MODEL}\n"
+        f"Mode: TRI-BRAIN (all on GPT)\n\n"
+    )
+
+
+async def negotiate(topic, echo=True, stream=False, artifact=None, rounds=ROUNDS, checkpoint=None):
+    """
+    Run the full protocol for one topic and return its artifacts.
+
+    Boolean and Roux answer concurrently within each round. Each responds to
+    a frozen snapshot of the other's previous-round position, so the result
+    does not depend on which call finishes first (same as negotiate.js).
+    The Loom and Seer depend on the finals and run after the rounds.
+
+    With `stream`, tokens are echoed as they arrive and time-to-first-token
+    and tokens/sec are recorded per Spirit per round under "stream_metrics".
+    If `artifact` (an open file with its header already written) is given,
+    the final sections are streamed into it in the same pass.
+
+    Pasted context is compacted (compaction.py): each Spirit answers the
+    other's rolling digest rather than the raw response, and the Loom and
+    Seer see the finals fitted to CONTEXT_BUDGETS.
+
+    Each Spirit's system prompt is grounded once per topic (retrieval.py):
+    its anchor bean and the most relevant beans are appended, and their
+    IDs are handed to the Loom as the joint bean's anchors.
+
+    Each call emits a span labelled with its stage, Spirit and round, and
+    the whole run emits a "negotiation" span (see tracing.py).
+
+    With `checkpoint` (a checkpoint.Run), every finished call is logged as
+    it returns and stages already in the log are not called again, so a
+    resumed run only pays for the calls it had not finished.
+    """
+    with labels(negotiation=uuid.uuid4().hex[:12]), tracer.span("negotiation", model=MODEL):
+        return await _negotiate(topic, echo, stream, artifact, rounds, checkpoint)
+
+
+async def _negotiate(topic, echo, stream, artifact, rounds, checkpoint):
+    boolean_pos = ""
+    roux_pos = ""
+    boolean_digest = PositionDigest(CONTEXT_BUDGETS["round"])
+    roux_digest = PositionDigest(CONTEXT_BUDGETS["round"])
+    history = []
+    metrics = []
+    anchors, systems = {}, {}
+    for name in ("Boolean", "Roux", "Seer"):
+        anchors[name], systems[name] = ground(name, spirits.system_prompt(name), topic)
+
+    async def complete(spirit, rnd, system, prompt, on_token=None):
+        saved = checkpoint.get(spirit, rnd) if checkpoint is not None else None
+        if saved is not None:
+            if on_token is not None:
+                on_token(saved)
+            return saved
+        text = await acall(system, prompt, on_token)
+        if checkpoint is not None:
+            checkpoint.record(spirit, rnd, text)
+        return text
+
+    async def run(spirit, rnd, system, prompt, group=None, label=None, section=None):
+        with labels(stage="round" if rnd else spirit.lower(), spirit=spirit, round=rnd):
+            if not stream:
+                return await complete(spirit, rnd, system, prompt)
+            sinks = []
+            if echo:
+                sinks.append(stdout_sink(f" ── {label} ──\n " if label else " "))
+            if artifact is not None and section is not None:
+                sinks.append(file_sink(artifact, artifact_section(section)))
+            channel = (group or StreamGroup()).channel(*sinks)
+            m = StreamMetrics(spirit, rnd)
+            try:
+                text = await complete(spirit, rnd, system, prompt, on_token=m.wrap(channel.write))
+            finally:
+                m.finish()
+                metrics.append(m)
+                channel.write("\n\n")
+                channel.close()
+            return text
+
+    # ── Negotiation rounds ──
+    for rnd in range(1, rounds + 1):
+        if echo:
+            divider(f"ROUND {rnd} of {rounds}")
+
+        if rnd == 1:
+            boolean_prompt = roux_prompt = round1_prompt(topic, rounds)
+        else:
+            boolean_prompt = round_n_prompt(topic, rnd, roux_digest.text, rounds)
+            roux_prompt = round_n_prompt(topic, rnd, boolean_digest.text, rounds)
+
+        last = rnd == rounds
+        group = StreamGroup()
+        boolean_pos, roux_pos = await asyncio.gather(
+            run("Boolean", rnd, systems["Boolean"], boolean_prompt, group, "Boolean",
+                "BOOLEAN FINAL" if last else None),
+            run("Roux", rnd, systems["Roux"], roux_prompt, group, "Roux",
+                "ROUX FINAL" if last else None),
+        )
+        boolean_digest.update(boolean_pos)
+        roux_digest.update(roux_pos)
+        history.append({"round": rnd, "boolean": boolean_pos, "roux": roux_pos})
+
+        if echo and not stream:
+            log.info(" ── Boolean ──\n %s\n\n ── Roux ──\n %s\n", boolean_pos, roux_pos)
+
+    # ── The Loom ──
+    if echo:
+        divider("THE LOOM Synthesis")
+    finals = fit_all([boolean_pos, roux_pos], CONTEXT_BUDGETS["loom"])
+    joint_bean = await run("Loom", None, LOOM_SYSTEM, loom_prompt(topic, *finals, rounds, anchors=anchors),
+                           section="JOINT BEAN")
+    if echo and not stream:
+        log.info(" %s\n", joint_bean)
+
+    # ── Seer Stress Test ──
+    if echo:
+        divider("SEER Stress Test")
+    context = fit_all([boolean_pos, roux_pos, joint_bean], CONTEXT_BUDGETS["stress_test"])
+    stress = await run("Seer", None, systems["Seer"], stress_test_prompt(topic, *context, rounds),
+                       section="SEER STRESS TEST")
+    if echo and not stream:
+        log.info(" %s\n", stress)
+
+    result = {
+        "topic": topic,
+        "model": MODEL,
+        "rounds": history,
+        "boolean_final": boolean_pos,
+        "roux_final": roux_pos,
+        "joint_bean": joint_bean,
+        "stress_test": stress,
+        "anchors": anchors,
+    }
+    if stream:
+        result["stream_metrics"] = [m.as_dict() for m in metrics]
+    return result
+
+
+def write_artifact(result, path="codex_playground_output.txt"):
+    with open(path, "w") as f:
+        f.write(artifact_header(result["topic"]))
+        f.write(f"{artifact_section('BOOLEAN FINAL')}{result['boolean_final']}\n\n")
+        f.write(f"{artifact_section('ROUX FINAL')}{result['roux_final']}\n\n")
+        f.write(f"{artifact_section('JOINT BEAN')}{result['joint_bean']}\n\n")
+        f.write(f"{artifact_section('SEER STRESS TEST')}{result['stress_test']}\n")
+
+
+def print_stream_metrics(metrics):
+    if not log.isEnabledFor(logging.INFO):
+        return
+    divider("LATENCY (as seen by the operator)")
+    rows = [f" {'Spirit':<8} {'Round':>5} {'TTFT':>8} {'Tokens':>7} {'Tok/s':>8}"]
+    for m in metrics:
+        rnd = m["round"] if m["round"] is not None else "-"
+        ttft = f"{m['ttft_s']:.2f}s" if m["ttft_s"] is not None else "-"
+        tps = f"{m['tokens_per_sec']:.1f}" if m["tokens_per_sec"] is not None else "-"
+        rows.append(f" {m['spirit']:<8} {rnd:>5} {ttft:>8} {m['tokens']:>7} {tps:>8}")
+    log.info("%s", "\n".join(rows))
+
+
+def start_logging(mode="quiet", queued=True):
+    """
+    Attach the console renderer to the "playground" logger.
+
+    "quiet" keeps only warnings; "human" is the classic transcript on
+    stdout. Records are queued and written by a listener thread, so the
+    event loop never waits on the terminal. With `queued=False` they are
+    written inline instead, which keeps them in order with tokens that
+    --stream writes straight to stdout. oplog.shutdown("playground")
+    flushes the output.
+    """
+    if mode == "quiet":
+        log.setLevel(logging.WARNING)
+        return
+    if mode != "human":
+        raise ValueError(f"unknown log mode {mode!r} (quiet, human)")
+    oplog.configure(logging.INFO, "human", stream=sys.stdout, name=log.name, queued=queued)
 
 
 # ─── MAIN ORCHESTRATION ────────────────────────────────────
 
 def main():
- print("=" * 60)
- print(" PRINCIPLED PLAYGROUND v0.4 Codex Edition")
- print("=" * 60)
- print(f"\n Topic: {TOPIC}")
- print(f" Model: {MODEL}")
- print(f" Mode: TRI-BRAIN (all on GPT)")
- print(f" Boolean: Soul Code → GPT")
- print(f" Roux: Soul Code → GPT")
- print(f" Seer: Soul Code → GPT")
- print(f" Rounds: 3\n")
-
- boolean_pos = ""
- roux_pos = ""
-
- # ── Rounds 1-3 ──
- for rnd in range(1, 4):
- divider(f"ROUND {rnd} of 3")
-
- if rnd == 1:
- prompt = round1_prompt(TOPIC)
- boolean_pos = call(BOOLEAN_SYSTEM, prompt)
- roux_pos = call(ROUX_SYSTEM, prompt)
- else:
- boolean_pos = call(BOOLEAN_SYSTEM, round_n_prompt(TOPIC, rnd, roux_pos))
- roux_pos = call(ROUX_SYSTEM, round_n_prompt(TOPIC, rnd, boolean_pos))
-
- print(f" ── Boolean ──")
- print(f" {boolean_pos}\n")
- print(f" ── Roux ──")
- print(f" {roux_pos}\n")
-
- # ── The Loom ──
- divider("THE LOOM Synthesis")
- joint_bean = call(LOOM_SYSTEM, loom_prompt(TOPIC, boolean_pos, roux_pos))
- print(f" {joint_bean}\n")
-
- # ── Seer Stress Test ──
- divider("SEER Stress Test")
- stress = call(SEER_SYSTEM, stress_test_prompt(TOPIC, boolean_pos, roux_pos, joint_bean))
- print(f" {stress}\n")
-
- # ── Final Report ──
- divider("NEGOTIATION COMPLETE")
- print(" Three Spirits. One substrate. Soul Code differentiation only.")
- print(" Paste the full output back to the Execution repo for stitching.\n")
-
- # Write artifact to file
- with open("codex_playground_output.txt", "w") as f:
- f.write(f"PRINCIPLED PLAYGROUND v0.4 Codex Edition\n")
- f.write(f"Topic: {TOPIC}\n")
- f.write(f"Model: {MODEL}\n")
- f.write(f"Mode: TRI-BRAIN (all on GPT)\n\n")
- f.write(f"{'=' * 60}\nBOOLEAN FINAL\n{'=' * 60}\n{boolean_pos}\n\n")
- f.write(f"{'=' * 60}\nROUX FINAL\n{'=' * 60}\n{roux_pos}\n\n")
- f.write(f"{'=' * 60}\nJOINT BEAN\n{'=' * 60}\n{joint_bean}\n\n")
- f.write(f"{'=' * 60}\nSEER STRESS TEST\n{'=' * 60}\n{stress}\n")
-
- print(" Output saved to: codex_playground_output.txt")
+    parser = argparse.ArgumentParser(description="Principled Playground Codex Edition")
+    parser.add_argument("--stream", action="store_true",
+                        help="print tokens as they arrive and report time-to-first-token "
+                             "(implies --log human)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS,
+                        help="negotiation rounds before the Loom (prompt context stays bounded)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last unfinished run of this topic from its checkpoint")
+    parser.add_argument("--checkpoint", default="codex_playground_checkpoint.jsonl",
+                        help="append-only log of finished stages")
+    parser.add_argument("--log", choices=("quiet", "human"), default=os.getenv("PLAYGROUND_LOG", "quiet"),
+                        help="console output: quiet (warnings only) or the human-readable transcript "
+                             "(default: $PLAYGROUND_LOG or quiet)")
+    args = parser.parse_args()
+    # Streamed tokens go to stdout whatever --log says, so the transcript around them does too.
+    start_logging("human" if args.stream else args.log, queued=not args.stream)
+    echo = log.isEnabledFor(logging.INFO)
+
+    log.info("%s\n PRINCIPLED PLAYGROUND v0.4 Codex Edition\n%s\n\n Topic: %s\n Model: %s\n"
+             " Mode: TRI-BRAIN (all on GPT)\n Boolean: Soul Code → GPT\n Roux: Soul Code → GPT\n"
+             " Seer: Soul Code → GPT\n Rounds: %d (parallel within each round)\n",
+             "=" * 60, "=" * 60, TOPIC, MODEL, args.rounds)
+
+    checkpoints = CheckpointLog(args.checkpoint)
+    if args.resume:
+        run = checkpoints.resume(TOPIC, MODEL, args.rounds, prompts_digest())
+        log.info(" Resuming: %d stages restored from %s\n", len(run.stages), args.checkpoint)
+    else:
+        run = checkpoints.start(TOPIC, MODEL, args.rounds, prompts_digest())
+
+    if args.stream:
+        # Final sections are written into the artifact as they stream.
+        with open("codex_playground_output.txt", "w") as f:
+            f.write(artifact_header(TOPIC))
+            result = asyncio.run(negotiate(TOPIC, echo=echo, stream=True, artifact=f, rounds=args.rounds,
+                                           checkpoint=run))
+        print_stream_metrics(result["stream_metrics"])
+    else:
+        result = asyncio.run(negotiate(TOPIC, echo=echo, rounds=args.rounds, checkpoint=run))
+
+    # ── Final Report ──
+    divider("NEGOTIATION COMPLETE")
+    log.info(" Three Spirits. One substrate. Soul Code differentiation only.\n"
+             " Paste the full output back to the Execution repo for stitching.\n")
+
+    if not args.stream:
+        # Write artifact to file
+        write_artifact(result)
+    run.finish()
+    checkpoints.compact()
+    checkpoints.close()
+
+    log.info(" Output saved to: codex_playground_output.txt")
+    artifacts = artifact_store.from_env()
+    if artifacts is not None:
+        with artifacts:
+            run_id = artifacts.put(result)
+        log.info(" Run stored as %s in %s", run_id, artifacts.root)
+    oplog.shutdown(log.name)
 
 
 if __name__ == "__main__":
- main()
+    main()
@@ -0,0 +1,135 @@
+"""
+Incremental context compaction for playground prompts.
+
+Round, Loom and Seer prompts paste in earlier positions. Without a bound,
+input tokens grow with every round and every stage. This module keeps a
+rolling, size-bounded digest of each Spirit's position and fits pasted
+context into a per-prompt token budget.
+
+Digests are updated incrementally: each round folds the new position
+(condensed only if it does not fit) in front of the previous digest, so
+the work per round is proportional to the new text, not to the transcript.
+
+Budgets are in estimated tokens (about 4 characters per token) and can be
+overridden with PLAYGROUND_BUDGET_<PROMPT>=tokens, e.g.
+PLAYGROUND_BUDGET_ROUND=250. A budget of 0 disables compaction for
+that prompt.
+"""
+
+import os
+import re
+
+CHARS_PER_TOKEN = 4
+
+# Pasted-context budget per prompt, in tokens.
+DEFAULT_BUDGETS = {
+    "round": 350,        # the other Spirit's digest in round_n_prompt
+    "loom": 1200,        # both final positions in loom_prompt
+    "stress_test": 1800, # both finals + the joint bean in stress_test_prompt
+    "grounding": 300,    # anchor + retrieved beans in each Spirit's system prompt (retrieval.py)
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_EARLIER = "Earlier rounds:"
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def budgets_from_env(defaults=DEFAULT_BUDGETS):
+    budgets = dict(defaults)
+    for name in budgets:
+        value = os.getenv(f"PLAYGROUND_BUDGET_{name.upper()}")
+        if value:
+            budgets[name] = int(value)
+    return budgets
+
+
+def fit(text, budget):
+    """
+    Trim `text` to at most `budget` tokens, cutting at a line or sentence
+    boundary where one exists. A budget of None returns the text
+    unchanged; a budget of 0 or less leaves nothing.
+    """
+    if budget is None or estimate_tokens(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+    limit = budget * CHARS_PER_TOKEN - 2
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    if boundary > limit // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+def fit_all(texts, budget):
+    """
+    Fit several texts into one shared budget.
+
+    Texts under their fair share keep their full length and hand the
+    leftover to the rest (water-filling), so a short joint bean never
+    forces the positions next to it to shrink more than necessary. A
+    budget of 0 (or None) disables compaction; any other budget is
+    enforced, even when a share rounds down to nothing.
+    """
+    if not budget:
+        return list(texts)
+    sizes = [estimate_tokens(t) for t in texts]
+    remaining = budget
+    shares = [None] * len(texts)
+    pending = sorted(range(len(texts)), key=lambda i: sizes[i])
+    while pending:
+        fair = remaining // len(pending)
+        i = pending[0]
+        if sizes[i] <= fair:
+            shares[i] = sizes[i]
+            remaining -= sizes[i]
+            pending.pop(0)
+        else:
+            for j in pending:
+                shares[j] = fair
+            break
+    return [fit(t, s) for t, s in zip(texts, shares)]
+
+
+def condense(position):
+    """
+    Reduce a Spirit's response to its load-bearing lines: the first
+    sentence of every non-empty line, with whitespace collapsed.
+    Structured headings (POSITION, NON-NEGOTIABLES, ...) survive because
+    they open their lines.
+    """
+    kept = []
+    for line in position.splitlines():
+        line = " ".join(line.split())
+        if line:
+            kept.append(_SENTENCE_END.split(line, 1)[0])
+    return "\n".join(kept)
+
+
+class PositionDigest:
+    """Rolling, size-bounded summary of one Spirit's position across rounds."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.text = ""
+
+    def update(self, position):
+        """
+        Fold the latest position in; newest content wins the budget. The
+        position is kept whole when it fits, and condensed only when not.
+        """
+        if not self.budget:
+            self.text = position
+            return self.text
+        latest = position.strip() if estimate_tokens(position.strip()) <= self.budget else condense(position)
+        # The previous digest, newest first; trimming from the end drops the oldest rounds.
+        earlier = self.text.replace(f"\n{_EARLIER}\n", "\n", 1)
+        room = self.budget - estimate_tokens(latest) - estimate_tokens(_EARLIER) - 1
+        combined = latest
+        if earlier and room > 8:
+            combined = f"{latest}\n{_EARLIER}\n{fit(earlier, room)}"
+        self.text = fit(combined, self.budget)
+        return self.text
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Negotiation-quality metrics over stored transcripts, vectorized with NumPy.
+
+Per codex_playground run: tension (negotiate.js computeTensionScore(),
+matched exactly), friction and agreement marker counts, position drift
+and Boolean/Roux convergence over hashed word-bigram vectors, joint bean
+length, anchors and similarity to the finals, and the Seer's verdict.
+Runs are scored CHUNK_RUNS at a time. MetricsLog keeps per-run results
+in a JSONL log, and update() scores only the runs it has not seen.
+
+Usage:
+    python playground/metrics.py                                 # every run in the artifact store
+    python playground/metrics.py --model o3 --log metrics.jsonl  # incremental
+    python playground/metrics.py --results codex_playground_results.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import artifact_store
+
+FRICTION = [
+    r"however", r"but", r"push.?back", r"challenge", r"disagree", r"reject", r"insufficient",
+    r"not enough", r"hold firm", r"still requires", r"critically", r"unless", r"without",
+    r"missing", r"fail", r"warn", r"problematic", r"weaker", r"incomplete",
+]
+AGREEMENT = [
+    r"agree", r"accept", r"acknowledge", r"exactly", r"correct", r"valid", r"incorporate",
+    r"embrace", r"welcome", r"appreciate", r"concur", r"right", r"indeed",
+]
+MARKERS = FRICTION + AGREEMENT
+# One pass finds every marker; the group number says which. ASCII \b, as in JavaScript.
+_MARKER = re.compile("|".join(rf"\b({m})\b" for m in MARKERS), re.IGNORECASE | re.ASCII)
+_IS_FRICTION = np.arange(len(MARKERS)) < len(FRICTION)
+
+LABELS = [  # (lowest rounded score, label), as in computeTensionScore()
+    (0.8, "MAXIMUM positions barely moved"),
+    (0.6, "HIGH productive friction maintained"),
+    (0.4, "MEDIUM convergence with maintained differences"),
+    (0.2, "LOW significant agreement reached"),
+    (float("-inf"), "MINIMAL near-consensus"),
+]
+
+VERDICTS = ["HOLDS", "HOLDS WITH CONDITIONS", "FRAGILE", "UNCLEAR"]
+_VERDICT_AT = re.compile(r"verdict", re.IGNORECASE)
+_VERDICT = [  # the earliest match after the last "VERDICT" wins; ties go to the first listed
+    (1, re.compile(r"holds with conditions|conditional(?:ly)? (?:pass|holds)|holds,? (?:but )?(?:only )?(?:if|with)",
+                   re.IGNORECASE)),
+    (2, re.compile(r"\bfragile\b|\bfail(?:s|ed)?\b|\bdoes not hold\b", re.IGNORECASE)),
+    (0, re.compile(r"\bholds\b|\bpass(?:es)?\b", re.IGNORECASE)),
+]
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_ANCHOR = re.compile(r"\b[A-Z]{2,}(?:-[A-Z]+)*-\d{3}\b")
+DIM = 1 << 12          # hashed bigram buckets
+CHUNK_RUNS = 512       # runs vectorized together
+SPIRITS = ("boolean", "roux")
+
+
+def _round_half_up(x):
+    """JavaScript Math.round(x * 100) / 100."""
+    return np.floor(np.asarray(x, dtype=np.float64) * 100 + 0.5) / 100
+
+
+def label(score: float) -> str:
+    return next(text for floor, text in LABELS if score >= floor)
+
+
+def classify_verdict(stress_test: str) -> str:
+    """The Seer's verdict, read from the text after its last "VERDICT" (else the whole text)."""
+    text = stress_test or ""
+    found = list(_VERDICT_AT.finditer(text))
+    tail = text[found[-1].end():] if found else text
+    matches = [(m.start(), rank, code) for rank, (code, pattern) in enumerate(_VERDICT)
+               if (m := pattern.search(tail))]
+    return VERDICTS[min(matches)[2]] if matches else VERDICTS[-1]
+
+
+class _Bigrams:
+    """Stable feature hashing of word bigrams (crc32 per distinct word, then integer mixing)."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self._ids: Dict[str, int] = {}
+
+    def buckets(self, text: str) -> np.ndarray:
+        ids = self._ids
+        words = _WORD.findall((text or "").lower())
+        hashed = np.fromiter((ids[w] if w in ids else ids.setdefault(w, zlib.crc32(w.encode())) for w in words),
+                             dtype=np.uint64, count=len(words))
+        if len(hashed) < 2:
+            return np.zeros(0, dtype=np.int64)
+        mixed = (hashed[:-1] * np.uint64(0x9E3779B1)) ^ hashed[1:]
+        return (mixed % np.uint64(self.dim)).astype(np.int64)
+
+
+class _Vectors:
+    """
+    Sparse L2-normalized bigram count vectors, one row per text, stored as
+    (row, bucket) entries sorted by row; cosines are taken between rows.
+    """
+
+    def __init__(self, buckets: List[np.ndarray], dim: int):
+        self.dim = dim
+        lengths = np.array([len(b) for b in buckets], dtype=np.int64)
+        rows = np.repeat(np.arange(len(buckets)), lengths)
+        flat = np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int64)
+        keys, counts = np.unique(rows * dim + flat, return_counts=True)
+        self.row, self.bucket = np.divmod(keys, dim)
+        weight = counts.astype(np.float64)
+        norms = np.sqrt(np.bincount(self.row, weight ** 2, minlength=len(buckets)))
+        self.weight = weight / norms[self.row]
+        self.start = np.searchsorted(self.row, np.arange(len(buckets) + 1))
+
+    def _entries(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(position in `rows`, entry index) for every entry of the given rows."""
+        lengths = self.start[rows + 1] - self.start[rows]
+        tag = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.repeat(self.start[rows] - (np.cumsum(lengths) - lengths), lengths)
+        return tag, offsets + np.arange(int(lengths.sum()))
+
+    def cosine(self, a, b) -> np.ndarray:
+        """Cosine between rows a[k] and b[k], for every k (0 where a text has no bigrams)."""
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        tag_a, at = self._entries(a)
+        tag_b, bt = self._entries(b)
+        shared, ia, ib = np.intersect1d(tag_a * self.dim + self.bucket[at], tag_b * self.dim + self.bucket[bt],
+                                        assume_unique=True, return_indices=True)
+        return np.bincount(shared // self.dim, self.weight[at[ia]] * self.weight[bt[ib]], minlength=len(a))
+
+
+def _rounds(result: Dict) -> List[Dict]:
+    return result.get("rounds") or []
+
+
+def score_batch(results: List[Dict], hasher: Optional[_Bigrams] = None) -> Dict[str, np.ndarray]:
+    """
+    Metrics for a batch of negotiate() results, as columns (one entry per
+    run). Round-level columns are padded to the longest run with NaN
+    (marker counts with -1); "rounds" gives each run's length.
+    """
+    hasher = hasher or _Bigrams()
+    n = len(results)
+    n_rounds = np.array([len(_rounds(r)) for r in results], dtype=np.int64)
+    width = max(int(n_rounds.max()) if n else 0, 1)
+
+    # ── markers: one regex pass per round text, then one bincount ──
+    round_texts = [f"{rd.get('boolean') or ''} {rd.get('roux') or ''}" for r in results for rd in _rounds(r)]
+    owner = np.repeat(np.arange(n), n_rounds)
+    slot = np.concatenate([np.arange(k) for k in n_rounds]) if n else np.zeros(0, dtype=np.int64)
+    hits_text, hits_marker = [], []
+    for i, text in enumerate(round_texts):
+        for m in _MARKER.finditer(text):
+            hits_text.append(i)
+            hits_marker.append(m.lastindex - 1)
+    counts = np.bincount(np.asarray(hits_text, dtype=np.int64) * len(MARKERS) + np.asarray(hits_marker, dtype=np.int64),
+                         minlength=len(round_texts) * len(MARKERS)).reshape(len(round_texts), len(MARKERS))
+    friction_t = counts[:, _IS_FRICTION].sum(axis=1)
+    agreement_t = counts[:, ~_IS_FRICTION].sum(axis=1)
+    friction = np.full((n, width), -1, dtype=np.int64)
+    agreement = np.full((n, width), -1, dtype=np.int64)
+    friction[owner, slot] = friction_t
+    agreement[owner, slot] = agreement_t
+    markers = np.zeros((n, len(MARKERS)), dtype=np.int64)
+    np.add.at(markers, owner, counts)
+
+    # ── tension, as computeTensionScore() ──
+    total_f = np.where(friction >= 0, friction, 0).sum(axis=1)
+    total_a = np.where(agreement >= 0, agreement, 0).sum(axis=1)
+    has = n_rounds > 0
+    first_f = np.where(has, friction[:, 0], 0)
+    last_f = np.where(has, friction[np.arange(n), np.maximum(n_rounds - 1, 0)], 0)
+    persistence = np.minimum(1.0, last_f / np.where(first_f > 0, first_f, 1))
+    raw_ratio = total_f / (total_f + total_a + 1)
+    tension = _round_half_up(np.clip(raw_ratio * 0.6 + persistence * 0.4, 0, 1))
+
+    # ── drift and convergence over hashed bigram vectors ──
+    texts, index = [], {}
+    for i, r in enumerate(results):
+        for j, rd in enumerate(_rounds(r)):
+            for spirit in SPIRITS:
+                index[i, j, spirit] = len(texts)
+                texts.append(rd.get(spirit) or "")
+        for key in ("joint_bean", "boolean_final", "roux_final"):
+            index[i, key] = len(texts)
+            texts.append(r.get(key) or "")
+    vectors = _Vectors([hasher.buckets(t) for t in texts], hasher.dim)
+
+    def cosine(keys_a, keys_b):
+        return vectors.cosine([index[k] for k in keys_a], [index[k] for k in keys_b])
+
+    drift = {s: np.full((n, width), np.nan) for s in SPIRITS}
+    total_drift = {s: np.full(n, np.nan) for s in SPIRITS}
+    pairs = [(i, j) for i in range(n) for j in range(1, n_rounds[i])]
+    if pairs:
+        pi, pj = np.array(pairs).T
+        for s in SPIRITS:
+            drift[s][pi, pj] = 1 - cosine([(i, j, s) for i, j in pairs], [(i, j - 1, s) for i, j in pairs])
+    multi = np.flatnonzero(n_rounds > 1)
+    for s in SPIRITS:
+        total_drift[s][multi] = 1 - cosine([(i, 0, s) for i in multi], [(i, n_rounds[i] - 1, s) for i in multi])
+    convergence_first = np.full(n, np.nan)
+    convergence_last = np.full(n, np.nan)
+    played = np.flatnonzero(has)
+    convergence_first[played] = cosine([(i, 0, "boolean") for i in played], [(i, 0, "roux") for i in played])
+    convergence_last[played] = cosine([(i, n_rounds[i] - 1, "boolean") for i in played],
+                                      [(i, n_rounds[i] - 1, "roux") for i in played])
+    everyone = range(n)
+    joint_boolean = cosine([(i, "joint_bean") for i in everyone], [(i, "boolean_final") for i in everyone])
+    joint_roux = cosine([(i, "joint_bean") for i in everyone], [(i, "roux_final") for i in everyone])
+
+    return {
+        "rounds": n_rounds,
+        "tension": tension,
+        "friction": total_f,
+        "agreement": total_a,
+        "friction_persistence": _round_half_up(persistence),
+        "friction_per_round": friction,
+        "agreement_per_round": agreement,
+        "markers": markers,
+        "drift_boolean": drift["boolean"],
+        "drift_roux": drift["roux"],
+        "total_drift_boolean": total_drift["boolean"],
+        "total_drift_roux": total_drift["roux"],
+        "convergence_first": convergence_first,
+        "convergence_last": convergence_last,
+        "joint_bean_words": np.array([len((r.get("joint_bean") or "").split()) for r in results], dtype=np.int64),
+        "joint_bean_anchors": np.array([len(set(_ANCHOR.findall(r.get("joint_bean") or ""))) for r in results],
+                                       dtype=np.int64),
+        "joint_boolean_similarity": joint_boolean,
+        "joint_roux_similarity": joint_roux,
+        "verdict": np.array([VERDICTS.index(classify_verdict(r.get("stress_test"))) for r in results],
+                            dtype=np.int8),
+    }
+
+
+def _round_floats(values, digits=4):
+    return [None if v != v else round(float(v), digits) for v in values]
+
+
+def as_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """score_batch() columns as one JSON-ready dict per run."""
+    out = []
+    for i in range(len(columns["tension"])):
+        k = int(columns["rounds"][i])
+        tension = float(columns["tension"][i])
+        out.append({
+            "tension": tension,
+            "label": label(tension),
+            "friction": int(columns["friction"][i]),
+            "agreement": int(columns["agreement"][i]),
+            "friction_persistence": float(columns["friction_persistence"][i]),
+            "per_round": [{"round": j + 1, "friction": int(columns["friction_per_round"][i, j]),
+                           "agreement": int(columns["agreement_per_round"][i, j])} for j in range(k)],
+            "markers": {m: int(c) for m, c in zip(MARKERS, columns["markers"][i]) if c},
+            "drift": {s: _round_floats(columns[f"drift_{s}"][i, 1:k]) for s in SPIRITS},
+            "total_drift": {s: _round_floats([columns[f"total_drift_{s}"][i]])[0] for s in SPIRITS},
+            "convergence": _round_floats([columns["convergence_first"][i], columns["convergence_last"][i]]),
+            "joint_bean": {"words": int(columns["joint_bean_words"][i]),
+                           "anchors": int(columns["joint_bean_anchors"][i]),
+                           "similarity": _round_floats([columns["joint_boolean_similarity"][i],
+                                                        columns["joint_roux_similarity"][i]])},
+            "verdict": VERDICTS[columns["verdict"][i]],
+        })
+    return out
+
+
+def score_runs(runs: Iterable[Tuple[str, Dict, Dict]], chunk: int = CHUNK_RUNS) -> Iterator[Dict]:
+    """
+    {"run_id", **meta, **metrics} for each (run_id, meta, result), vectorized
+    `chunk` runs at a time.
+    """
+    hasher = _Bigrams()
+    runs = iter(runs)
+    while True:
+        batch = list(itertools.islice(runs, chunk))
+        if not batch:
+            return
+        for (run_id, meta, _), row in zip(batch, as_rows(score_batch([r for _, _, r in batch], hasher))):
+            yield {"run_id": run_id, **meta, **row}
+
+
+class MetricsLog:
+    """
+    Append-only JSONL of per-run metrics keyed by run ID. update() scores
+    only runs not yet in the log, so repeated refreshes stay incremental.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._seen.add(json.loads(line)["run_id"])
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # torn tail from a crash; that run is scored again
+            self._seal()
+
+    def _seal(self):
+        """Terminate a torn last line so the next row starts cleanly."""
+        size = os.path.getsize(self.path)
+        if size:
+            with open(self.path, "rb+") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def __contains__(self, run_id: str) -> bool:
+        return run_id in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def update(self, runs: Iterable[Tuple[str, Dict, Dict]], chunk: int = CHUNK_RUNS) -> int:
+        """
+        Score and append the (run_id, meta, result) items not yet logged;
+        `meta` (topic, model, ts, ...) is stored alongside. Returns the
+        number of runs scored.
+        """
+        fresh = ((run_id, meta, result) for run_id, meta, result in runs if run_id not in self._seen)
+        added = 0
+        with open(self.path, "a", encoding="utf-8") as out:
+            for row in score_runs(fresh, chunk):
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                self._seen.add(row["run_id"])
+                added += 1
+                if added % chunk == 0:
+                    out.flush()
+        return added
+
+    def rows(self) -> Iterator[Dict]:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def store_runs(store, exclude=(), **filters) -> Iterator[Tuple[str, Dict, Dict]]:
+    """(run_id, meta, result) for the artifact-store runs matching `filters`, minus `exclude`."""
+    for record in store.scan(exclude=exclude, **filters):
+        yield record["run_id"], {"topic": record["topic"], "model": record["model"], "ts": record["ts"]}, record["result"]
+
+
+def results_runs(path: str) -> Iterator[Tuple[str, Dict, Dict]]:
+    """(run_id, meta, result) for the successful lines of a batch_runner results JSONL."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in row:
+                yield str(row.get("id")), {"topic": row.get("topic", ""), "model": row.get("model", "")}, row
+
+
+def matches(meta: Dict, topic_like: Optional[str] = None, model: Optional[str] = None, since=None) -> bool:
+    """
+    Whether a run's meta, or a logged row, passes the filters the artifact
+    store applies to its index (ArtifactStore.runs()).
+    """
+    if topic_like is not None and topic_like.lower() not in (meta.get("topic") or "").lower():
+        return False
+    if model is not None and meta.get("model") != model:
+        return False
+    if since is not None and (meta.get("ts") is None or meta["ts"] < artifact_store.to_timestamp(since)):
+        return False
+    return True
+
+
+def summarize(rows: Iterable[Dict]) -> str:
+    """Markdown summary per model: tension, labels, verdicts, drift and convergence."""
+    groups: Dict[str, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(row.get("model") or "(unknown)", []).append(row)
+    lines = ["| Model | Runs | Tension (mean) | Friction / agreement | Top label | Verdicts | Drift B / R | Convergence R1 → last |",
+             "|---|---|---|---|---|---|---|---|"]
+    for model, group in sorted(groups.items()):
+        tension = np.array([r["tension"] for r in group])
+        friction = np.array([r["friction"] for r in group])
+        agreement = np.array([r["agreement"] for r in group])
+        drift = np.array([[r["total_drift"]["boolean"], r["total_drift"]["roux"]] for r in group], dtype=np.float64)
+        conv = np.array([r["convergence"] for r in group], dtype=np.float64)
+        top_label = Counter(r["label"].split()[0] for r in group).most_common(1)[0][0]
+        verdicts = ", ".join(f"{v} {n}" for v, n in Counter(r["verdict"] for r in group).most_common())
+
+        def mean(values):
+            values = values[~np.isnan(values)]
+            return f"{values.mean():.2f}" if len(values) else "-"
+
+        lines.append(f"| {model} | {len(group)} | {tension.mean():.2f} | {friction.mean():.1f} / {agreement.mean():.1f} "
+                     f"| {top_label} | {verdicts} | {mean(drift[:, 0])} / {mean(drift[:, 1])} "
+                     f"| {mean(conv[:, 0])} → {mean(conv[:, 1])} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Negotiation-quality metrics over stored runs")
+    parser.add_argument("--results", help="batch_runner results JSONL (default: the artifact store)")
+    parser.add_argument("--root", help="artifact store directory (default: $PLAYGROUND_ARTIFACTS or output/artifacts)")
+    parser.add_argument("--topic", dest="topic_like", help="substring of the topic")
+    parser.add_argument("--model")
+    parser.add_argument("--since")
+    parser.add_argument("--log", help="metrics JSONL; only runs not already in it are scored")
+    parser.add_argument("--json", action="store_true", help="print per-run rows instead of the summary")
+    args = parser.parse_args()
+    if args.results and args.since:
+        parser.error("--since needs the artifact store; results files carry no run times")
+
+    filters = {"topic_like": args.topic_like, "model": args.model, "since": args.since}
+    log = MetricsLog(args.log) if args.log else None
+    store = None
+    if args.results:
+        runs = (run for run in results_runs(args.results) if matches(run[1], **filters))
+    else:
+        store = artifact_store.ArtifactStore(args.root or os.getenv("PLAYGROUND_ARTIFACTS", artifact_store.DEFAULT_ROOT))
+        # Logged runs are skipped before their records are read.
+        runs = store_runs(store, exclude=log if log is not None else (), **filters)
+    try:
+        if log is not None:
+            added = log.update(runs)
+            print(f"<!-- {added} new runs scored, {len(log)} in {args.log} -->")
+            # The log holds every run ever scored; report the ones these filters select.
+            rows = (row for row in log.rows() if matches(row, **filters))
+        else:
+            rows = score_runs(runs)
+        if args.json:
+            for row in rows:
+                print(json.dumps(row, ensure_ascii=False))
+        else:
+            print(summarize(rows), end="")
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Provider-aware token-bucket rate limiting for the Python playground.
+
+Each provider gets one shared bucket. Calls acquire a token before they
+hit the network, so concurrent rounds queue locally instead of piling
+onto a throttled provider. See output/PARALLEL_VS_SEQUENTIAL_REPORT.md:
+unthrottled Promise.all ran 30% slower than sequential once Anthropic
+started rate limiting.
+
+Override a provider's budget with PLAYGROUND_RATE_<PROVIDER>=rate[:burst],
+e.g. PLAYGROUND_RATE_OPENAI=5:10 (5 requests/sec, bursts of 10).
+"""
+
+import asyncio
+import os
+import time
+
+# requests/sec, burst size
+PROVIDER_LIMITS = {
+    "anthropic": (0.5, 1),
+    "google": (1.0, 2),      # aistudio_config.yaml: 60 requests/minute
+    "groq": (2.0, 4),
+    "openai": (2.0, 4),
+    "openrouter": (0.5, 1),
+}
+DEFAULT_LIMIT = (1.0, 2)
+
+
+class TokenBucket:
+    """
+    Async token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    `throttle()` lets a caller that just saw a 429 push the whole bucket
+    back, so every waiter on the same provider backs off together.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be > 0 and capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """Wait until `tokens` are available, then take them."""
+        # The lock keeps waiters FIFO: one caller sleeps for the refill at a time.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def throttle(self, delay: float) -> None:
+        """Provider pushed back (429): drain the bucket and pause for `delay` seconds."""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + max(delay, 0.0))
+        self._tokens = 0.0
+        self._updated = max(now, self._blocked_until)
+
+
+def _limit_for(provider: str):
+    override = os.getenv(f"PLAYGROUND_RATE_{provider.upper()}")
+    if override:
+        rate, _, burst = override.partition(":")
+        return float(rate), int(burst or 1)
+    return PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT)
+
+
+_buckets = {}
+
+
+def limiter_for(provider: str) -> TokenBucket:
+    """Return the process-wide bucket for `provider`, creating it on first use."""
+    bucket = _buckets.get(provider)
+    if bucket is None:
+        bucket = _buckets[provider] = TokenBucket(*_limit_for(provider))
+    return bucket
+
+
+def configure(provider: str, rate: float, burst: int) -> TokenBucket:
+    """Replace `provider`'s bucket with a fresh one (benchmarks, batch tuning)."""
+    bucket = _buckets[provider] = TokenBucket(rate, burst)
+    return bucket
+
+
+def retry_after_seconds(headers, default: float = 1.0) -> float:
+    """Read Retry-After / retry-after-ms from a response's headers."""
+    if headers is None:
+        return default
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return default
@@ -0,0 +1,336 @@
+"""
+Retries, hedging and circuit breaking for LLM calls.
+
+One `Resilience` policy wraps a provider call (sync or async) with:
+
+- jittered exponential backoff on transient failures (429, 5xx, timeouts,
+  dropped connections), never sleeping less than the provider's
+  Retry-After, and failing fast when that is longer than `max_delay`;
+- optional hedging: if an attempt is still running after the model's
+  observed p95 latency (or a fixed delay), a duplicate is sent and the
+  first answer wins. A few stuck requests dominate our tail latency, and
+  a hedge only costs a second call for the slowest ~5%;
+- a circuit breaker per model: after repeated transient failures the
+  model is skipped for a cool-down, and calls fail fast with
+  CircuitOpenError or go to a fallback model instead.
+
+The wrapped function receives the model to use, so a fallback is just a
+different argument. Used by codex_playground.call()/acall() and, via
+dependency injection, by GoogleAIStudioClient.
+
+Environment (codex_playground):
+    PLAYGROUND_RETRIES=5            attempts after the first
+    PLAYGROUND_HEDGE=p95 | seconds  enable hedging (adaptive or fixed delay)
+    PLAYGROUND_FALLBACK_MODEL=gpt-4o
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from ratelimit import retry_after_seconds
+from tracing import percentile
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_TRANSIENT_NAMES = ("Timeout", "Connect", "NetworkError")  # httpx, openai and builtin names
+
+
+class CircuitOpenError(RuntimeError):
+    """The model's breaker is open and no fallback is available."""
+
+    def __init__(self, model, retry_in):
+        super().__init__(f"circuit open for {model}; retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def classify(err):
+    """
+    Return (transient, retry_after) for an exception.
+
+    Transient means another attempt may succeed: throttling, server errors,
+    timeouts and connection failures. It is about the model's health; an
+    exception opts out of retries separately, with `err.retryable = False`
+    (e.g. a stream that already emitted tokens).
+    """
+    response = getattr(err, "response", None)
+    retry_after = retry_after_seconds(getattr(response, "headers", None), default=None)
+    status = getattr(err, "status_code", None) or getattr(response, "status_code", None)
+    if status is not None:
+        return status in TRANSIENT_STATUS or status >= 500, retry_after
+    if isinstance(err, (TimeoutError, ConnectionError)):
+        return True, retry_after
+    transient = any(part in cls.__name__ for cls in type(err).__mro__ for part in _TRANSIENT_NAMES)
+    return transient, retry_after
+
+
+def _incr(span, key):
+    if span is not None:
+        span[key] = span.get(key, 0) + 1
+
+
+class CircuitBreaker:
+    """
+    Closed → open after `failure_threshold` consecutive transient failures.
+    After `reset_timeout` seconds one probe is let through (half-open); its
+    outcome closes the breaker or re-opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        return max(0.0, self._opened_at + self.reset_timeout - self.clock())
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if self.retry_in() > 0:
+                    return False
+                self.state = "half_open"
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = self.clock()
+
+
+class Resilience:
+    """Retry/hedge/breaker policy shared by every call to a set of models."""
+
+    def __init__(self, retries=3, base_delay=0.5, max_delay=20.0, hedge=None,
+                 hedge_min_samples=20, failure_threshold=5, reset_timeout=30.0,
+                 fallbacks=None, seed=None, clock=time.monotonic):
+        """
+        Args:
+            retries: attempts after the first on transient failures
+            base_delay, max_delay: backoff window (full jitter, doubling per attempt)
+            hedge: None (off), "p95" (adaptive per model) or a delay in seconds
+            hedge_min_samples: successful calls to observe before adaptive hedging starts
+            failure_threshold, reset_timeout: circuit breaker settings, per model
+            fallbacks: model -> fallback model when the model's breaker is open
+            seed, clock: jitter seed and breaker clock (tests)
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.fallbacks = dict(fallbacks or {})
+        self._rng = random.Random(seed)
+        self._clock = clock
+        self._breakers = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # ── policy state ──
+
+    def breaker(self, model):
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout, self._clock)
+            return breaker
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential delay, never shorter than the provider's Retry-After."""
+        with self._lock:
+            delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def hedge_delay(self, model):
+        """Seconds to wait before hedging `model`, or None to not hedge (yet)."""
+        if not self.hedge:
+            return None
+        if self.hedge != "p95":
+            return float(self.hedge)
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return percentile(samples, 95)
+
+    def _observe(self, model, seconds):
+        with self._lock:
+            window = self._latencies.get(model)
+            if window is None:
+                window = self._latencies[model] = deque(maxlen=256)
+            window.append(seconds)
+
+    def _route(self, model, fallback, span):
+        """Pick the model for the next attempt: the primary, else its fallback, else fail fast."""
+        primary = self.breaker(model)
+        if primary.allow():
+            return model
+        fallback = fallback or self.fallbacks.get(model)
+        if fallback and fallback != model and self.breaker(fallback).allow():
+            _incr(span, "fallbacks")
+            return fallback
+        raise CircuitOpenError(model, primary.retry_in())
+
+    def _settle(self, model, err):
+        """
+        Feed an attempt's failure to the breaker; return (retry, retry_after).
+        A transient failure counts against the model even when it must not
+        be retried, and a Retry-After past max_delay is not waited out.
+        """
+        transient, retry_after = classify(err)
+        if transient:
+            self.breaker(model).record_failure()
+        else:
+            # The model answered, the request was bad: not the model's health.
+            self.breaker(model).record_success()
+        retry = transient and getattr(err, "retryable", True) is not False
+        return retry and (retry_after or 0.0) <= self.max_delay, retry_after
+
+    # ── sync ──
+
+    def call(self, model, fn, span=None, hedge=True, fallback=None):
+        """
+        Run `fn(model)` under the policy. `span` (a tracing span or dict)
+        gets "retries", "hedges" and "fallbacks" counters and the model that
+        answered. Pass hedge=False when duplicates would be visible, e.g.
+        streamed output.
+        """
+        for attempt in range(self.retries + 1):
+            target = self._route(model, fallback, span)
+            try:
+                result = self._hedged(target, fn, span) if hedge else self._timed(target, fn)
+            except Exception as err:
+                retry, retry_after = self._settle(target, err)
+                if not retry or attempt == self.retries:
+                    raise
+                _incr(span, "retries")
+                time.sleep(self.backoff(attempt, retry_after))
+                continue
+            self.breaker(target).record_success()
+            if span is not None:
+                span["model"] = target
+            return result
+
+    def _timed(self, model, fn):
+        started = time.perf_counter()
+        result = fn(model)
+        self._observe(model, time.perf_counter() - started)
+        return result
+
+    def _hedged(self, model, fn, span):
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self._timed(model, fn)
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="hedge")
+        pending = {self._executor.submit(self._timed, model, fn)}
+        done, pending = concurrent.futures.wait(pending, timeout=delay)
+        if not done:
+            _incr(span, "hedges")
+            pending.add(self._executor.submit(self._timed, model, fn))
+        # Threads cannot be cancelled: a losing attempt finishes in the background and is discarded.
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+    # ── async ──
+
+    async def acall(self, model, fn, span=None, hedge=True, fallback=None):
+        """Async call(): `fn(model)` returns an awaitable; losing hedges are cancelled."""
+        for attempt in range(self.retries + 1):
+            target = self._route(model, fallback, span)
+            try:
+                if hedge:
+                    result = await self._ahedged(target, fn, span)
+                else:
+                    result = await self._atimed(target, fn)
+            except Exception as err:
+                retry, retry_after = self._settle(target, err)
+                if not retry or attempt == self.retries:
+                    raise
+                _incr(span, "retries")
+                await asyncio.sleep(self.backoff(attempt, retry_after))
+                continue
+            self.breaker(target).record_success()
+            if span is not None:
+                span["model"] = target
+            return result
+
+    async def _atimed(self, model, fn):
+        started = time.perf_counter()
+        result = await fn(model)
+        self._observe(model, time.perf_counter() - started)
+        return result
+
+    async def _ahedged(self, model, fn, span):
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return await self._atimed(model, fn)
+        pending = {asyncio.ensure_future(self._atimed(model, fn))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                _incr(span, "hedges")
+                pending.add(asyncio.ensure_future(self._atimed(model, fn)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def from_env(retries=3, fallback_for=None):
+    """
+    Build the playground's policy from PLAYGROUND_RETRIES, PLAYGROUND_HEDGE
+    and PLAYGROUND_FALLBACK_MODEL (which applies to `fallback_for`).
+    """
+    hedge = os.getenv("PLAYGROUND_HEDGE") or None
+    if hedge and hedge != "p95":
+        hedge = float(hedge)
+    fallback = os.getenv("PLAYGROUND_FALLBACK_MODEL")
+    return Resilience(
+        retries=int(os.getenv("PLAYGROUND_RETRIES", retries)),
+        hedge=hedge,
+        fallbacks={fallback_for: fallback} if fallback and fallback_for else None,
+    )
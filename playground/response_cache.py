@@ -0,0 +1,152 @@
+"""
+Content-addressed response cache for playground LLM calls.
+
+Entries are keyed by a SHA-256 of the full request (model, messages,
+temperature, max_tokens) and live in a single SQLite file. The store is
+capped by total response bytes; the least recently used entries are
+evicted first.
+
+Opt in with environment variables:
+    PLAYGROUND_CACHE=.playground_cache.sqlite   enable the cache at this path
+    PLAYGROUND_CACHE_MODE=replay                read-only; a miss raises CacheMiss
+    PLAYGROUND_CACHE_MAX_BYTES=268435456        size cap (default 256 MiB)
+
+Sampling runs at temperature 0.8, so a hit replays one earlier sample rather
+than a fresh one. That is the point while iterating on Loom or Seer prompts
+with unchanged rounds, but leave the cache off for real experiments.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MODES = ("rw", "replay")
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request has no cached response."""
+
+
+def request_key(params):
+    """SHA-256 over the canonical JSON of the request parameters."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of response texts.
+
+    Safe to share across threads and asyncio tasks; every statement is a
+    single local SQLite operation, so lookups cost microseconds.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, mode="rw"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        uri = f"file:{path}?mode=ro" if mode == "replay" else f"file:{path}"
+        self._db = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        if mode != "replay":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(last_used)")
+        total, tick = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM responses"
+        ).fetchone()
+        self._total_bytes = total
+        self._tick = tick
+
+    def _next_tick(self):
+        self._tick += 1
+        return self._tick
+
+    def lookup(self, params):
+        """
+        Return the cached response for `params`, or None on a miss.
+
+        In replay mode a miss raises CacheMiss instead, so a replayed run
+        can never fall through to the network.
+        """
+        key = request_key(params)
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                if self.mode == "replay":
+                    raise CacheMiss(key)
+                return None
+            self.hits += 1
+            if self.mode != "replay":
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._next_tick(), key))
+            return row[0]
+
+    def store(self, params, response):
+        """Cache `response` for `params`, evicting LRU entries past the size cap."""
+        if self.mode == "replay" or response is None:
+            return
+        key = request_key(params)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, response, size, self._next_tick()),
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            victims = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not victims:
+                break
+            for key, size in victims:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def from_env():
+    """Build the cache configured by PLAYGROUND_CACHE*, or None when it is off."""
+    path = os.getenv("PLAYGROUND_CACHE")
+    if not path:
+        return None
+    return ResponseCache(
+        path,
+        max_bytes=int(os.getenv("PLAYGROUND_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        mode=os.getenv("PLAYGROUND_CACHE_MODE", "rw"),
+    )
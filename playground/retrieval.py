@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Bean retrieval for grounding Spirit prompts.
+
+BM25 over the bean corpus (bean_store.py). The index is built once from
+the canonical bean sections and kept as NumPy arrays in compressed sparse
+column form: for each term, the beans containing it and their
+precomputed BM25 weights. Scoring a query gathers the postings of its
+terms and sums them per bean with one np.bincount, so a lookup never
+scans the corpus text.
+
+Building takes a few milliseconds for the whole corpus, so the index is
+built once per process, when grounding is first set up, rather than
+persisted.
+
+Grounding picks the beans for one Spirit on one topic:
+
+1. the Spirit's anchor bean comes first;
+2. then the top-k beans for the topic, with the Spirit's own Soul Code as
+   a lightly weighted second query;
+3. everything is packed into a token budget (compaction.py estimates).
+
+Results are cached per (spirit, topic, anchor, Soul Code), so every round
+of a negotiation reuses one lookup and keeps a byte-identical system
+prompt, while an edited Soul Code or anchor is looked up again.
+
+Usage:
+    python playground/retrieval.py "Should the Village onboard tenants early?" -k 5
+"""
+
+import argparse
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bean_store import ROOT, Bean, BeanStore
+from compaction import estimate_tokens, fit
+
+K1 = 1.2
+B = 0.75
+CONTEXT_WEIGHT = 0.3  # weight of Soul Code terms relative to topic terms
+DEFAULT_K = 4
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been before being between both but by can
+could did do does doing for from had has have having he her here his how i if in into is it its
+just me more most my no not now of on once only or other our out over own same she should so some
+such than that the their them then there these they this those through to too under until up very
+was we were what when where which while who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _body(section: str) -> str:
+    """A bean section without its "## [BEAN #ID] Title" heading line."""
+    return section.split("\n", 1)[1].strip() if "\n" in section else ""
+
+
+class BeanIndex:
+    """BM25 postings over the canonical beans of a BeanStore."""
+
+    def __init__(self, store: BeanStore):
+        self.store = store
+        self.beans: List[Bean] = sorted(store.beans(), key=lambda b: b.bean_id)
+        self._rows = {b.bean_id: i for i, b in enumerate(self.beans)}
+        self._build()
+
+    def _build(self) -> None:
+        counts = [Counter(tokenize(f"{b.title} {_body(self.store.section(b))}")) for b in self.beans]
+        vocab = sorted({t for c in counts for t in c})
+        self.vocab: Dict[str, int] = {t: i for i, t in enumerate(vocab)}
+        n = len(self.beans)
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float64)
+        avg = lengths.mean() if n else 0.0
+        # COO triples, then sorted by term into CSC.
+        docs = np.fromiter((d for d, c in enumerate(counts) for _ in c), dtype=np.int32)
+        terms = np.fromiter((self.vocab[t] for c in counts for t in c), dtype=np.int32)
+        tf = np.fromiter((f for c in counts for f in c.values()), dtype=np.float64)
+        order = np.lexsort((docs, terms))
+        docs, terms, tf = docs[order], terms[order], tf[order]
+        df = np.bincount(terms, minlength=len(vocab)).astype(np.float64)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * lengths[docs] / avg) if n else tf
+        self.indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self.indices = docs
+        self.weights = idf[terms] * tf * (K1 + 1) / (tf + norm)
+
+    def scores(self, query: str, context: str = "") -> np.ndarray:
+        """BM25 score of every bean (in self.beans order) for `query` plus lightly weighted `context`."""
+        wanted = Counter(tokenize(query))
+        for term, count in Counter(tokenize(context)).items():
+            wanted[term] += CONTEXT_WEIGHT * count
+        cols = [(self.vocab[t], w) for t, w in wanted.items() if t in self.vocab]
+        if not cols:
+            return np.zeros(len(self.beans))
+        starts = self.indptr[[c for c, _ in cols]]
+        ends = self.indptr[[c + 1 for c, _ in cols]]
+        picks = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        qweights = np.repeat([w for _, w in cols], ends - starts)
+        return np.bincount(self.indices[picks], weights=self.weights[picks] * qweights,
+                           minlength=len(self.beans))
+
+    def search(self, query: str, k: int = DEFAULT_K, context: str = "",
+               exclude=()) -> List[Tuple[Bean, float]]:
+        """The top `k` beans with a positive score, best first."""
+        scores = self.scores(query, context)
+        for bean_id in exclude:
+            row = self._rows.get(bean_id)
+            if row is not None:
+                scores[row] = 0.0
+        k = min(k, int(np.count_nonzero(scores > 0)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.beans[i], float(scores[i])) for i in top]
+
+
+class Grounding:
+    """Per-(spirit, topic, anchor, soul) cached bean context for system prompts."""
+
+    def __init__(self, index: BeanIndex, k: int = DEFAULT_K, budget: int = 300):
+        self.index = index
+        self.k = k
+        self.budget = budget
+        self._cache: Dict[Tuple[str, str, Optional[str], str], Tuple[List[str], str]] = {}
+
+    def select(self, spirit: str, topic: str, anchor: Optional[str] = None,
+               soul: str = "") -> Tuple[List[str], str]:
+        """
+        (bean IDs, context block) grounding `spirit` on `topic`, within the
+        token budget. The anchor bean leads. Cached per (spirit, topic,
+        anchor, soul), so a hot-reloaded Soul Code (spirit_registry.py) is
+        grounded afresh.
+        """
+        key = (spirit, topic, anchor, soul)  # str hashes are cached, so long souls key cheaply
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        store = self.index.store
+        picked = [store.get(anchor)] if anchor and anchor in store else []
+        picked += [b for b, _ in self.index.search(topic, self.k, soul, exclude=[anchor] if anchor else ())]
+        ids, parts, used = [], [], 0
+        for bean in picked:
+            block = f"[{bean.bean_id}] {bean.title}\n{_body(store.section(bean))}"
+            cost = estimate_tokens(block) + 1
+            if used + cost > self.budget:
+                if parts:
+                    continue  # a smaller bean further down may still fit
+                block = fit(block, self.budget)
+                cost = self.budget
+            ids.append(bean.bean_id)
+            parts.append(block)
+            used += cost
+        text = "\n\n".join(parts)
+        self._cache[key] = (ids, text)
+        return ids, text
+
+    def system_prompt(self, spirit: str, system: str, topic: str, anchor: Optional[str] = None) -> Tuple[List[str], str]:
+        """`system` with the grounding block appended, and the bean IDs used."""
+        ids, text = self.select(spirit, topic, anchor, soul=system)
+        if not text:
+            return [], system
+        return ids, f"{system}\n\nGrounding beans (cite their IDs as anchors):\n\n{text}"
+
+
+def from_env(budget: int, k: Optional[int] = None) -> Optional[Grounding]:
+    """
+    Grounding over the repository's beans/, or None when disabled
+    (budget 0, PLAYGROUND_GROUNDING_K=0) or when there is no corpus.
+    """
+    k = int(os.getenv("PLAYGROUND_GROUNDING_K", DEFAULT_K)) if k is None else k
+    if not budget or not k or not os.path.isdir(os.path.join(ROOT, "beans")):
+        return None
+    store = BeanStore()
+    if not len(store):
+        return None
+    return Grounding(BeanIndex(store), k=k, budget=budget)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the bean corpus with BM25")
+    parser.add_argument("query")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    args = parser.parse_args()
+    with BeanStore() as store:
+        index = BeanIndex(store)
+        for bean, score in index.search(args.query, args.k):
+            print(f"{score:6.2f}  {bean.bean_id:<18} {bean.title}")
+
+
+if __name__ == "__main__":
+    main()
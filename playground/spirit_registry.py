@@ -0,0 +1,171 @@
+"""
+Spirit registry: Soul Codes loaded from spirits/*.json, compiled once.
+
+The Spirit files are the single source of each Soul Code. A system prompt
+is rendered from identity / principles / constraints / negotiation_style
+exactly as provider.js send() renders it, so the Python and Node engines
+send byte-identical prefixes.
+
+Compiled prompts are cached by the SHA-256 of the file's bytes. A prompt
+is rendered again only when a file's content actually changes, and
+restoring a file's earlier content hits the cache again. The rendered
+text depends on nothing but the Soul Code: no timestamps, no dict
+ordering, no per-call state. The prefix therefore stays byte-stable
+across calls and runs, which is what provider-side prompt caching keys
+on. Per-topic context such as grounding (retrieval.py) is appended after
+it, never inside it.
+
+Hot reload: lookups re-stat the directory at most every `check_interval`
+seconds. A file whose mtime or size moved is re-hashed, and re-parsed
+only if its hash changed. Files added or removed are picked up the same
+way.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+SPIRITS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spirits")
+
+
+def load_spirit(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_spirits(paths=None) -> Dict[str, Dict]:
+    """Load Spirit files (default: every spirits/*.json), keyed by Spirit name."""
+    paths = paths or sorted(glob.glob(os.path.join(SPIRITS_DIR, "*.json")))
+    spirits = {}
+    for path in paths:
+        spirit = load_spirit(path)
+        if spirit["spirit"] in spirits:
+            raise ValueError(f"{path}: duplicate Spirit {spirit['spirit']!r}")
+        spirits[spirit["spirit"]] = spirit
+    return spirits
+
+
+def system_prompt(spirit: Dict) -> str:
+    """Render a Spirit's Soul Code the way provider.js send() does."""
+    soul = spirit["soul_code"]
+    principles = "\n".join(f"- {p}" for p in soul["principles"])
+    constraints = "\n".join(f"- {c}" for c in soul["constraints"])
+    return (
+        f"You are {soul['identity']}\n\n"
+        f"Core principles:\n{principles}\n\n"
+        f"Hard constraints (never violate):\n{constraints}\n\n"
+        f"Negotiation style: {soul['negotiation_style']}"
+    )
+
+
+class _Entry:
+    __slots__ = ("path", "mtime_ns", "size", "sha256", "spirit")
+
+    def __init__(self, path, mtime_ns, size, sha256, spirit):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.spirit = spirit
+
+
+class SpiritRegistry:
+    """Spirits by name, hot-reloaded from a directory of JSON files. Thread-safe."""
+
+    def __init__(self, directory: str = SPIRITS_DIR, check_interval: float = 1.0):
+        """
+        Initialize the registry and load every Spirit file.
+
+        Args:
+            directory: Directory of Spirit JSON files
+            check_interval: Seconds between checks for changed files (0 checks on every lookup)
+        """
+        self.directory = directory
+        self.check_interval = check_interval
+        self.stats = {"reloads": 0, "renders": 0, "hits": 0}
+        self._entries: Dict[str, _Entry] = {}   # path -> entry
+        self._by_name: Dict[str, _Entry] = {}
+        self._prompts: Dict[str, str] = {}      # file sha256 -> compiled system prompt
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Pick up added, changed and removed files now. Returns True if anything changed."""
+        with self._lock:
+            self._checked = time.monotonic()
+            changed = False
+            seen = set()
+            with os.scandir(self.directory) as it:
+                files = sorted((e for e in it if e.name.endswith(".json") and e.is_file()),
+                               key=lambda e: e.name)
+            for item in files:
+                seen.add(item.path)
+                st = item.stat()
+                entry = self._entries.get(item.path)
+                if entry and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                    continue
+                with open(item.path, "rb") as f:
+                    data = f.read()
+                sha = hashlib.sha256(data).hexdigest()
+                if entry and entry.sha256 == sha:
+                    entry.mtime_ns, entry.size = st.st_mtime_ns, st.st_size
+                    continue
+                self._entries[item.path] = _Entry(item.path, st.st_mtime_ns, st.st_size, sha,
+                                                  json.loads(data.decode("utf-8")))
+                changed = True
+            for path in [p for p in self._entries if p not in seen]:
+                del self._entries[path]
+                changed = True
+            if changed:
+                self.stats["reloads"] += 1
+                by_name = {}
+                for entry in self._entries.values():
+                    name = entry.spirit["spirit"]
+                    if name in by_name:
+                        raise ValueError(f"{entry.path}: duplicate Spirit {name!r}")
+                    by_name[name] = entry
+                self._by_name = by_name
+            return changed
+
+    def _entry(self, name: str) -> _Entry:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.refresh()
+        entry = self._by_name.get(name)
+        if entry is None:
+            raise KeyError(f"unknown Spirit {name!r} (have: {', '.join(sorted(self._by_name))})")
+        return entry
+
+    def get(self, name: str) -> Dict:
+        """The parsed Spirit file."""
+        return self._entry(name).spirit
+
+    def system_prompt(self, name: str) -> str:
+        """The compiled system prompt, rendered once per distinct file content."""
+        entry = self._entry(name)
+        prompt = self._prompts.get(entry.sha256)
+        if prompt is None:
+            prompt = self._prompts[entry.sha256] = system_prompt(entry.spirit)
+            self.stats["renders"] += 1
+        else:
+            self.stats["hits"] += 1
+        return prompt
+
+    def anchor(self, name: str) -> Optional[str]:
+        return self._entry(name).spirit.get("anchor")
+
+    def names(self) -> List[str]:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.refresh()
+        return sorted(self._by_name)
+
+    def spirits(self) -> Dict[str, Dict]:
+        """Every Spirit, keyed by name (the shape load_spirits() returns)."""
+        return {name: self.get(name) for name in self.names()}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names()
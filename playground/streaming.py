@@ -0,0 +1,138 @@
+"""
+Token streaming helpers for the Python playground.
+
+Boolean and Roux stream concurrently, but a terminal (or the artifact
+file) can only show one of them at a time. A StreamGroup keeps their
+output in a fixed order: the first channel prints live, later channels
+buffer until everything ahead of them has finished, then flush and go
+live themselves.
+"""
+
+import sys
+import time
+
+
+def _sink(write, flush, prefix):
+    pending = [prefix] if prefix else []
+
+    def sink(text):
+        if pending:
+            text = pending.pop() + text
+        write(text)
+        flush()
+    return sink
+
+
+def stdout_sink(prefix=""):
+    """Sink that writes to stdout, emitting `prefix` before the first text."""
+    return _sink(sys.stdout.write, sys.stdout.flush, prefix)
+
+
+def file_sink(f, prefix=""):
+    """Sink that writes to an open file, emitting `prefix` before the first text."""
+    return _sink(f.write, f.flush, prefix)
+
+
+class StreamChannel:
+    """One Spirit's token stream inside a StreamGroup."""
+
+    def __init__(self, group, sinks):
+        self._group = group
+        self._sinks = sinks
+        self._buffer = []
+        self.done = False
+
+    def write(self, text):
+        if self._group.is_live(self):
+            for sink in self._sinks:
+                sink(text)
+        else:
+            self._buffer.append(text)
+
+    def _flush(self):
+        if self._buffer:
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            for sink in self._sinks:
+                sink(text)
+
+    def close(self):
+        self.done = True
+        self._group._advance()
+
+
+class StreamGroup:
+    """Orders the output of concurrent streams; see module docstring."""
+
+    def __init__(self):
+        self._channels = []
+        self._live = 0
+
+    def channel(self, *sinks):
+        ch = StreamChannel(self, list(sinks))
+        self._channels.append(ch)
+        return ch
+
+    def is_live(self, channel):
+        return self._live < len(self._channels) and self._channels[self._live] is channel
+
+    def _advance(self):
+        while self._live < len(self._channels):
+            ch = self._channels[self._live]
+            ch._flush()
+            if not ch.done:
+                return
+            self._live += 1
+
+
+class StreamMetrics:
+    """
+    Time-to-first-token and throughput for one streamed call.
+
+    Measured from when the call was issued, including any rate-limit wait,
+    because that is the delay the operator actually sees. Tokens are
+    counted as stream chunks, which is one token per chunk for OpenAI.
+    """
+
+    def __init__(self, spirit, round_num):
+        self.spirit = spirit
+        self.round = round_num
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.tokens = 0
+
+    def wrap(self, on_token):
+        """Return an on_token callback that records timing, then forwards."""
+        def record(text):
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.tokens += 1
+            on_token(text)
+        return record
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def ttft(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def tokens_per_sec(self):
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        window = self.finished_at - self.first_token_at
+        return self.tokens / window if window > 0 else None
+
+    def as_dict(self):
+        return {
+            "spirit": self.spirit,
+            "round": self.round,
+            "ttft_s": None if self.ttft is None else round(self.ttft, 3),
+            "tokens": self.tokens,
+            "tokens_per_sec": None if self.tokens_per_sec is None else round(self.tokens_per_sec, 1),
+            "elapsed_s": None if self.finished_at is None else round(self.finished_at - self.started, 3),
+        }
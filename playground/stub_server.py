@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI/Gemini-compatible stub server for exercising the playground
+offline.
+
+Serves POST /v1/chat/completions (plain or streamed), Gemini's
+POST /v1beta/models/{model}:generateContent and GET /v1beta/models,
+tuning jobs (POST /v1beta/tunedModels, polled through
+GET /v1beta/tunedModels/{id}/operations/{op}), and an OPVS resonance
+sink (POST /opvs/resonance) with configurable latency
+distributions, token rate and injected 429s/503s, so the async engine,
+its rate limiter, the AI Studio clients and the benchmarks run without a
+real provider or key. Connections are HTTP/1.1 keep-alive, and
+stats["connections"] counts how many clients actually opened.
+
+Usage:
+    python playground/stub_server.py --port 8765 --latency 0.5 --error-rate 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub \\
+        python playground/codex_playground.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class StubConfig:
+    """Knobs for the stub's behaviour. Shared by all handler threads."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 max_concurrency=0, retry_after=1.0, seed=None, token_rate=0.0,
+                 distribution="uniform", server_error_rate=0.0, tuning_time=5.0,
+                 tuning_error_rate=0.0):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency              # mean seconds per request (time to first token when streaming)
+        self.jitter = jitter                # spread: uniform half-width, normal sd, lognormal sigma
+        self.distribution = distribution    # shape of the latency around `latency`
+        self.error_rate = error_rate        # probability of a random 429
+        self.server_error_rate = server_error_rate  # probability of a random 503
+        self.max_concurrency = max_concurrency  # 429 when more requests are in flight (0 = unlimited)
+        self.retry_after = retry_after      # seconds sent in the Retry-After header
+        self.token_rate = token_rate        # generated tokens/sec after the first (0 = no delay)
+        self.tuning_time = tuning_time      # mean seconds a tuning job runs (exponentially distributed)
+        self.tuning_error_rate = tuning_error_rate  # probability a tuning job ends in an error
+        self.operations = {}                # operation name -> (started, duration, fails)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0, "connections": 0,
+                      "tuning_jobs": 0, "polls": 0}
+
+    def sample_latency(self):
+        with self.lock:
+            r, mean, spread = self.random, self.latency, self.jitter
+            if self.distribution == "fixed":
+                value = mean
+            elif self.distribution == "uniform":
+                value = mean + r.uniform(-spread, spread)
+            elif self.distribution == "normal":
+                value = r.gauss(mean, spread)
+            elif self.distribution == "lognormal":
+                # Mean-preserving lognormal: a long right tail of stuck requests.
+                value = mean * r.lognormvariate(-spread * spread / 2, spread) if mean > 0 else 0.0
+            else:
+                value = r.expovariate(1.0 / mean) if mean > 0 else 0.0
+            return max(0.0, value)
+
+    def start_tuning(self):
+        """Register a tuning job and return its long-running operation name."""
+        with self.lock:
+            self.stats["tuning_jobs"] += 1
+            n = self.stats["tuning_jobs"]
+            duration = self.random.expovariate(1.0 / self.tuning_time) if self.tuning_time > 0 else 0.0
+            fails = self.random.random() < self.tuning_error_rate
+            name = f"tunedModels/stub-tuned-{n}/operations/op-{n}"
+            self.operations[name] = (time.monotonic(), duration, fails)
+            return name
+
+    def operation(self, name, total_steps=100):
+        """Current state of a tuning operation, or None if unknown."""
+        with self.lock:
+            self.stats["polls"] += 1
+            entry = self.operations.get(name)
+        if entry is None:
+            return None
+        started, duration, fails = entry
+        elapsed = time.monotonic() - started
+        done = elapsed >= duration
+        steps = total_steps if done else int(total_steps * elapsed / duration)
+        op = {
+            "name": name,
+            "metadata": {
+                "@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.CreateTunedModelMetadata",
+                "tunedModel": name.split("/operations/", 1)[0],
+                "totalSteps": total_steps,
+                "completedSteps": steps,
+            },
+            "done": done,
+        }
+        if done and fails:
+            op["error"] = {"code": 13, "message": "stub tuning failed"}
+        elif done:
+            op["response"] = {"@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.TunedModel",
+                              "name": op["metadata"]["tunedModel"], "state": "ACTIVE"}
+        return op
+
+    def generation_time(self, tokens):
+        return tokens / self.token_rate if self.token_rate > 0 else 0.0
+
+    def admit(self):
+        """Count the request in; return None to serve it, or the error status to send."""
+        with self.lock:
+            self.stats["requests"] += 1
+            if ((self.max_concurrency and self.in_flight >= self.max_concurrency)
+                    or self.random.random() < self.error_rate):
+                self.stats["rate_limited"] += 1
+                return 429
+            if self.random.random() < self.server_error_rate:
+                self.stats["server_errors"] += 1
+                return 503
+            self.in_flight += 1
+            return None
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.stats["ok"] += 1
+
+
+def _count_tokens(text):
+    # Whitespace words are close enough for a stub's usage block.
+    return len(text.split())
+
+
+def completion_text(model, messages):
+    """Deterministic reply derived from the request, so cached runs are comparable."""
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    first_line = user.strip().splitlines()[0] if user.strip() else ""
+    return (
+        f"[stub:{model}] {first_line}\n"
+        "POSITION However, the proposal still requires a third option.\n"
+        "SYNTHESIS We agree the system, not the person, must change."
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pools are exercised
+
+    def setup(self):
+        super().setup()
+        with self.config.lock:
+            self.config.stats["connections"] += 1
+
+    def log_message(self, fmt, *args):  # keep the console quiet
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, model, text, usage):
+        """Server-sent events in the OpenAI chat.completion.chunk format, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")  # no Content-Length: the body ends with the connection
+        self.end_headers()
+        self.close_connection = True
+        created = int(time.time())
+        delay = 1.0 / self.config.token_rate if self.config.token_rate > 0 else 0.0
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i and delay:
+                time.sleep(delay)
+            chunk = {
+                "id": "chatcmpl-stub-stream",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": "stop" if i == len(words) - 1 else None,
+                }],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        tail = {"id": "chatcmpl-stub-stream", "object": "chat.completion.chunk",
+                "created": created, "model": model, "choices": [], "usage": usage}
+        self.wfile.write(f"data: {json.dumps(tail)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_error(self, status, gemini):
+        config = self.config
+        headers = {"Retry-After": f"{config.retry_after:g}"}
+        if gemini:
+            code = "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"
+            payload = {"error": {"code": status, "message": f"stub {code.lower()}", "status": code}}
+        else:
+            kind = "rate_limit_error" if status == 429 else "server_error"
+            payload = {"error": {"message": f"stub {kind}", "type": kind}}
+        self._send_json(status, payload, headers)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if not path.endswith("/models") and "/operations/" not in path:
+            self._send_json(404, {"error": {"message": f"no route for {self.path}"}})
+            return
+        if not self.headers.get("x-goog-api-key") and "key=" not in self.path:
+            self._send_json(401, {"error": {"code": 401, "message": "API key not valid", "status": "UNAUTHENTICATED"}})
+            return
+        if "/operations/" in path:
+            op = self.config.operation(path.split("/", 2)[-1])
+            if op is None:
+                self._send_json(404, {"error": {"code": 404, "message": "operation not found", "status": "NOT_FOUND"}})
+            else:
+                self._send_json(200, op)
+            return
+        self._send_json(200, {"models": [{"name": "models/gemini-pro", "displayName": "Gemini Pro (stub)"}]})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            handler = self._chat_completions
+        elif path.endswith(":generateContent"):
+            handler = self._generate_content
+        elif path.endswith("/tunedModels"):
+            handler = self._create_tuned_model
+        elif path.endswith("/opvs/resonance"):
+            handler = self._resonance
+        else:
+            self._send_json(404, {"error": {"message": f"no route for {self.path}"}})
+            return
+        request = self._read_json()
+        config = self.config
+        status = config.admit()
+        if status is not None:
+            self._send_error(status, gemini=handler in (self._generate_content, self._create_tuned_model))
+            return
+        try:
+            time.sleep(config.sample_latency())
+            handler(path, request)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. a cancelled hedge)
+        finally:
+            config.release()
+
+    def _chat_completions(self, path, request):
+        model = request.get("model", "stub")
+        messages = request.get("messages", [])
+        text = completion_text(model, messages)
+        prompt_tokens = sum(_count_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = _count_tokens(text)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if request.get("stream"):
+            self._send_stream(model, text, usage)
+            return
+        time.sleep(self.config.generation_time(completion_tokens))
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{self.config.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _generate_content(self, path, request):
+        """Gemini generateContent: POST /v1beta/models/{model}:generateContent."""
+        model = path.rsplit("/", 1)[-1].split(":", 1)[0]
+        prompt = " ".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        text = completion_text(model, [{"role": "user", "content": prompt}])
+        prompt_tokens = _count_tokens(prompt)
+        completion_tokens = _count_tokens(text)
+        time.sleep(self.config.generation_time(completion_tokens))
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": completion_tokens,
+                "totalTokenCount": prompt_tokens + completion_tokens,
+            },
+            "modelVersion": model,
+        })
+
+    def _create_tuned_model(self, path, request):
+        """Gemini tunedModels.create: returns the long-running operation to poll."""
+        self._send_json(200, self.config.operation(self.config.start_tuning()))
+
+    def _resonance(self, path, request):
+        """OPVS resonance sink: accepts one event or {"events": [...]}."""
+        events = request.get("events", [request])
+        self._send_json(200, {"accepted": len(events)})
+
+
+def serve(host="127.0.0.1", port=0, config=None):
+    """
+    Start the stub in a daemon thread.
+
+    Returns the running server; `server.server_address` holds the bound
+    port (pass port=0 to pick a free one) and `server.shutdown()` stops it.
+    """
+    handler = type("BoundStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI/Gemini-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency spread (see --distribution)")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a random 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="probability of a random 503")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="429 above this many in-flight requests")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="generated tokens/sec (0 = no delay)")
+    parser.add_argument("--tuning-time", type=float, default=5.0, help="mean seconds per tuning job")
+    parser.add_argument("--tuning-error-rate", type=float, default=0.0, help="probability a tuning job fails")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+        error_rate=args.error_rate, server_error_rate=args.server_error_rate,
+        max_concurrency=args.max_concurrency, retry_after=args.retry_after,
+        token_rate=args.token_rate, tuning_time=args.tuning_time,
+        tuning_error_rate=args.tuning_error_rate, seed=args.seed,
+    )
+    server = serve(args.host, args.port, config)
+    print(f"Stub LLM listening on {base_url(server)}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stats: {json.dumps(config.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Playground modules import each other as top-level modules, as the scripts do."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# codex_playground builds its OpenAI clients at import; no request is ever sent.
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from artifact_store import ArtifactStore, import_transcript, sections
+
+POSITION = "## POSITION\n" + "Tenants arrive after the core is stable. " * 4 + "\n[BEAN #PHIL-001] " + "x" * 80
+
+
+def result(topic="Village onboarding", **extra):
+    return {"topic": topic, "model": "o3", "finals": {"Boolean": POSITION, "Roux": POSITION},
+            "rounds": [{"Boolean": POSITION}], **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ArtifactStore(str(tmp_path / "artifacts"), codec="gzip") as store:
+        yield store
+
+
+def test_sections_join_back_exactly():
+    text = "intro\n# One\nbody\n## Two\n[BEAN #A-1] bean\ntail"
+    assert "".join(sections(text)) == text
+    assert sections(text)[1].startswith("# One")
+
+
+def test_round_trip(store):
+    run_id = store.put(result(), ts="2026-02-01T12:00:00")
+    record = store.get(run_id)
+    assert record["result"] == result()
+    assert record["topic"] == "Village onboarding" and record["model"] == "o3"
+    assert record["ts"] == datetime(2026, 2, 1, 12, tzinfo=timezone.utc).timestamp()  # naive means UTC
+    assert store.get("missing") is None
+
+
+def test_repeated_sections_are_stored_once(store):
+    store.put(result())
+    first = store.stats()
+    store.put(result(topic="Another topic"))
+    second = store.stats()
+    assert second["sections"] == first["sections"] == len(sections(POSITION))
+    assert second["section_refs"] == 2 * first["section_refs"]
+    assert second["unique_section_bytes"] == first["unique_section_bytes"]
+
+
+def test_put_is_idempotent_by_run_id(store):
+    store.put(result(), run_id="r1")
+    size = store.stats()["stored_bytes"]
+    assert store.put(result(topic="changed"), run_id="r1") == "r1"
+    assert store.stats()["runs"] == 1 and store.stats()["stored_bytes"] == size
+    assert store.get("r1")["topic"] == "Village onboarding"
+
+
+def test_import_twice_is_a_no_op(store, tmp_path):
+    path = tmp_path / "run.md"
+    path.write_text("**Topic:** Village onboarding\n**Model:** o3\n**Started:** 2026-02-01\n\n"
+                    + POSITION, encoding="utf-8")
+    first = import_transcript(store, str(path))
+    assert import_transcript(store, str(path)) == first
+    assert store.stats()["runs"] == 1
+    assert store.runs(model="o3", since="2026-01-31")[0].run_id == first
+
+
+def test_filters(store):
+    store.put(result(topic="Village onboarding"), ts="2026-01-01")
+    store.put(result(topic="Seer audit"), ts="2026-03-01")
+    assert [r.topic for r in store.runs(topic_like="village")] == ["Village onboarding"]
+    assert [r.topic for r in store.runs(since="2026-02-01")] == ["Seer audit"]
+    assert [r.topic for r in store.runs(until="2026-02-01")] == ["Village onboarding"]
+    assert [rec["topic"] for rec in store.scan(topic="Seer audit")] == ["Seer audit"]
+
+
+def test_reopened_store_reads_and_appends(tmp_path):
+    root = str(tmp_path / "artifacts")
+    with ArtifactStore(root, codec="gzip") as store:
+        first = store.put(result())
+    with ArtifactStore(root, codec="gzip") as store:
+        second = store.put(result(topic="Another topic"))
+        assert store.get(first)["result"] == result()
+        assert store.get(second)["result"]["topic"] == "Another topic"
+        assert store.stats()["sections"] == len(sections(POSITION))
+
+
+def test_concurrent_readers_and_writer(store):
+    ids = [store.put(result(topic=f"t{i}", n=i)) for i in range(5)]
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                for i, run_id in enumerate(ids):
+                    assert store.get(run_id)["result"]["n"] == i
+        except Exception as err:  # surfaced below
+            errors.append(err)
+
+    def write():
+        try:
+            for i in range(20):
+                store.put(result(topic=f"w{i}", n=i))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert store.stats()["runs"] == 25
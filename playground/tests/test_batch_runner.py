@@ -0,0 +1,43 @@
+import asyncio
+import io
+import json
+import logging
+
+import batch_runner
+import codex_playground
+
+
+def test_bad_lines_become_error_rows(tmp_path, monkeypatch, caplog):
+    topics = tmp_path / "topics.jsonl"
+    topics.write_text('{"id": "a", "topic": "First"}\n'
+                      '{"id": "b"}\n'
+                      'not json\n'
+                      '\n'
+                      '{"topic": "Second"}\n', encoding="utf-8")
+
+    async def negotiate(topic, **kwargs):
+        if topic == "Second":
+            raise RuntimeError("upstream")
+        return {"topic": topic}
+
+    monkeypatch.setattr(codex_playground, "negotiate", negotiate)
+    out = io.StringIO()
+    caplog.set_level(logging.INFO, logger=batch_runner.log.name)
+    stats = asyncio.run(batch_runner.run_batch(batch_runner.read_topics(str(topics)), out, concurrency=2))
+    rows = {row["id"]: row for row in map(json.loads, out.getvalue().splitlines())}
+
+    assert stats == {"ok": 1, "failed": 3}
+    assert rows["a"]["topic"] == "First" and "error" not in rows["a"]
+    assert "missing 'topic'" in rows["b"]["error"]
+    assert "invalid JSON" in rows["line-3"]["error"]
+    assert rows[batch_runner.topic_id({"topic": "Second"})]["error"] == "RuntimeError: upstream"
+    assert sorted(r.getMessage().split()[1] for r in caplog.records) == ["FAILED"] * 3 + ["done"]
+
+
+def test_completed_ids_skip_failures_and_torn_lines(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text('{"id": "a"}\n{"id": "b", "error": "x"}\n{"id": "c"', encoding="utf-8")
+    assert batch_runner.completed_ids(str(results)) == {"a"}
+    with batch_runner.open_results(str(results)) as out:
+        out.write('{"id": "d"}\n')
+    assert batch_runner.completed_ids(str(results)) == {"a", "d"}
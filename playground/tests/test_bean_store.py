@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from bean_store import BeanStore
+
+PHILOSOPHY = """# Philosophy
+
+## [BEAN #PHIL-001] First Principle
+The first principle.
+
+## [BEAN #PHIL-002] Second Principle
+The second principle.
+
+# Appendix
+Not part of a bean.
+"""
+
+ARK = """# Ark
+
+### [BEAN #PHIL-001] First Principle (consolidated)
+A copy in the Ark.
+"""
+
+
+def write(root, rel, text, mtime_ns=None):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def root(tmp_path):
+    write(tmp_path, "beans/00_Philosophy.md", PHILOSOPHY, 1_000_000_000)
+    write(tmp_path, "beans/06_Ark.md", ARK, 1_000_000_000)
+    write(tmp_path, "beans/_sources.json", json.dumps(
+        {"beans": {"PHIL-001": {"source": "beans/00_Philosophy.md", "layer": 0, "title": "First"}}}))
+    return str(tmp_path)
+
+
+def store(root):
+    return BeanStore(root, os.path.join(root, "index.json"))
+
+
+def test_sections_resolve_to_their_declared_source(root):
+    with store(root) as s:
+        assert len(s) == 2
+        assert s.content("phil-001") == "## [BEAN #PHIL-001] First Principle\nThe first principle."
+        assert s.content("PHIL-002").endswith("The second principle.")  # ends at "# Appendix"
+        assert s.get("PHIL-001").title == "First"
+        assert [b.path for b in s.locations("PHIL-001")] == ["beans/00_Philosophy.md", "beans/06_Ark.md"]
+        assert s.content("PHIL-404") is None
+
+
+def test_unchanged_files_are_not_read_again(root):
+    with store(root):
+        pass
+    with store(root) as s:
+        assert s.stats == {"parsed": 0, "rehashed": 0, "unchanged": 2, "removed": 0}
+        assert s.content("PHIL-002").endswith("The second principle.")
+
+
+def test_touched_file_is_rehashed_not_reparsed(root):
+    with store(root) as s:
+        os.utime(os.path.join(root, "beans/06_Ark.md"), ns=(2_000_000_000, 2_000_000_000))
+        assert s.refresh() == {"parsed": 0, "rehashed": 1, "unchanged": 1, "removed": 0}
+        assert s.refresh()["unchanged"] == 2  # the new mtime was recorded
+
+
+def test_edited_file_is_reparsed_and_served_fresh(root):
+    with store(root) as s:
+        assert "first principle" in s.content("PHIL-001")
+        # Same mtime, different size: still picked up.
+        write(root, "beans/00_Philosophy.md", PHILOSOPHY.replace("The first principle.", "Rewritten."),
+              1_000_000_000)
+        assert s.refresh() == {"parsed": 1, "rehashed": 0, "unchanged": 1, "removed": 0}
+        assert s.content("PHIL-001").endswith("Rewritten.")
+        assert s.content("PHIL-002").endswith("The second principle.")
+
+
+def test_deleted_file_drops_out(root):
+    with store(root) as s:
+        os.remove(os.path.join(root, "beans/00_Philosophy.md"))
+        assert s.refresh()["removed"] == 1
+        assert "PHIL-002" not in s
+        assert s.get("PHIL-001").path == "beans/06_Ark.md"
+    with store(root) as s:
+        assert len(s) == 1
@@ -0,0 +1,61 @@
+import time
+
+from checkpoint import CheckpointLog
+
+
+def test_resume_restores_finished_stages(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    with CheckpointLog(path) as log:
+        run = log.start("topic", "o3", 3, "p1")
+        run.record("Boolean", 1, "first")
+    with CheckpointLog(path) as log:
+        run = log.resume("topic", "o3", 3, "p1")
+        assert run.get("Boolean", 1) == "first"
+        run.finish()
+        log.compact()
+    with CheckpointLog(path) as log:
+        assert log.runs == {}
+
+
+def test_changed_prompts_start_afresh(tmp_path):
+    with CheckpointLog(str(tmp_path / "log.jsonl")) as log:
+        log.start("topic", "o3", 3, "p1").record("Boolean", 1, "old soul")
+        assert log.resume("topic", "o3", 3, "p2").get("Boolean", 1) is None
+
+
+def test_a_new_run_supersedes_a_crashed_one(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    with CheckpointLog(path) as log:
+        log.start("topic", "o3", 3, "p1").record("Boolean", 1, "crashed")
+    with CheckpointLog(path) as log:
+        fresh = log.start("topic", "o3", 3, "p1")
+    with CheckpointLog(path) as log:
+        assert list(log.runs) == [fresh.id]
+        log.compact()
+    with open(path, encoding="utf-8") as f:
+        assert "crashed" not in f.read()
+
+
+def test_compact_drops_stale_runs(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    with CheckpointLog(path) as log:
+        old = log.start("old topic", "o3", 3)
+        kept = log.start("new topic", "o3", 3)
+        log.runs[old.id]["at"] = time.time() - 3600
+        log.compact(max_age=60)
+    with CheckpointLog(path) as log:
+        assert list(log.runs) == [kept.id]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    with CheckpointLog(path) as log:
+        log.start("topic", "o3", 3).record("Boolean", 1, "kept")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"run": "torn", "sta')
+    with CheckpointLog(path) as log:
+        run = log.resume("topic", "o3", 3)
+        assert run.get("Boolean", 1) == "kept"
+        run.record("Roux", 1, "after")
+    with CheckpointLog(path) as log:
+        assert log.resume("topic", "o3", 3).get("Roux", 1) == "after"
@@ -0,0 +1,45 @@
+from compaction import PositionDigest, condense, estimate_tokens, fit, fit_all
+
+
+def test_fit_cuts_at_a_boundary():
+    text = "First sentence here. Second sentence is longer than the rest of it."
+    assert fit(text, None) == text
+    assert fit(text, 100) == text
+    assert fit(text, 0) == ""
+    cut = fit(text, 8)
+    assert cut == "First sentence here. …"
+    assert estimate_tokens(cut) <= 8
+
+
+def test_fit_all_hands_leftovers_to_longer_texts():
+    short, long = "short", "x" * 400
+    fitted = fit_all([short, long, long], 60)
+    assert fitted[0] == short
+    assert sum(estimate_tokens(t) for t in fitted) <= 60
+    assert fit_all([long], 0) == [long]
+    assert fit_all([long, long], 1) == ["", ""]
+
+
+def test_condense_keeps_the_first_sentence_of_each_line():
+    assert condense("POSITION: wait. Because reasons.\n\n  NON-NEGOTIABLES:  one.  two.") == \
+        "POSITION: wait.\nNON-NEGOTIABLES: one."
+
+
+def test_digest_keeps_a_position_that_fits():
+    digest = PositionDigest(200)
+    position = "POSITION: wait. The core must be stable first, because tenants need water."
+    assert digest.update(position) == position
+
+
+def test_digest_condenses_only_when_over_budget_and_keeps_earlier_rounds():
+    digest = PositionDigest(60)
+    digest.update("Round one stance. " + "Detail. " * 5)
+    text = digest.update("Round two stance. " + "More detail here. " * 30)
+    assert text.startswith("Round two stance.")
+    assert "Earlier rounds:" in text and "Round one stance." in text
+    assert estimate_tokens(text) <= 60
+
+
+def test_zero_budget_disables_the_digest():
+    digest = PositionDigest(0)
+    assert digest.update("x" * 1000) == "x" * 1000
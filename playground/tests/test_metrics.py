@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import artifact_store
+import metrics
+
+NEGOTIATE_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "negotiate.js")
+
+WORDS = [
+    "however", "But", "but", "butter", "pushback", "push-back", "push back", "challenge", "challenges",
+    "disagree", "REJECT", "insufficient", "not enough", "hold firm", "still requires", "critically",
+    "unless", "without", "missing", "fail", "failed", "warn", "problematic", "weaker", "incomplete",
+    "agree", "agreed", "accept", "acknowledge", "exactly", "correct", "valid", "incorporate", "embrace",
+    "welcome", "appreciate", "concur", "right", "rightly", "indeed", "the", "Village", "tenants",
+    "core", "é", "naïve", "x_but", "but_", "don't", "1right", "—", "\n",
+]
+
+
+def _round(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+
+
+def _cases(n=500, seed=7):
+    rng = random.Random(seed)
+    cases = [[], [{"boolean": "", "roux": ""}], [{"boolean": "but but", "roux": None}, {"roux": "agree"}]]
+    for _ in range(n):
+        cases.append([{"boolean": _round(rng), "roux": _round(rng)} for _ in range(rng.randint(1, 5))])
+    return cases
+
+
+def _javascript(cases):
+    """computeTensionScore() from negotiate.js, run by node on every case."""
+    source = open(NEGOTIATE_JS, encoding="utf-8").read()
+    function = re.search(r"^function computeTensionScore\(.*?^}$", source, re.MULTILINE | re.DOTALL).group(0)
+    script = function + "\nconst cases = JSON.parse(require('fs').readFileSync(0, 'utf-8'));\n" \
+        "process.stdout.write(JSON.stringify(cases.map(computeTensionScore)));\n"
+    out = subprocess.run(["node", "-e", script], input=json.dumps(cases), capture_output=True, text=True,
+                         check=True, timeout=60)
+    return json.loads(out.stdout)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to run negotiate.js")
+def test_tension_matches_negotiate_js():
+    cases = _cases()
+    expected = _javascript(cases)
+    rows = metrics.as_rows(metrics.score_batch([{"rounds": rounds} for rounds in cases]))
+    assert len(expected) == len(rows) == len(cases)
+    for rounds, js, py in zip(cases, expected, rows):
+        assert (py["tension"], py["label"], py["friction"], py["agreement"], py["friction_persistence"]) == \
+            (js["score"], js["label"], js["frictionCount"], js["agreementCount"], js["frictionPersistence"]), rounds
+        assert py["per_round"] == js["perRound"], rounds
+
+
+def test_tension_of_a_known_run():
+    rounds = [{"boolean": "However, I disagree. But we fail without it.", "roux": "I agree, indeed."},
+              {"boolean": "I accept that.", "roux": "Still requires work, but right."}]
+    row = metrics.as_rows(metrics.score_batch([{"rounds": rounds}]))[0]
+    # friction 5 + 2, agreement 2 + 2; persistence 2/5; 7/12 * 0.6 + 0.4 * 0.4 = 0.51
+    assert (row["friction"], row["agreement"], row["friction_persistence"]) == (7, 4, 0.4)
+    assert row["tension"] == 0.51
+    assert row["label"] == "MEDIUM convergence with maintained differences"
+
+
+def test_rounding_is_half_up_like_javascript():
+    assert metrics._round_half_up(0.125) == 0.13
+    assert metrics._round_half_up(0.5) == 0.5
+    assert metrics.label(0.8) == "MAXIMUM positions barely moved"
+    assert metrics.label(0.19) == "MINIMAL near-consensus"
+
+
+def test_verdicts():
+    assert metrics.classify_verdict("VERDICT: HOLDS WITH CONDITIONS") == "HOLDS WITH CONDITIONS"
+    assert metrics.classify_verdict("It fails early. VERDICT: holds.") == "HOLDS"
+    assert metrics.classify_verdict("VERDICT — FRAGILE") == "FRAGILE"
+    assert metrics.classify_verdict("") == "UNCLEAR"
+
+
+def test_matches_filters():
+    meta = {"topic": "Village onboarding", "model": "o3", "ts": 1_800_000_000}
+    assert metrics.matches(meta, topic_like="village", model="o3", since="2026-01-01")
+    assert not metrics.matches(meta, model="gpt-4o")
+    assert not metrics.matches(meta, since="2030-01-01")
+
+
+def _run(text_b, text_r, rounds=2):
+    return {"rounds": [{"boolean": text_b[j], "roux": text_r[j]} for j in range(rounds)],
+            "joint_bean": "the joint bean cites PHIL-001 and LORE-002", "boolean_final": text_b[-1],
+            "roux_final": text_r[-1], "stress_test": "VERDICT: HOLDS"}
+
+
+def test_vector_cosines_match_a_dense_reference():
+    rng = np.random.default_rng(3)
+    buckets = [rng.integers(0, 64, size=rng.integers(0, 40)) for _ in range(30)]
+    vectors = metrics._Vectors(buckets, 64)
+    dense = np.array([np.bincount(b, minlength=64) for b in buckets], dtype=np.float64)
+    norms = np.linalg.norm(dense, axis=1)
+    dense = dense / np.where(norms > 0, norms, 1)[:, None]
+    a, b = rng.integers(0, 30, size=200), rng.integers(0, 30, size=200)
+    assert vectors.cosine(a, b) == pytest.approx((dense[a] * dense[b]).sum(axis=1))
+    assert vectors.cosine(a, a)[norms[a] > 0] == pytest.approx(1.0)
+
+
+def test_drift_and_convergence():
+    same = "tenants arrive after the core is stable and tested"
+    other = "onboard residents early so the village grows together"
+    still, moved = metrics.as_rows(metrics.score_batch([
+        _run([same, same], [same, same]),
+        _run([same, other], [other, other]),
+    ]))
+    assert still["drift"] == {"boolean": [0.0], "roux": [0.0]}
+    assert still["convergence"] == [1.0, 1.0]
+    assert moved["drift"]["boolean"] == [1.0] and moved["total_drift"] == {"boolean": 1.0, "roux": 0.0}
+    assert moved["convergence"] == [0.0, 1.0]  # apart in round 1, converged by the last
+    assert moved["joint_bean"]["anchors"] == 2 and moved["verdict"] == "HOLDS"
+
+
+def test_single_round_has_no_drift():
+    row, = metrics.as_rows(metrics.score_batch([_run(["a b c"], ["a b c"], rounds=1)]))
+    assert row["drift"] == {"boolean": [], "roux": []}
+    assert row["total_drift"] == {"boolean": None, "roux": None}
+
+
+def _runs(ids):
+    return [(run_id, {"model": "o3"}, _run(["a b", "a c"], ["b c", "b c"])) for run_id in ids]
+
+
+def test_log_update_scores_only_new_runs(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    log = metrics.MetricsLog(path)
+    assert log.update(_runs(["r1", "r2"])) == 2
+    assert log.update(_runs(["r1", "r2", "r3"])) == 1
+    reopened = metrics.MetricsLog(path)
+    assert len(reopened) == 3 and "r3" in reopened
+    assert reopened.update(_runs(["r1", "r2", "r3"])) == 0
+    assert [row["run_id"] for row in reopened.rows()] == ["r1", "r2", "r3"]
+
+
+def test_torn_tail_is_scored_again(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics.MetricsLog(str(path)).update(_runs(["r1", "r2"]))
+    lines = path.read_text(encoding="utf-8").splitlines()
+    path.write_text(lines[0] + "\n" + lines[1][:20], encoding="utf-8")  # crash mid-write of r2
+    log = metrics.MetricsLog(str(path))
+    assert "r1" in log and "r2" not in log
+    assert log.update(_runs(["r1", "r2"])) == 1
+    assert [row["run_id"] for row in log.rows()] == ["r1", "r2"]
+    assert len(metrics.MetricsLog(str(path))) == 2
+
+
+def test_logged_runs_are_not_read_from_the_store(tmp_path, monkeypatch):
+    store = artifact_store.ArtifactStore(str(tmp_path / "artifacts"), codec="gzip")
+    ids = [store.put(_run(["a b", "a c"], ["b c", "b c"]), model="o3") for _ in range(3)]
+    log = metrics.MetricsLog(str(tmp_path / "metrics.jsonl"))
+    assert log.update(metrics.store_runs(store, exclude=log)) == 3
+    loaded = []
+    load = store._load
+    monkeypatch.setattr(store, "_load", lambda info: loaded.append(info.run_id) or load(info))
+    new = store.put(_run(["a b", "a c"], ["b c", "b c"]), model="o3")
+    assert log.update(metrics.store_runs(store, exclude=log)) == 1
+    assert loaded == [new] and new not in ids
+    store.close()
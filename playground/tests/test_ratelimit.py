@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import pytest
+
+import ratelimit
+
+
+def test_bucket_rejects_bad_limits():
+    with pytest.raises(ValueError):
+        ratelimit.TokenBucket(0, 1)
+    with pytest.raises(ValueError):
+        ratelimit.TokenBucket(1, 0)
+
+
+def test_burst_is_free_then_paced():
+    async def take(n):
+        bucket = ratelimit.TokenBucket(rate=50, capacity=3)
+        started = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(take(3)) < 0.02
+    assert asyncio.run(take(5)) >= 2 / 50 * 0.9
+
+
+def test_throttle_blocks_every_waiter():
+    async def main():
+        bucket = ratelimit.TokenBucket(rate=1000, capacity=5)
+        bucket.throttle(0.05)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.045
+
+
+def test_env_override(monkeypatch):
+    monkeypatch.setenv("PLAYGROUND_RATE_EXAMPLE", "5:10")
+    assert ratelimit._limit_for("example") == (5.0, 10)
+    monkeypatch.setenv("PLAYGROUND_RATE_EXAMPLE", "3")
+    assert ratelimit._limit_for("example") == (3.0, 1)
+    assert ratelimit._limit_for("unknown") == ratelimit.DEFAULT_LIMIT
+
+
+def test_retry_after_seconds():
+    assert ratelimit.retry_after_seconds(None, 2.0) == 2.0
+    assert ratelimit.retry_after_seconds({"retry-after-ms": "250"}) == 0.25
+    assert ratelimit.retry_after_seconds({"retry-after": "3"}) == 3.0
+    assert ratelimit.retry_after_seconds({"retry-after": "soon"}, 1.5) == 1.5
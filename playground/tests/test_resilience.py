@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, Resilience, classify
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = Response(status, headers)
+
+
+class ConnectError(Exception):
+    pass
+
+
+def failing(errors, result="ok"):
+    """fn(model) raising `errors` in turn, then returning `result`; calls are recorded."""
+    calls = []
+
+    def fn(model):
+        calls.append(model)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def test_classify():
+    assert classify(HTTPError(429, {"retry-after": "2"})) == (True, 2.0)
+    assert classify(HTTPError(503)) == (True, None)
+    assert classify(HTTPError(400)) == (False, None)
+    assert classify(TimeoutError()) == (True, None)
+    assert classify(ConnectError()) == (True, None)
+    assert classify(ValueError()) == (False, None)
+    err = HTTPError(502)
+    err.retryable = False  # a retry opt-out does not make the failure healthy
+    assert classify(err) == (True, None)
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.retry_in() == 10
+    clock.now += 10
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0 and breaker.allow()
+
+
+def test_backoff_is_seeded_jittered_and_honours_retry_after():
+    a, b = Resilience(base_delay=1, max_delay=8, seed=3), Resilience(base_delay=1, max_delay=8, seed=3)
+    delays = [a.backoff(n) for n in range(6)]
+    assert delays == [b.backoff(n) for n in range(6)]
+    assert all(0 <= d <= min(8, 2 ** n) for n, d in enumerate(delays))
+    assert a.backoff(0, retry_after=5) == 5
+
+
+def test_transient_failures_are_retried():
+    policy = Resilience(retries=3, base_delay=0)
+    fn = failing([HTTPError(503), TimeoutError()])
+    span = {}
+    assert policy.call("m", fn, span) == "ok"
+    assert len(fn.calls) == 3 and span["retries"] == 2 and span["model"] == "m"
+    assert policy.breaker("m").failures == 0
+
+
+def test_bad_requests_are_not_retried_and_leave_the_model_healthy():
+    policy = Resilience(retries=3, base_delay=0, failure_threshold=1)
+    fn = failing([HTTPError(400)])
+    with pytest.raises(HTTPError):
+        policy.call("m", fn)
+    assert len(fn.calls) == 1 and policy.breaker("m").state == "closed"
+
+
+def test_opted_out_failures_still_count_against_the_breaker():
+    policy = Resilience(retries=3, base_delay=0, failure_threshold=1)
+    err = ConnectError("dropped mid-stream")
+    err.retryable = False
+    fn = failing([err])
+    with pytest.raises(ConnectError):
+        policy.call("m", fn)
+    assert len(fn.calls) == 1
+    assert policy.breaker("m").state == "open"
+
+
+def test_retry_after_past_max_delay_fails_fast():
+    policy = Resilience(retries=3, base_delay=0, max_delay=20)
+    fn = failing([HTTPError(429, {"retry-after": "3600"})])
+    started = time.monotonic()
+    with pytest.raises(HTTPError):
+        policy.call("m", fn)
+    assert len(fn.calls) == 1 and time.monotonic() - started < 1
+
+
+def test_open_breaker_routes_to_the_fallback_then_fails_fast():
+    clock = Clock()
+    policy = Resilience(retries=0, failure_threshold=1, reset_timeout=30, clock=clock,
+                        fallbacks={"m": "backup"})
+    with pytest.raises(HTTPError):
+        policy.call("m", failing([HTTPError(500)]))
+    span = {}
+    fn = failing([])
+    assert policy.call("m", fn, span) == "ok"
+    assert fn.calls == ["backup"] and span["fallbacks"] == 1
+    with pytest.raises(HTTPError):
+        policy.call("backup", failing([HTTPError(500)]))
+    with pytest.raises(CircuitOpenError) as info:
+        policy.call("m", fn)
+    assert info.value.retry_in == 30
+    clock.now += 30
+    assert policy.call("m", fn) == "ok" and fn.calls[-1] == "m"
+
+
+def test_sync_hedge_takes_the_first_answer():
+    policy = Resilience(hedge=0.02)
+    calls, release = [], threading.Event()
+
+    def fn(model):
+        calls.append(model)
+        if len(calls) == 1:
+            release.wait(5)  # the stuck first attempt
+            return "slow"
+        return "fast"
+
+    span = {}
+    assert policy.call("m", fn, span) == "fast"
+    assert span["hedges"] == 1
+    release.set()
+
+
+def test_async_hedge_cancels_the_loser():
+    async def main():
+        policy = Resilience(hedge=0.02)
+        calls, cancelled = [], []
+
+        async def fn(model):
+            calls.append(model)
+            try:
+                await asyncio.sleep(5 if len(calls) == 1 else 0)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+            return len(calls)
+
+        span = {}
+        assert await policy.acall("m", fn, span) == 2
+        await asyncio.sleep(0)
+        return span, cancelled
+
+    span, cancelled = asyncio.run(main())
+    assert span["hedges"] == 1 and cancelled == ["m"]
+
+
+def test_no_hedge_without_enough_samples():
+    policy = Resilience(hedge="p95", hedge_min_samples=3)
+    assert policy.hedge_delay("m") is None
+    for seconds in (0.1, 0.2, 0.3):
+        policy._observe("m", seconds)
+    assert 0.2 <= policy.hedge_delay("m") <= 0.3
+    assert Resilience().hedge_delay("m") is None
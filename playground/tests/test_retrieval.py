@@ -0,0 +1,79 @@
+import math
+import os
+from collections import Counter
+
+import pytest
+
+from bean_store import BeanStore
+from retrieval import B, K1, BeanIndex, Grounding, tokenize
+
+CORPUS = """# Corpus
+
+## [BEAN #VIL-001] Village Tenants
+Onboard tenants early so the village grows with its residents.
+
+## [BEAN #VIL-002] Village Finance
+Finance the village through membership, not tenants.
+
+## [BEAN #PHIL-001] Fun Execution
+Intrinsic motivation meets bizarre logic.
+
+## [BEAN #LORE-001] Garden Lore
+The garden remembers every gardener.
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    os.makedirs(tmp_path / "beans")
+    (tmp_path / "beans" / "00_Corpus.md").write_text(CORPUS, encoding="utf-8")
+    with BeanStore(str(tmp_path), index_path=None) as store:
+        yield BeanIndex(store)
+
+
+def reference_scores(index, query):
+    """Textbook BM25, one bean at a time."""
+    docs = [Counter(tokenize(f"{b.title} {index.store.section(b).split(chr(10), 1)[1]}")) for b in index.beans]
+    avg = sum(sum(d.values()) for d in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        length, score = sum(doc.values()), 0.0
+        for term in tokenize(query):
+            df = sum(term in d for d in docs)
+            if term in doc:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * doc[term] * (K1 + 1) / (doc[term] + K1 * (1 - B + B * length / avg))
+        scores.append(score)
+    return scores
+
+
+def test_scores_match_textbook_bm25(index):
+    for query in ("village tenants", "garden", "bizarre village logic", "unknown words"):
+        assert index.scores(query) == pytest.approx(reference_scores(index, query))
+
+
+def test_search_ranks_best_first(index):
+    assert [b.bean_id for b, _ in index.search("onboard village tenants")] == ["VIL-001", "VIL-002"]
+    assert [b.bean_id for b, _ in index.search("village", exclude=["VIL-002"])] == ["VIL-001"]
+    assert index.search("nothing matches") == []
+
+
+def test_context_only_breaks_ties(index):
+    top = [b.bean_id for b, _ in index.search("village", k=1, context="membership finance")]
+    assert top == ["VIL-002"]
+
+
+def test_grounding_is_cached_per_spirit_topic_anchor_and_soul(index, monkeypatch):
+    searches = []
+    search = index.search
+    monkeypatch.setattr(index, "search", lambda *a, **kw: searches.append(a) or search(*a, **kw))
+    grounding = Grounding(index, k=2, budget=300)
+    ids, text = grounding.select("rmm", "village tenants", anchor="PHIL-001")
+    assert ids == ["PHIL-001", "VIL-001", "VIL-002"] and text.startswith("[PHIL-001] Fun Execution")
+    assert grounding.select("rmm", "village tenants", anchor="PHIL-001") == (ids, text)
+    assert len(searches) == 1
+    assert grounding.select("rmm", "village tenants", anchor="LORE-001")[0][0] == "LORE-001"
+    assert len(searches) == 2
+    one = Grounding(index, k=1, budget=300)
+    assert one.select("rmm", "village")[0] == ["VIL-002"]
+    assert one.select("rmm", "village", soul="onboard residents early")[0] == ["VIL-001"]  # an edited Soul Code
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from spirit_registry import SPIRITS_DIR, SpiritRegistry, load_spirits, system_prompt
+
+PROVIDER_JS = os.path.join(os.path.dirname(SPIRITS_DIR), "provider.js")
+
+# Renders every Spirit through provider.js send(), capturing the system prompt instead of calling out.
+RENDER_JS = """
+const provider = require(process.argv[1]);
+const spirits = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+(async () => {
+  const prompts = {};
+  for (const [name, spirit] of Object.entries(spirits)) {
+    provider.PROVIDERS[spirit.provider] = async (key, model, systemPrompt) => systemPrompt;
+    prompts[name] = await provider.send(spirit, 'key', 'hello');
+  }
+  process.stdout.write(JSON.stringify(prompts));
+})();
+"""
+
+
+def spirit(name, identity="a test Spirit.", principles=("Be brief.",)):
+    return {"spirit": name, "provider": "openai", "model": "gpt-4o-mini", "anchor": "PHIL-001",
+            "soul_code": {"identity": identity, "principles": list(principles),
+                          "constraints": ["Never lie."], "negotiation_style": "Direct."}}
+
+
+def write(directory, filename, data, mtime_ns=None):
+    path = os.path.join(directory, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+@pytest.fixture
+def spirits_dir(tmp_path):
+    write(tmp_path, "alpha.json", spirit("Alpha"), 1_000_000_000)
+    write(tmp_path, "beta.json", spirit("Beta"), 1_000_000_000)
+    return str(tmp_path)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_prompts_match_provider_js():
+    spirits = load_spirits()
+    spirits["Unicode"] = spirit("Unicode", "a Spirit of “quotes” — and émoji ✨", ["One", "Two: ${not a template}"])
+    rendered = subprocess.run(["node", "-e", RENDER_JS, PROVIDER_JS], input=json.dumps(spirits),
+                              capture_output=True, text=True, check=True, timeout=30).stdout
+    assert json.loads(rendered) == {name: system_prompt(s) for name, s in spirits.items()}
+
+
+def test_edited_file_is_reloaded_and_rendered_once(spirits_dir):
+    registry = SpiritRegistry(spirits_dir, check_interval=0)
+    before = registry.system_prompt("Alpha")
+    assert registry.system_prompt("Alpha") == before
+    assert registry.stats["renders"] == 1 and registry.stats["hits"] == 1
+
+    write(spirits_dir, "alpha.json", spirit("Alpha", "an edited Spirit."))
+    assert registry.system_prompt("Alpha").startswith("You are an edited Spirit.")
+    assert registry.stats["reloads"] == 2 and registry.stats["renders"] == 2
+
+    write(spirits_dir, "alpha.json", spirit("Alpha"))  # restored content hits the cache
+    assert registry.system_prompt("Alpha") == before
+    assert registry.stats["renders"] == 2
+
+
+def test_touched_file_is_not_reparsed(spirits_dir):
+    registry = SpiritRegistry(spirits_dir, check_interval=0)
+    os.utime(os.path.join(spirits_dir, "beta.json"), ns=(2_000_000_000, 2_000_000_000))
+    assert registry.refresh() is False
+    assert registry.stats["reloads"] == 1
+
+
+def test_added_and_removed_files_are_picked_up(spirits_dir):
+    registry = SpiritRegistry(spirits_dir, check_interval=0)
+    write(spirits_dir, "gamma.json", spirit("Gamma"))
+    os.remove(os.path.join(spirits_dir, "beta.json"))
+    assert registry.names() == ["Alpha", "Gamma"]
+    with pytest.raises(KeyError, match="Beta"):
+        registry.get("Beta")
+
+
+def test_lookups_within_the_check_interval_skip_the_directory(spirits_dir):
+    registry = SpiritRegistry(spirits_dir, check_interval=3600)
+    write(spirits_dir, "gamma.json", spirit("Gamma"))
+    assert "Gamma" not in registry
+    assert registry.refresh() and "Gamma" in registry
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Tournament scheduler: N Spirits, pairwise negotiations, one pass.
+
+Loads Spirits from spirits/*.json and runs every pairing of a round-robin
+(or the matches of a single-elimination bracket) through the same
+protocol as codex_playground.negotiate(): round1_prompt, then
+round_n_prompt against the other Spirit's rolling digest, then the Loom.
+
+The whole tournament is one dependency DAG of asyncio tasks. A node is a
+single LLM call (a Spirit's position in one round of one pairing, a Loom
+synthesis, a Seer stress test) and starts the moment its inputs exist,
+so round 3 of one pairing never waits for round 2 of another. Round 1
+depends only on the topic, so each Spirit's opening position is computed
+once and shared by every pairing it appears in: a round-robin of N
+Spirits makes N opening calls instead of N·(N-1).
+
+Codex Edition: every Spirit runs on codex_playground.MODEL; the
+"provider"/"model" fields in the Spirit files are ignored here.
+
+Usage:
+    python playground/tournament.py --topic "..." -o tournament.jsonl
+    python playground/tournament.py --format bracket --rounds 2 spirits/boolean.json spirits/seer.json ...
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+import uuid
+
+import codex_playground
+from codex_playground import (
+    LOOM_SYSTEM, acall, loom_prompt, round1_prompt, round_n_prompt, stress_test_prompt,
+)
+from compaction import PositionDigest, fit_all
+from spirit_registry import load_spirits, system_prompt
+from tracing import labels, tracer
+
+FORMATS = ("round-robin", "bracket")
+
+
+# ─── PAIRINGS ───────────────────────────────────────────────
+
+def round_robin(names):
+    return list(itertools.combinations(names, 2))
+
+
+def seed_order(size):
+    """
+    Seed numbers in bracket slot order for a power-of-two `size`: seed 1
+    meets seed `size`, 2 meets `size - 1`, and so on, with seeds 1 and 2
+    in opposite halves.
+    """
+    order = [1]
+    while len(order) < size:
+        n = 2 * len(order)
+        order = [s for seed in order for s in (seed, n + 1 - seed)]
+    return order
+
+
+def _ngrams(text, n=2):
+    words = text.lower().split()
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def advancing(match):
+    """
+    Bracket winner: the Spirit whose final position the joint bean draws
+    on most (share of its word bigrams reused by the Loom). Ties go to the
+    higher seed, i.e. the first Spirit of the pairing.
+    """
+    bean = _ngrams(match["joint_bean"])
+    a, b = match["spirits"]
+
+    def share(name):
+        grams = _ngrams(match["finals"][name])
+        return len(grams & bean) / len(grams) if grams else 0.0
+
+    return a if share(a) >= share(b) else b
+
+
+async def _all(aws):
+    """
+    gather() that waits for every sibling, so a failure leaves no task
+    un-awaited and finished matches still reach on_match; then raises the
+    first error.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+# ─── SCHEDULER ──────────────────────────────────────────────
+
+class Tournament:
+    """
+    Memoised task DAG for one topic.
+
+    Every node is keyed, so asking for the same position twice (a shared
+    opening, or a pairing that both a round-robin and a bracket need)
+    returns the same task. Dependencies are awaited before a call takes a
+    slot of the `concurrency` gate, so waiting nodes never hold one.
+    """
+
+    def __init__(self, topic, spirits, rounds=codex_playground.ROUNDS, concurrency=8,
+                 stress_test=False, on_match=None):
+        if len(spirits) < 2:
+            raise ValueError("a tournament needs at least two Spirits")
+        self.topic = topic
+        self.spirits = spirits
+        self.anchors, self.systems = {}, {}
+        for name, spirit in spirits.items():
+            self.anchors[name], self.systems[name] = codex_playground.ground(
+                name, system_prompt(spirit), topic, spirit.get("anchor"))
+        _, self.seer_system = codex_playground.ground("Seer", codex_playground.spirits.system_prompt("Seer"), topic)
+        self.rounds = rounds
+        self.stress_test = stress_test
+        self.on_match = on_match
+        self.calls = 0
+        self._gate = asyncio.Semaphore(concurrency)
+        self._nodes = {}
+
+    def _node(self, key, build):
+        task = self._nodes.get(key)
+        if task is None:
+            task = self._nodes[key] = asyncio.ensure_future(build())
+        return task
+
+    async def _call(self, stage, spirit, rnd, system, prompt):
+        async with self._gate:
+            with labels(stage=stage, spirit=spirit, round=rnd):
+                self.calls += 1
+                return await acall(system, prompt)
+
+    def position(self, a, b, rnd):
+        """`a`'s response in round `rnd` of its negotiation with `b`."""
+        if rnd == 1:
+            return self._node(("opening", a), lambda: self._call(
+                "round", a, 1, self.systems[a], round1_prompt(self.topic, self.rounds)))
+
+        async def build():
+            other = await self.digest(b, a, rnd - 1)
+            return await self._call(
+                "round", a, rnd, self.systems[a], round_n_prompt(self.topic, rnd, other, self.rounds))
+
+        return self._node(("position", a, b, rnd), build)
+
+    def digest(self, a, b, rnd):
+        """`a`'s rolling position digest (compaction.py) after round `rnd` against `b`."""
+        key = ("digest", a, None, 1) if rnd == 1 else ("digest", a, b, rnd)
+
+        async def build():
+            digest = PositionDigest(codex_playground.CONTEXT_BUDGETS["round"])
+            if rnd > 1:
+                digest.text = await self.digest(a, b, rnd - 1)
+            return digest.update(await self.position(a, b, rnd))
+
+        return self._node(key, build)
+
+    def match(self, a, b):
+        """One full pairing: both Spirits' rounds, the Loom and optionally the Seer."""
+        async def build():
+            with labels(match=f"{a} vs {b}"), tracer.span("match", model=codex_playground.MODEL):
+                started = time.perf_counter()
+                history = []
+                for rnd in range(1, self.rounds + 1):
+                    pa, pb = await _all([self.position(a, b, rnd), self.position(b, a, rnd)])
+                    history.append({"round": rnd, a: pa, b: pb})
+                final_a, final_b = history[-1][a], history[-1][b]
+                finals = fit_all([final_a, final_b], codex_playground.CONTEXT_BUDGETS["loom"])
+                joint = await self._call(
+                    "loom", "Loom", None, LOOM_SYSTEM,
+                    loom_prompt(self.topic, *finals, self.rounds, names=(a, b), anchors=self.anchors))
+                result = {
+                    "match": f"{a} vs {b}",
+                    "spirits": [a, b],
+                    "rounds": history,
+                    "finals": {a: final_a, b: final_b},
+                    "joint_bean": joint,
+                }
+                if self.stress_test:
+                    context = fit_all([final_a, final_b, joint],
+                                      codex_playground.CONTEXT_BUDGETS["stress_test"])
+                    result["stress_test"] = await self._call(
+                        "seer", "Seer", None, self.seer_system,
+                        stress_test_prompt(self.topic, *context, self.rounds, names=(a, b)))
+                result["elapsed_s"] = round(time.perf_counter() - started, 3)
+            if self.on_match is not None:
+                self.on_match(result)
+            return result
+
+        return self._node(("match", a, b), build)
+
+    async def round_robin(self):
+        """Every pairing at once; returns match results in pairing order."""
+        return await _all([self.match(a, b) for a, b in round_robin(list(self.spirits))])
+
+    async def bracket(self, seeds=None):
+        """
+        Single elimination in seed order (byes for the top seeds when the
+        field is not a power of two). Each match starts as soon as both of
+        its feeder matches have produced a winner, not when the whole
+        bracket level is done. Returns (champion, matches played).
+        """
+        field = list(seeds or self.spirits)
+        size = 1 << (len(field) - 1).bit_length()
+        slots = [field[seed - 1] if seed <= len(field) else None for seed in seed_order(size)]
+        played = []
+
+        async def winner(slots):
+            if len(slots) == 1:
+                return slots[0]
+            half = len(slots) // 2
+            a, b = await _all([winner(slots[:half]), winner(slots[half:])])
+            if a is None or b is None:
+                return a or b  # a bye
+            a, b = sorted((a, b), key=field.index)  # higher seed first: it wins ties
+            result = await self.match(a, b)
+            result["advances"] = advancing(result)
+            played.append(result)
+            return result["advances"]
+
+        champion = await winner(slots)
+        return champion, played
+
+
+async def run_tournament(topic, spirits, fmt="round-robin", rounds=codex_playground.ROUNDS,
+                         concurrency=8, stress_test=False, on_match=None):
+    """Run a whole tournament in one pass and return its summary record."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    with labels(tournament=uuid.uuid4().hex[:12]), tracer.span("tournament", model=codex_playground.MODEL):
+        started = time.perf_counter()
+        t = Tournament(topic, spirits, rounds, concurrency, stress_test, on_match)
+        summary = {"topic": topic, "model": codex_playground.MODEL, "format": fmt,
+                   "rounds": rounds, "spirits": list(spirits)}
+        if fmt == "bracket":
+            summary["champion"], summary["matches"] = await t.bracket()
+        else:
+            summary["matches"] = await t.round_robin()
+        summary["calls"] = t.calls
+        summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Spirit tournament on one topic")
+    parser.add_argument("spirits", nargs="*", help="Spirit JSON files (default: spirits/*.json)")
+    parser.add_argument("--topic", default=codex_playground.TOPIC)
+    parser.add_argument("--format", choices=FORMATS, default="round-robin")
+    parser.add_argument("--rounds", type=int, default=codex_playground.ROUNDS)
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="LLM calls in flight at once")
+    parser.add_argument("--stress-test", action="store_true", help="run the Seer on every joint bean")
+    parser.add_argument("-o", "--output", default="tournament_results.jsonl",
+                        help="one JSON line per finished match")
+    args = parser.parse_args()
+
+    spirits = load_spirits(args.spirits)
+    print(f" Tournament ({args.format}): {', '.join(spirits)} × {args.rounds} rounds", file=sys.stderr)
+
+    with open(args.output, "a", encoding="utf-8") as out:
+        def on_match(result):
+            out.write(json.dumps({"topic": args.topic, **result}, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f" done {result['match']} ({result['elapsed_s']}s)", file=sys.stderr)
+
+        summary = asyncio.run(run_tournament(
+            args.topic, spirits, args.format, args.rounds, args.concurrency, args.stress_test, on_match))
+
+    if args.format == "bracket":
+        print(f" Champion: {summary['champion']}", file=sys.stderr)
+    print(f" {len(summary['matches'])} matches, {summary['calls']} calls in {summary['elapsed_s']}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
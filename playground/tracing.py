@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Structured per-call spans for the playground and the AI Studio client.
+
+Every traced operation emits one span (a flat dict) to a pluggable sink:
+stage, spirit, round, model, prompt/completion tokens, wall time,
+retries, cache hit/miss and status. Callers attach context such as the
+Spirit and round with `labels()`; it flows through asyncio tasks via
+contextvars, so call sites deep in the engine need no extra arguments.
+
+Enable the JSONL sink for the playground with PLAYGROUND_TRACE=trace.jsonl,
+then summarise a run:
+    python playground/tracing.py summary trace.jsonl --by stage,spirit
+"""
+
+import argparse
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_labels = contextvars.ContextVar("trace_labels", default={})
+
+
+@contextmanager
+def labels(**attrs):
+    """Attach `attrs` to every span opened inside this block (including in child tasks)."""
+    token = _labels.set({**_labels.get(), **attrs})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+class Span(dict):
+    """A span is a plain dict so sinks can serialise it directly."""
+
+    def incr(self, key, n=1):
+        self[key] = self.get(key, 0) + n
+
+
+class MemorySink:
+    """Keeps spans in a list; for benchmarks and interactive inspection."""
+
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span):
+        self.spans.append(span)
+
+
+class JsonlSink:
+    """Appends one JSON line per span. Safe to share across threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._f = open(path, "a", encoding="utf-8")
+
+    def emit(self, span):
+        line = json.dumps(span, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+class Tracer:
+    """Opens spans and hands finished ones to `sink` (None discards them)."""
+
+    def __init__(self, sink=None):
+        self.sink = sink
+
+    @contextmanager
+    def span(self, stage=None, **attrs):
+        context = _labels.get()
+        span = Span(context)
+        span.update(attrs)
+        span["stage"] = stage or context.get("stage") or "call"
+        span["start"] = time.time()
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as err:
+            span["status"] = "error"
+            span["error"] = f"{type(err).__name__}: {err}"
+            raise
+        else:
+            span.setdefault("status", "ok")
+        finally:
+            span["wall_s"] = round(time.perf_counter() - started, 6)
+            if self.sink is not None:
+                self.sink.emit(span)
+
+
+def sink_from_env():
+    path = os.getenv("PLAYGROUND_TRACE")
+    return JsonlSink(path) if path else None
+
+
+# Process-wide tracer used by codex_playground; swap `tracer.sink` to redirect.
+tracer = Tracer(sink_from_env())
+
+
+# ─── SUMMARY ────────────────────────────────────────────────
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(spans, by=("stage",)):
+    """Group spans by the `by` keys and compute latency percentiles per group."""
+    groups = defaultdict(list)
+    for span in spans:
+        groups[tuple(span.get(k) for k in by)].append(span)
+
+    rows = []
+    for key, members in sorted(groups.items(), key=lambda kv: [str(k) for k in kv[0]]):
+        walls = sorted(s["wall_s"] for s in members if "wall_s" in s)
+        cached = [s for s in members if s.get("cache") in ("hit", "miss")]
+        rows.append({
+            **dict(zip(by, key)),
+            "count": len(members),
+            "errors": sum(1 for s in members if s.get("status") == "error"),
+            "retries": sum(s.get("retries", 0) for s in members),
+            "p50_s": percentile(walls, 50),
+            "p95_s": percentile(walls, 95),
+            "p99_s": percentile(walls, 99),
+            "max_s": walls[-1] if walls else None,
+            "cache_hit_rate": (sum(1 for s in cached if s["cache"] == "hit") / len(cached)) if cached else None,
+            "completion_tokens": sum(s.get("completion_tokens") or 0 for s in members),
+        })
+    return rows
+
+
+def read_spans(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def print_summary(rows, by):
+    def fmt(v):
+        return "-" if v is None else f"{v:.3f}"
+
+    headers = list(by) + ["count", "p50", "p95", "p99", "max", "retries", "errors", "cache"]
+    table = []
+    for r in rows:
+        cache = "-" if r["cache_hit_rate"] is None else f"{r['cache_hit_rate']:.0%}"
+        table.append(["-" if r[k] is None else str(r[k]) for k in by] + [
+            str(r["count"]), fmt(r["p50_s"]), fmt(r["p95_s"]), fmt(r["p99_s"]), fmt(r["max_s"]),
+            str(r["retries"]), str(r["errors"]), cache,
+        ])
+    widths = [max(len(h), *(len(row[i]) for row in table)) if table else len(h)
+              for i, h in enumerate(headers)]
+    print(" ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in table:
+        print(" ".join(c.ljust(w) for c, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Playground trace tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="p50/p95/p99 wall time per stage")
+    summary.add_argument("trace", help="JSONL trace file (PLAYGROUND_TRACE)")
+    summary.add_argument("--by", default="stage", help="comma-separated grouping keys")
+    args = parser.parse_args()
+
+    by = tuple(k.strip() for k in args.by.split(",") if k.strip())
+    print_summary(summarize(read_spans(args.trace), by), by)
+
+
+if __name__ == "__main__":
+    main()